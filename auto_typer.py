@@ -1,13 +1,37 @@
 import tkinter as tk
-from tkinter import ttk, scrolledtext
-import pyautogui
-import time
+from tkinter import ttk, scrolledtext, filedialog, messagebox
 import threading
-import keyboard
-import json
 import os
-import pyperclip
-from pathlib import Path
+import sqlite3
+
+# pyautogui, keyboard and pyperclip are slow to import, they are loaded once
+# the window is up (see finish_startup) or when first needed
+from typing_core import TypingEngine, TypingSettings, TypingJob, TypingWorker, ProcessEngine, default_backend, FileSource, contains_arabic, wpm_to_cps
+from typing_core.checkpoint import CheckpointStore, DEFAULT_CHECKPOINT_PATH
+from typing_core.expander import AbbreviationExpander, expansion_settings
+from typing_core.fanout import parse_window_ids
+from typing_core.hotkeys import HotkeyListener, DEFAULT_HOTKEYS
+from typing_core.humanize import DEFAULT_JITTER, DISTRIBUTIONS
+from typing_core.jobs import saved_text_job
+from typing_core.store import SavedTextStore, DEFAULT_STORE_PATH, LEGACY_JSON_PATH
+from typing_core.text_index import TextIndex
+from typing_core.ui_channel import UIUpdateChannel, FRAME_INTERVAL_MS
+
+# Time after the first frame before hotkeys and the keyboard backend are set up
+STARTUP_WORK_DELAY_MS = 100
+
+# How often the Tk thread checks whether the engine and the saved texts
+# have been loaded by their threads, it never waits for them
+LOAD_POLL_MS = 100
+
+# How often the Queue tab refreshes its depth and ETA
+QUEUE_REFRESH_MS = 1000
+
+# Options kept in a settings profile, each is the widget variable <name>_var
+PROFILE_FIELDS = ("delay", "speed", "target_rate", "rate_unit", "catch_up", "lang_mode",
+                  "english_mode", "arabic_mode", "arabic_word_mode", "clipboard_delay",
+                  "humanize", "jitter", "distribution", "typo_rate", "diff_level", "diff_lines",
+                  "instrument", "theme")
 
 class AutoTyperApp:
     def __init__(self, root):
@@ -24,13 +48,53 @@ class AutoTyperApp:
             
         # Variables
         self.typing_active = False
-        self.pause_typing = False
-        self.current_thread = None
-        self.saved_texts = {}
-        self.config_file = Path("auto_typer_config.json")
+        # The worker only posts to this channel, the Tk thread drains it
+        self.ui_updates = UIUpdateChannel()
+        self.ui_polling = False
+        # Created by get_engine(), importing pyautogui is left out of startup;
+        # every run, from Start or from the queue, is a job on the one worker.
+        # Keystrokes are sent from a worker process when it starts, so the
+        # Tk loop cannot delay them
+        self.engine = None
+        self.worker = None
+        self.queue_view = None
+        self.engine_lock = threading.Lock()
+        # Set by the loading thread once get_engine() has finished, with or
+        # without an engine; typing buttons stay disabled until then
+        self.engine_ready = threading.Event()
+        self.text_store = None
+        # Search index over saved texts, filled by the store thread
+        self.text_index = TextIndex()
+        self.store_ready = threading.Event()
+        self.store_thread = None
+        self.saved_list = None
+        self.visible_names = []
+        self.search_after_id = None
+        self.store_file = DEFAULT_STORE_PATH
+        # Saved texts used to live in this file, it is migrated on first start
+        self.config_file = LEGACY_JSON_PATH
         
-        # Load saved texts
-        self.load_saved_texts()
+        # Variables shared with tabs that are only built when first opened
+        self.search_var = tk.StringVar()
+        self.theme_var = tk.StringVar(value="light")
+        self.clipboard_delay_var = tk.StringVar(value="0.3")
+        self.instrument_var = tk.BooleanVar(value=False)
+        self.humanize_var = tk.BooleanVar(value=False)
+        self.jitter_var = tk.StringVar(value=str(int(DEFAULT_JITTER * 100)))
+        self.distribution_var = tk.StringVar(value="lognormal")
+        self.typo_rate_var = tk.StringVar(value="0")
+        self.diff_level_var = tk.StringVar(value="character")
+        self.diff_lines_var = tk.BooleanVar(value=False)
+        self.queue_name_var = tk.StringVar()
+        self.queue_first_var = tk.StringVar()
+        self.queue_last_var = tk.StringVar()
+        self.queue_priority_var = tk.StringVar(value="0")
+        self.queue_status_var = tk.StringVar(value="Queue empty")
+        self.profile_var = tk.StringVar()
+        self.abbreviation_var = tk.StringVar()
+        self.expand_var = tk.BooleanVar(value=False)
+        # Text expander, its keyboard hook is only installed when turned on
+        self.expander = None
         
         # Create main frame
         main_frame = ttk.Frame(root, padding="10")
@@ -48,18 +112,22 @@ class AutoTyperApp:
         saved_frame = ttk.Frame(self.notebook)
         self.notebook.add(saved_frame, text="Saved Texts")
         
+        # Create queue tab
+        queue_frame = ttk.Frame(self.notebook)
+        self.notebook.add(queue_frame, text="Queue")
+        
         # Create settings tab
         settings_frame = ttk.Frame(self.notebook)
         self.notebook.add(settings_frame, text="Settings")
         
-        # Setup typing tab
+        # Setup typing tab, the other tabs are filled when first selected
         self.setup_typing_tab(typing_frame)
-        
-        # Setup saved texts tab
-        self.setup_saved_texts_tab(saved_frame)
-        
-        # Setup settings tab
-        self.setup_settings_tab(settings_frame)
+        self.pending_tabs = {
+            str(saved_frame): self.setup_saved_texts_tab,
+            str(queue_frame): self.setup_queue_tab,
+            str(settings_frame): self.setup_settings_tab,
+        }
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
         
         # Status bar
         self.status_var = tk.StringVar()
@@ -67,16 +135,123 @@ class AutoTyperApp:
         status_bar = ttk.Label(root, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
         status_bar.pack(side=tk.BOTTOM, fill=tk.X)
         
-        # Set up hotkeys
-        keyboard.add_hotkey('f6', self.start_typing)
-        keyboard.add_hotkey('f7', self.toggle_pause)
-        keyboard.add_hotkey('f8', self.stop_typing)
-        
         # Apply theme
         self.apply_theme()
         
         # Initialize context menu
         self.create_text_context_menu()
+        
+        # Open the saved texts database in the background
+        self.store_thread = threading.Thread(target=self.load_saved_texts, daemon=True)
+        self.store_thread.start()
+        
+        # Hotkeys and the typing backend are set up once the window is shown
+        self.root.after(STARTUP_WORK_DELAY_MS, self.finish_startup)
+
+    def finish_startup(self):
+        """Startup work that does not need to happen before the first frame"""
+        # Hotkeys only queue commands, poll_hotkeys runs them on the Tk
+        # thread; stop also reaches the engine straight from the hook thread
+        self.hotkeys = HotkeyListener(
+            DEFAULT_HOTKEYS,
+            direct={"stop": self.stop_engine},
+            is_injecting=lambda: self.typing_active,
+        )
+        try:
+            self.hotkeys.start()
+            self.root.after(FRAME_INTERVAL_MS, self.poll_hotkeys)
+        except Exception as e:
+            print(f"Hotkey setup error: {e}")
+            self.status_var.set(f"Hotkeys unavailable: {str(e)}")
+        
+        # Load the typing backend off the Tk thread so the first Start has no
+        # lag, this also brings back the queue of the last session
+        threading.Thread(target=self.load_engine, daemon=True).start()
+        self.root.after(LOAD_POLL_MS, self.wait_for_engine)
+        
+        # Refresh search results once the saved bodies are indexed
+        self.root.after(200, self.check_body_index)
+
+    def poll_hotkeys(self):
+        handlers = {"start": self.start_typing, "pause": self.toggle_pause, "stop": self.stop_typing}
+        for command in self.hotkeys.drain():
+            handlers[command]()
+        self.root.after(FRAME_INTERVAL_MS, self.poll_hotkeys)
+
+    def stop_engine(self):
+        """Stop the engine without touching Tk, safe from any thread"""
+        engine = self.engine
+        if engine is not None:
+            engine.stop()
+
+    def load_engine(self):
+        """Create the engine and its worker, runs off the Tk thread"""
+        try:
+            self.get_engine()
+        finally:
+            self.engine_ready.set()
+
+    def wait_for_engine(self):
+        """Enable the typing buttons once load_engine() is done, without blocking Tk"""
+        if not self.engine_ready.is_set():
+            self.root.after(LOAD_POLL_MS, self.wait_for_engine)
+            return
+        if self.engine is None:
+            self.status_var.set("Error: Typing backend could not be loaded")
+        elif not self.typing_busy():
+            self.reset_buttons()
+
+    def get_engine(self):
+        """The typing engine, created with its backend on first use
+
+        Can block for seconds (starting the typing process, opening the
+        saved texts), so the Tk thread only calls get_typing_engine().
+        """
+        with self.engine_lock:
+            if self.engine is None:
+                try:
+                    self.engine = ProcessEngine(
+                        "auto",
+                        on_progress=self.ui_updates.post_progress,
+                        on_status=self.ui_updates.post_status,
+                        checkpoint_path=DEFAULT_CHECKPOINT_PATH,
+                    ).start()
+                except Exception as e:
+                    print(f"Typing process unavailable, typing in the app: {e}")
+                if self.engine is None:
+                    try:
+                        backend = default_backend()
+                    except Exception as e:
+                        print(f"Error loading typing backend: {e}")
+                        return None
+                    self.engine = TypingEngine(
+                        backend,
+                        on_progress=self.ui_updates.post_progress,
+                        on_status=self.ui_updates.post_status,
+                        checkpoints=CheckpointStore(DEFAULT_CHECKPOINT_PATH),
+                    )
+                # Restored jobs wait until Run Queue is pressed
+                self.store_ready.wait()
+                self.worker = TypingWorker(
+                    self.engine,
+                    on_job_start=self.on_job_start,
+                    on_job_done=self.on_job_done,
+                    journal=self.text_store,
+                    held=True,
+                )
+                try:
+                    restored = self.worker.restore()
+                    if restored:
+                        self.ui_updates.post_status(f"{len(restored)} queued job(s) from the last session, see the Queue tab")
+                except Exception as e:
+                    print(f"Error restoring the queue: {e}")
+            return self.engine
+
+    def on_tab_changed(self, event):
+        tab = self.notebook.select()
+        setup = self.pending_tabs.pop(tab, None)
+        if setup is not None:
+            setup(self.notebook.nametowidget(tab))
 
     def setup_typing_tab(self, parent):
         # Text input area
@@ -104,6 +279,23 @@ class AutoTyperApp:
         speed_entry = ttk.Spinbox(delay_frame, from_=0.01, to=0.5, increment=0.01, textvariable=self.speed_var, width=5)
         speed_entry.grid(row=1, column=1, sticky=tk.W, padx=5, pady=2)
         
+        ttk.Label(delay_frame, text="Target rate (0 = use speed):").grid(row=2, column=0, sticky=tk.W, padx=5, pady=2)
+        self.target_rate_var = tk.StringVar(value="0")
+        rate_entry = ttk.Spinbox(delay_frame, from_=0, to=2000, increment=10, textvariable=self.target_rate_var, width=5)
+        rate_entry.grid(row=2, column=1, sticky=tk.W, padx=5, pady=2)
+        self.rate_unit_var = tk.StringVar(value="CPS")
+        rate_unit = ttk.Combobox(delay_frame, textvariable=self.rate_unit_var, values=("CPS", "WPM"), state="readonly", width=5)
+        rate_unit.grid(row=2, column=2, sticky=tk.W, padx=5, pady=2)
+        
+        self.catch_up_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(delay_frame, text="Catch up after pauses", variable=self.catch_up_var).grid(row=3, column=0, columnspan=3, sticky=tk.W, padx=5, pady=2)
+        ttk.Checkbutton(delay_frame, text="Humanize timing (see Settings)", variable=self.humanize_var).grid(row=4, column=0, columnspan=3, sticky=tk.W, padx=5, pady=2)
+        
+        # X window IDs (from xwininfo or xdotool) Start Typing types into at once
+        ttk.Label(delay_frame, text="Type into windows (IDs, optional):").grid(row=5, column=0, sticky=tk.W, padx=5, pady=2)
+        self.target_windows_var = tk.StringVar(value="")
+        ttk.Entry(delay_frame, textvariable=self.target_windows_var, width=20).grid(row=5, column=1, columnspan=2, sticky=tk.W, padx=5, pady=2)
+        
         # Save text option
         save_frame = ttk.LabelFrame(options_frame, text="Save Text")
         save_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -157,15 +349,28 @@ class AutoTyperApp:
         control_frame = ttk.Frame(parent)
         control_frame.pack(fill=tk.X, padx=10, pady=10)
         
-        self.start_btn = ttk.Button(control_frame, text="Start Typing (F6)", command=self.start_typing)
+        # Enabled by wait_for_engine() once the typing engine is loaded
+        self.start_btn = ttk.Button(control_frame, text="Start Typing (F6)", command=self.start_typing, state=tk.DISABLED)
         self.start_btn.pack(side=tk.LEFT, padx=5)
         
+        self.resume_btn = ttk.Button(control_frame, text="Resume", command=self.resume_typing, state=tk.DISABLED)
+        self.resume_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.retype_btn = ttk.Button(control_frame, text="Type Changes", command=self.retype_changes, state=tk.DISABLED)
+        self.retype_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.file_btn = ttk.Button(control_frame, text="Type File...", command=self.start_typing_file, state=tk.DISABLED)
+        self.file_btn.pack(side=tk.LEFT, padx=5)
+        
         self.pause_btn = ttk.Button(control_frame, text="Pause/Resume (F7)", command=self.toggle_pause, state=tk.DISABLED)
         self.pause_btn.pack(side=tk.LEFT, padx=5)
         
         self.stop_btn = ttk.Button(control_frame, text="Stop (F8)", command=self.stop_typing, state=tk.DISABLED)
         self.stop_btn.pack(side=tk.LEFT, padx=5)
         
+        report_btn = ttk.Button(control_frame, text="Timing Report", command=self.show_timing_report)
+        report_btn.pack(side=tk.RIGHT, padx=5)
+        
         # Add progress bar
         progress_frame = ttk.Frame(parent)
         progress_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -185,6 +390,14 @@ class AutoTyperApp:
         
         ttk.Label(list_frame, text="Saved Texts:").pack(anchor=tk.W, padx=5, pady=5)
         
+        # Search box, filters by name and by the words in the texts
+        search_frame = ttk.Frame(list_frame)
+        search_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT, padx=5)
+        self.search_var.trace_add("write", lambda *args: self.schedule_search())
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
+        search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        
         # Listbox with scrollbar
         list_container = ttk.Frame(list_frame)
         list_container.pack(fill=tk.BOTH, expand=True)
@@ -194,10 +407,12 @@ class AutoTyperApp:
         
         self.saved_list = tk.Listbox(list_container, yscrollcommand=scrollbar.set, height=10)
         self.saved_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.saved_list.bind("<<ListboxSelect>>", lambda event: self.show_abbreviation())
         scrollbar.config(command=self.saved_list.yview)
         
-        # Update the listbox with saved texts
-        self.update_saved_list()
+        # Update the listbox with saved texts, names are read quickly so
+        # the store is almost always open by the time this tab is shown
+        self.fill_saved_list()
         
         # Buttons for saved texts
         btn_frame = ttk.Frame(parent)
@@ -208,13 +423,87 @@ class AutoTyperApp:
         
         delete_btn = ttk.Button(btn_frame, text="Delete Selected", command=self.delete_selected_text)
         delete_btn.pack(side=tk.LEFT, padx=5)
+        
+        # Text expander: typing a text's abbreviation anywhere types the text
+        expand_frame = ttk.LabelFrame(parent, text="Text Expander")
+        expand_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        ttk.Label(expand_frame, text="Abbreviation:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=2)
+        ttk.Entry(expand_frame, textvariable=self.abbreviation_var, width=15).grid(row=0, column=1, sticky=tk.W, padx=5, pady=2)
+        ttk.Button(expand_frame, text="Set for Selected", command=self.set_abbreviation).grid(row=0, column=2, padx=5, pady=2)
+        ttk.Checkbutton(expand_frame, text="Expand abbreviations typed in any window", variable=self.expand_var, command=self.toggle_expander).grid(row=1, column=0, columnspan=3, sticky=tk.W, padx=5, pady=2)
+
+    def setup_queue_tab(self, parent):
+        # Jobs waiting to be typed, highest priority first
+        list_frame = ttk.LabelFrame(parent, text="Queued Jobs")
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        
+        list_container = ttk.Frame(list_frame)
+        list_container.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        scrollbar = ttk.Scrollbar(list_container)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.queue_view = ttk.Treeview(list_container, columns=("priority", "chars"), yscrollcommand=scrollbar.set, height=8)
+        self.queue_view.heading("#0", text="Job")
+        self.queue_view.heading("priority", text="Priority")
+        self.queue_view.heading("chars", text="Characters")
+        self.queue_view.column("priority", width=70, anchor=tk.E)
+        self.queue_view.column("chars", width=90, anchor=tk.E)
+        self.queue_view.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.config(command=self.queue_view.yview)
+        
+        ttk.Label(list_frame, textvariable=self.queue_status_var).pack(anchor=tk.W, padx=5, pady=(0, 5))
+        
+        # Adding a saved text, or a range of its paragraphs
+        add_frame = ttk.LabelFrame(parent, text="Add Saved Text")
+        add_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        ttk.Label(add_frame, text="Text:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=2)
+        self.queue_combo = ttk.Combobox(add_frame, textvariable=self.queue_name_var, state="readonly", width=30,
+                                        postcommand=self.update_queue_names)
+        self.queue_combo.grid(row=0, column=1, columnspan=4, sticky=tk.W, padx=5, pady=2)
+        
+        ttk.Label(add_frame, text="Paragraphs from:").grid(row=1, column=0, sticky=tk.W, padx=5, pady=2)
+        ttk.Spinbox(add_frame, from_=1, to=9999, textvariable=self.queue_first_var, width=5).grid(row=1, column=1, sticky=tk.W, padx=5, pady=2)
+        ttk.Label(add_frame, text="to:").grid(row=1, column=2, sticky=tk.W, padx=5, pady=2)
+        ttk.Spinbox(add_frame, from_=1, to=9999, textvariable=self.queue_last_var, width=5).grid(row=1, column=3, sticky=tk.W, padx=5, pady=2)
+        ttk.Label(add_frame, text="(empty for all)").grid(row=1, column=4, sticky=tk.W, padx=5, pady=2)
+        
+        ttk.Label(add_frame, text="Priority:").grid(row=2, column=0, sticky=tk.W, padx=5, pady=2)
+        ttk.Spinbox(add_frame, from_=-9, to=9, textvariable=self.queue_priority_var, width=5).grid(row=2, column=1, sticky=tk.W, padx=5, pady=2)
+        ttk.Label(add_frame, text="Each job waits the Delay of the typing tab before it starts").grid(row=3, column=0, columnspan=5, sticky=tk.W, padx=5, pady=2)
+        
+        # Queue buttons
+        btn_frame = ttk.Frame(parent)
+        btn_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        ttk.Button(btn_frame, text="Add to Queue", command=self.add_queue_job).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Remove Selected", command=self.remove_queue_job).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Run Queue", command=self.run_queue).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Hold Queue", command=self.hold_queue).pack(side=tk.LEFT, padx=5)
+        
+        self.refresh_queue_view()
+        self.root.after(QUEUE_REFRESH_MS, self.refresh_queue_status)
 
     def setup_settings_tab(self, parent):
+        # Named settings profiles, kept in the saved texts database
+        profile_frame = ttk.LabelFrame(parent, text="Profiles")
+        profile_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        ttk.Label(profile_frame, text="Profile:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=2)
+        self.profile_combo = ttk.Combobox(profile_frame, textvariable=self.profile_var, width=20,
+                                          postcommand=self.update_profile_names)
+        self.profile_combo.grid(row=0, column=1, sticky=tk.W, padx=5, pady=2)
+        self.profile_combo.bind("<<ComboboxSelected>>", lambda event: self.load_profile())
+        ttk.Button(profile_frame, text="Save", command=self.save_profile).grid(row=0, column=2, padx=5, pady=2)
+        ttk.Button(profile_frame, text="Delete", command=self.delete_profile).grid(row=0, column=3, padx=5, pady=2)
+        ttk.Label(profile_frame, text="Speed, modes, clipboard, humanizing and theme; running jobs keep their settings").grid(row=1, column=0, columnspan=4, sticky=tk.W, padx=5, pady=2)
+        
         # Theme settings
         theme_frame = ttk.LabelFrame(parent, text="Appearance")
         theme_frame.pack(fill=tk.X, padx=10, pady=10)
         
-        self.theme_var = tk.StringVar(value="light")
         ttk.Radiobutton(theme_frame, text="Light Theme", variable=self.theme_var, value="light", command=self.apply_theme).pack(anchor=tk.W, padx=20, pady=5)
         ttk.Radiobutton(theme_frame, text="Dark Theme", variable=self.theme_var, value="dark", command=self.apply_theme).pack(anchor=tk.W, padx=20, pady=5)
         
@@ -222,11 +511,36 @@ class AutoTyperApp:
         clipboard_frame = ttk.LabelFrame(parent, text="Clipboard Settings")
         clipboard_frame.pack(fill=tk.X, padx=10, pady=10)
         
-        self.clipboard_delay_var = tk.StringVar(value="0.3")
-        ttk.Label(clipboard_frame, text="Clipboard delay (seconds):").grid(row=0, column=0, sticky=tk.W, padx=5, pady=2)
+        ttk.Label(clipboard_frame, text="Clipboard wait limit (seconds):").grid(row=0, column=0, sticky=tk.W, padx=5, pady=2)
         clipboard_entry = ttk.Spinbox(clipboard_frame, from_=0.1, to=1.0, increment=0.1, textvariable=self.clipboard_delay_var, width=5)
         clipboard_entry.grid(row=0, column=1, sticky=tk.W, padx=5, pady=2)
         
+        # Humanized typing
+        humanize_frame = ttk.LabelFrame(parent, text="Humanized Typing")
+        humanize_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        ttk.Label(humanize_frame, text="Delay variation (%):").grid(row=0, column=0, sticky=tk.W, padx=5, pady=2)
+        ttk.Spinbox(humanize_frame, from_=0, to=100, increment=5, textvariable=self.jitter_var, width=5).grid(row=0, column=1, sticky=tk.W, padx=5, pady=2)
+        ttk.Label(humanize_frame, text="Distribution:").grid(row=0, column=2, sticky=tk.W, padx=5, pady=2)
+        ttk.Combobox(humanize_frame, textvariable=self.distribution_var, values=DISTRIBUTIONS, state="readonly", width=10).grid(row=0, column=3, sticky=tk.W, padx=5, pady=2)
+        ttk.Label(humanize_frame, text="Typos, corrected (% of letters):").grid(row=1, column=0, sticky=tk.W, padx=5, pady=2)
+        ttk.Spinbox(humanize_frame, from_=0, to=20, increment=0.5, textvariable=self.typo_rate_var, width=5).grid(row=1, column=1, sticky=tk.W, padx=5, pady=2)
+        
+        # Typing only the changes
+        retype_frame = ttk.LabelFrame(parent, text="Type Changes")
+        retype_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        ttk.Label(retype_frame, text="Compare by:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=2)
+        ttk.Radiobutton(retype_frame, text="Character", variable=self.diff_level_var, value="character").grid(row=0, column=1, sticky=tk.W, padx=5, pady=2)
+        ttk.Radiobutton(retype_frame, text="Word", variable=self.diff_level_var, value="word").grid(row=0, column=2, sticky=tk.W, padx=5, pady=2)
+        ttk.Checkbutton(retype_frame, text="Move with Up/Down/End (only for fields that do not wrap lines)", variable=self.diff_lines_var).grid(row=1, column=0, columnspan=3, sticky=tk.W, padx=5, pady=2)
+        
+        # Diagnostics
+        diagnostics_frame = ttk.LabelFrame(parent, text="Diagnostics")
+        diagnostics_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        ttk.Checkbutton(diagnostics_frame, text="Collect timing report (key, clipboard, pacing and UI latencies)", variable=self.instrument_var).pack(anchor=tk.W, padx=20, pady=5)
+        
         # About section
         about_frame = ttk.LabelFrame(parent, text="About")
         about_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -243,8 +557,112 @@ class AutoTyperApp:
         about_label = ttk.Label(about_frame, text=about_text, wraplength=500, justify=tk.LEFT)
         about_label.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
         
+    def update_profile_names(self):
+        if self.text_store is None:
+            return
+        try:
+            self.profile_combo.config(values=self.text_store.profile_names())
+        except Exception as e:
+            print(f"Error reading profiles: {e}")
+
+    def save_profile(self):
+        """Save the current options under the name in the profile box"""
+        name = self.profile_var.get().strip()
+        if not name:
+            self.status_var.set("Error: Please enter a name for the profile")
+            return
+        values = {field: getattr(self, f"{field}_var").get() for field in PROFILE_FIELDS}
+        if not self.store_loaded():
+            return
+        try:
+            self.text_store.save_profile(name, values)
+        except Exception as e:
+            self.status_var.set(f"Error saving profile: {str(e)}")
+            print(f"Profile error: {e}")
+            return
+        self.status_var.set(f"Profile '{name}' saved")
+
+    def load_profile(self):
+        """Set the widgets from the selected profile
+
+        Jobs that already started keep the TypingSettings they were given,
+        the profile applies from the next Start.
+        """
+        name = self.profile_var.get().strip()
+        if not self.store_loaded():
+            return
+        try:
+            values = self.text_store.profile(name)
+        except Exception as e:
+            self.status_var.set(f"Error loading profile: {str(e)}")
+            print(f"Profile error: {e}")
+            return
+        if values is None:
+            self.status_var.set(f"Error: No profile named '{name}'")
+            return
+        for field, value in values.items():
+            if field in PROFILE_FIELDS:
+                getattr(self, f"{field}_var").set(value)
+        self.apply_theme()
+        self.status_var.set(f"Profile '{name}' loaded")
+
+    def delete_profile(self):
+        name = self.profile_var.get().strip()
+        if not name:
+            self.status_var.set("Error: No profile selected")
+            return
+        if not self.store_loaded():
+            return
+        try:
+            self.text_store.delete_profile(name)
+        except Exception as e:
+            self.status_var.set(f"Error deleting profile: {str(e)}")
+            print(f"Profile error: {e}")
+            return
+        self.profile_var.set("")
+        self.status_var.set(f"Profile '{name}' deleted")
+
+    def read_typing_settings(self):
+        """Snapshot the typing options from the widgets, None if invalid
+
+        This is the only place the options are read from Tk; the job and
+        the engine only see the returned TypingSettings, which cannot change.
+        """
+        try:
+            delay = float(self.delay_var.get())
+            speed = float(self.speed_var.get())
+            clipboard_delay = float(self.clipboard_delay_var.get())
+            target_rate = float(self.target_rate_var.get())
+            jitter = float(self.jitter_var.get()) / 100
+            typo_rate = float(self.typo_rate_var.get()) / 100
+        except ValueError:
+            self.status_var.set("Error: Invalid delay or speed values")
+            return None
+            
+        return TypingSettings(
+            delay=delay,
+            speed=speed,
+            lang_mode=self.lang_mode_var.get(),
+            english_mode=self.english_mode_var.get(),
+            arabic_mode=self.arabic_mode_var.get(),
+            arabic_word_mode=self.arabic_word_mode_var.get(),
+            clipboard_delay=clipboard_delay,
+            target_cps=wpm_to_cps(target_rate) if self.rate_unit_var.get() == "WPM" else target_rate,
+            catch_up=self.catch_up_var.get(),
+            instrument=self.instrument_var.get(),
+            humanize=self.humanize_var.get(),
+            jitter=jitter,
+            distribution=self.distribution_var.get(),
+            typo_rate=typo_rate,
+            diff_level=self.diff_level_var.get(),
+            diff_navigation="lines" if self.diff_lines_var.get() else "arrows",
+        )
+
+    def typing_busy(self):
+        return self.typing_active or (self.worker is not None and self.worker.busy())
+
     def start_typing(self):
-        if self.typing_active:
+        if self.typing_busy():
             return
             
         text = self.text_input.get("1.0", tk.END).strip()
@@ -252,196 +670,202 @@ class AutoTyperApp:
             self.status_var.set("Error: No text to type")
             return
             
+        settings = self.read_typing_settings()
+        if settings is None:
+            return
         try:
-            delay = float(self.delay_var.get())
-            speed = float(self.speed_var.get())
-        except ValueError:
-            self.status_var.set("Error: Invalid delay or speed values")
+            targets = parse_window_ids(self.target_windows_var.get())
+        except ValueError as e:
+            self.status_var.set(f"Error: {str(e)}")
+            return
+        engine = self.get_typing_engine()
+        if engine is None:
+            return
+        self.launch_typing(TypingJob(settings, text=text, targets=targets or None))
+        if targets:
+            self.status_var.set(f"Typing into {len(targets)} windows in {settings.delay} seconds...")
+
+    def resume_typing(self):
+        """Continue an interrupted run of the text in the editor where it stopped"""
+        if self.typing_busy():
             return
             
-        self.typing_active = True
-        self.pause_typing = False
+        text = self.text_input.get("1.0", tk.END).strip()
+        if not text:
+            self.status_var.set("Error: No text to type")
+            return
+            
+        settings = self.read_typing_settings()
+        if settings is None:
+            return
+        engine = self.get_typing_engine()
+        if engine is None:
+            return
+        checkpoint = engine.resume_point(text=text)
+        if checkpoint is None:
+            self.status_var.set("Nothing to resume, this text has no interrupted run")
+            return
+        self.launch_typing(TypingJob(settings, text=text, resume=True))
+        self.status_var.set(f"Resuming at character {checkpoint.chars} of {checkpoint.total} in {settings.delay} seconds...")
+
+    def retype_changes(self):
+        """Type only what changed since the last text typed this session
+
+        The cursor must still be at the end of that text in the target
+        window, where the last run left it.
+        """
+        if self.typing_busy():
+            return
+            
+        text = self.text_input.get("1.0", tk.END).strip()
+        if not text:
+            self.status_var.set("Error: No text to type")
+            return
+            
+        settings = self.read_typing_settings()
+        if settings is None:
+            return
+        engine = self.get_typing_engine()
+        if engine is None:
+            return
+        previous = engine.last_text
+        if previous is None:
+            self.status_var.set("Nothing typed yet this session, use Start Typing first")
+            return
+        if previous == text:
+            self.status_var.set("No changes since the last text typed")
+            return
+        self.launch_typing(TypingJob(settings, text=text, name="changes", previous=previous))
+        self.status_var.set(f"Typing changes in {settings.delay} seconds... Click at the end of the typed text!")
+
+    def start_typing_file(self):
+        """Type a file straight from disk without loading it into the editor"""
+        if self.typing_busy():
+            return
+            
+        path = filedialog.askopenfilename(
+            title="Type from file",
+            filetypes=[("Text files", "*.txt"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+            
+        settings = self.read_typing_settings()
+        if settings is None:
+            return
+        engine = self.get_typing_engine()
+        if engine is None:
+            return
+        try:
+            source = FileSource(path)
+        except OSError as e:
+            self.status_var.set(f"Error opening file: {str(e)}")
+            return
+        
+        resume = False
+        try:
+            checkpoint = engine.resume_point(source=source)
+        finally:
+            # The job opens the file again when it starts
+            source.close()
+        if checkpoint is not None:
+            resume = messagebox.askyesno(
+                "Resume typing",
+                f"Typing '{source.name}' was interrupted at character {checkpoint.chars}.\n"
+                "Continue from there? Choose No to start over.",
+                parent=self.root,
+            )
+        self.launch_typing(TypingJob(settings, path=path, resume=resume))
+
+    def get_typing_engine(self):
+        """The engine if it is loaded, None (and a status message) otherwise"""
+        if not self.engine_ready.is_set():
+            self.status_var.set("Typing backend is still loading, try again in a moment")
+            return None
+        engine = self.engine
+        if engine is None:
+            self.status_var.set("Error: Typing backend could not be loaded")
+        return engine
+
+    def store_loaded(self):
+        """True once the saved texts are open, a status message otherwise"""
+        if self.store_ready.is_set():
+            return True
+        self.status_var.set("Saved texts are still loading, try again in a moment")
+        return False
+
+    def fill_saved_list(self):
+        """Show the saved texts as soon as the store is open, without blocking Tk"""
+        if self.store_ready.is_set():
+            self.update_saved_list()
+        else:
+            self.root.after(LOAD_POLL_MS, self.fill_saved_list)
+
+    def launch_typing(self, job):
+        """Hand a job to the typing worker and switch the buttons over"""
+        self.show_typing_buttons()
+        self.status_var.set(f"Starting in {job.settings.delay} seconds... Click where you want to type!")
+        self.worker.submit(job)
+        self.start_ui_polling()
+
+    def show_typing_buttons(self):
         self.start_btn.config(state=tk.DISABLED)
+        self.resume_btn.config(state=tk.DISABLED)
+        self.retype_btn.config(state=tk.DISABLED)
+        self.file_btn.config(state=tk.DISABLED)
         self.pause_btn.config(state=tk.NORMAL)
         self.stop_btn.config(state=tk.NORMAL)
         
         # Reset progress bar
         self.progress_bar.config(value=0)
-        
-        self.status_var.set(f"Starting in {delay} seconds... Click where you want to type!")
-        
-        # Start typing in a separate thread
-        self.current_thread = threading.Thread(target=self.typing_thread, args=(text, delay, speed))
-        self.current_thread.daemon = True
-        self.current_thread.start()
 
-    def typing_thread(self, text, delay, speed):
-        # Countdown
-        for i in range(int(delay), 0, -1):
-            if not self.typing_active:
-                return
-            self.status_var.set(f"Starting in {i} seconds... Click where you want to type!")
-            time.sleep(1)
-            
-        self.status_var.set("Typing...")
-        
-        # Set progress bar maximum
-        self.root.after(0, lambda: self.progress_bar.config(maximum=len(text)))
-        
-        # Determine if we're dealing with Arabic text
-        is_arabic = self.lang_mode_var.get() == "arabic" or (
-            self.lang_mode_var.get() == "auto" and any(0x0600 <= ord(c) <= 0x06FF for c in text)
-        )
+    def on_job_start(self, job):
+        # Runs on the worker thread
+        self.typing_active = True
+        self.ui_updates.post_event("started", job)
+
+    def on_job_done(self, job):
+        # Runs on the worker thread
+        self.typing_active = False
+        if job.abbreviation is not None and self.expander is not None:
+            self.expander.settle()
+        self.ui_updates.post_event("finished", job)
+
+    def start_ui_polling(self):
+        if not self.ui_polling:
+            self.ui_polling = True
+            self.root.after(FRAME_INTERVAL_MS, self.drain_ui_updates)
+
+    def drain_ui_updates(self):
+        """Apply everything the typing worker posted since the last frame"""
+        progress, events = self.ui_updates.drain()
+        if progress is not None:
+            done, total = progress
+            if total > 0:
+                self.progress_bar.config(maximum=total, value=done)
         
-        # Get the typing modes
-        arabic_mode = self.arabic_mode_var.get()
-        english_mode = self.english_mode_var.get()
+        for kind, value in events:
+            if kind == "status":
+                self.status_var.set(value)
+            elif kind == "started":
+                self.show_typing_buttons()
+                if value.queued:
+                    self.status_var.set(f"Queue: starting '{value.name}' in {value.settings.delay} seconds...")
+            elif kind == "finished":
+                self.refresh_queue_view()
         
-        # For Arabic text with paste mode, use the whole text approach
-        if is_arabic and arabic_mode == "paste":
-            self.type_arabic_text_paste(text, speed)
+        # Keep polling while the worker has a job running or due to run
+        if self.typing_busy():
+            self.root.after(FRAME_INTERVAL_MS, self.drain_ui_updates)
         else:
-            # Initialize progress tracking
-            chars_typed = 0
-            total_chars = len(text)
-            
-            # Determine chunks based on language and mode
-            if is_arabic:
-                # For Arabic text, check if we want character-by-character or word-by-word
-                arabic_word_mode = self.arabic_word_mode_var.get()
-                if arabic_word_mode == "character":
-                    chunks = [c for c in text]
-                else:
-                    chunks = text.split()
-            else:
-                # For English text, use the selected mode
-                if english_mode == "character":
-                    chunks = [c for c in text]
-                else:
-                    chunks = text.split()
-                
-            total_chunks = len(chunks)
-            
-            for i, chunk in enumerate(chunks):
-                if not self.typing_active:
-                    return
-                    
-                while self.pause_typing:
-                    time.sleep(0.1)
-                    if not self.typing_active:
-                        return
-                
-                try:
-                    if is_arabic:
-                        # For Arabic text, use clipboard for each chunk to ensure proper rendering
-                        pyperclip.copy(chunk)
-                        time.sleep(float(self.clipboard_delay_var.get()))
-                        pyautogui.hotkey('ctrl', 'v')
-                        
-                        # Add space after word if in word mode and not the last word
-                        if self.arabic_word_mode_var.get() == "word" and i < total_chunks - 1:
-                            pyautogui.press('space')
-                            chars_typed += len(chunk) + 1
-                        else:
-                            chars_typed += len(chunk)
-                    else:
-                        # For English text
-                        if english_mode == "character":
-                            # Character by character typing
-                            if chunk == ' ':
-                                pyautogui.press('space')
-                            elif chunk == '\n':
-                                pyautogui.press('enter')
-                            elif chunk == '\t':
-                                pyautogui.press('tab')
-                            else:
-                                pyautogui.press(chunk)
-                            chars_typed += 1
-                        else:
-                            # Word by word typing
-                            pyautogui.write(chunk)
-                            chars_typed += len(chunk)
-                            # Add space after word if not the last word
-                            if i < total_chunks - 1:
-                                pyautogui.press('space')
-                                chars_typed += 1
-                    
-                    # Apply speed delay
-                    if english_mode == "character" and not is_arabic:
-                        # For character mode, apply delay after each character
-                        time.sleep(speed)
-                    elif not is_arabic:
-                        # For word mode, apply delay after each word
-                        time.sleep(speed)
-                    elif is_arabic:
-                        # Apply speed delay for all languages
-                        time.sleep(speed)
-                except Exception as e:
-                    self.status_var.set(f"Error typing text: {str(e)}")
-                    print(f"Typing error: {str(e)}")
-                    self.typing_active = False
-                    self.root.after(0, self.reset_buttons)
-                    return
-                
-                # Update progress bar based on characters typed
-                progress_value = min(chars_typed, total_chars)
-                self.root.after(0, lambda v=progress_value: self.progress_bar.config(value=v))
-            
-        self.status_var.set("Typing completed")
-        self.typing_active = False
-        self.root.after(0, self.reset_buttons)
-    
-    def type_arabic_text_paste(self, text, speed):
-        """Special handling for Arabic text using paste mode"""
-        try:
-            # If speed is significant, type word by word instead of pasting all at once
-            if speed > 0.1:  # If user wants slower typing
-                words = text.split()
-                for i, word in enumerate(words):
-                    if not self.typing_active:
-                        return
-                        
-                    while self.pause_typing:
-                        time.sleep(0.1)
-                        if not self.typing_active:
-                            return
-                    
-                    # Copy and paste each word
-                    pyperclip.copy(word)
-                    clipboard_delay = float(self.clipboard_delay_var.get())
-                    time.sleep(clipboard_delay)
-                    pyautogui.hotkey('ctrl', 'v')
-                    
-                    # Add space after word if not the last word
-                    if i < len(words) - 1:
-                        pyautogui.press('space')
-                    
-                    # Apply speed delay
-                    time.sleep(speed)
-                    
-                    # Update progress
-                    progress = (i + 1) * len(text) // len(words)
-                    self.root.after(0, lambda v=progress: self.progress_bar.config(value=v))
-            else:
-                # For very fast speeds, use original paste method
-                pyperclip.copy(text)
-                clipboard_delay = float(self.clipboard_delay_var.get())
-                time.sleep(clipboard_delay)
-                pyautogui.hotkey('ctrl', 'v')
-                self.root.after(0, lambda: self.progress_bar.config(value=len(text)))
-                
-        except Exception as e:
-            self.status_var.set(f"Error pasting Arabic text: {str(e)}")
-            print(f"Arabic paste error: {str(e)}")
-            self.typing_active = False
-            self.root.after(0, self.reset_buttons)
+            self.ui_polling = False
+            self.reset_buttons()
 
     def toggle_pause(self):
         if not self.typing_active:
             return
             
-        self.pause_typing = not self.pause_typing
-        if self.pause_typing:
+        if self.engine.toggle_pause():
             self.status_var.set("Typing paused")
             self.pause_btn.config(text="Resume (F7)")
         else:
@@ -449,18 +873,157 @@ class AutoTyperApp:
             self.pause_btn.config(text="Pause (F7)")
 
     def stop_typing(self):
-        if not self.typing_active:
+        if not self.typing_busy():
             return
             
+        # Stopping also holds the queue, a stopped queued job waits at the
+        # front and resumes where it stopped on the next Run Queue
+        self.worker.hold()
         self.typing_active = False
+        self.engine.stop()
         self.status_var.set("Typing stopped")
         self.reset_buttons()
 
     def reset_buttons(self):
         self.start_btn.config(state=tk.NORMAL)
+        self.resume_btn.config(state=tk.NORMAL)
+        self.retype_btn.config(state=tk.NORMAL)
+        self.file_btn.config(state=tk.NORMAL)
         self.pause_btn.config(state=tk.DISABLED, text="Pause/Resume (F7)")
         self.stop_btn.config(state=tk.DISABLED)
 
+    def show_timing_report(self):
+        """Show the timing report of the last instrumented run"""
+        report = self.engine.last_telemetry if self.engine else None
+        if report is None:
+            self.status_var.set("No timing report, enable it in Settings and run again")
+            return
+            
+        window = tk.Toplevel(self.root)
+        window.title("Timing Report")
+        window.geometry("640x320")
+        
+        report_text = scrolledtext.ScrolledText(window, wrap=tk.NONE, font="TkFixedFont", height=12)
+        report_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        report_text.insert("1.0", report.format())
+        report_text.config(state=tk.DISABLED)
+        
+        def export():
+            path = filedialog.asksaveasfilename(
+                parent=window,
+                title="Export timing report",
+                defaultextension=".json",
+                filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            )
+            if not path:
+                return
+            try:
+                report.save(path)
+                self.status_var.set(f"Timing report saved to {os.path.basename(path)}")
+            except Exception as e:
+                self.status_var.set(f"Error saving timing report: {str(e)}")
+        
+        ttk.Button(window, text="Export JSON...", command=export).pack(side=tk.RIGHT, padx=10, pady=5)
+
+    def update_queue_names(self):
+        """Fill the Queue tab's text list when it is opened"""
+        if self.text_store is None:
+            return
+        self.queue_combo.config(values=self.text_store.names())
+
+    def add_queue_job(self):
+        name = self.queue_name_var.get()
+        if not name:
+            self.status_var.set("Error: Choose a saved text to queue")
+            return
+        try:
+            first = int(self.queue_first_var.get()) if self.queue_first_var.get().strip() else None
+            last = int(self.queue_last_var.get()) if self.queue_last_var.get().strip() else None
+            priority = int(self.queue_priority_var.get() or 0)
+        except ValueError:
+            self.status_var.set("Error: Paragraphs and priority must be whole numbers")
+            return
+            
+        settings = self.read_typing_settings()
+        if settings is None:
+            return
+        engine = self.get_typing_engine()
+        if engine is None:
+            return
+        try:
+            job = saved_text_job(self.text_store, name, settings, first, last, priority)
+        except Exception as e:
+            self.status_var.set(f"Error queueing text: {str(e)}")
+            return
+        if not job.text:
+            self.status_var.set(f"Error: '{name}' has no paragraphs in that range")
+            return
+        self.worker.submit(job)
+        self.refresh_queue_view()
+        self.status_var.set(f"Queued '{job.name}'")
+
+    def remove_queue_job(self):
+        if self.worker is None:
+            return
+        jobs = {str(id(job)): job for job in self.worker.jobs()}
+        removed = 0
+        for item in self.queue_view.selection():
+            job = jobs.get(item)
+            if job is not None and self.worker.remove(job):
+                removed += 1
+        self.refresh_queue_view()
+        if removed:
+            self.status_var.set(f"Removed {removed} queued job(s)")
+
+    def run_queue(self):
+        """Start typing the queued jobs one after another"""
+        engine = self.get_typing_engine()
+        if engine is None:
+            return
+        if not self.worker.jobs():
+            self.status_var.set("Queue is empty")
+            return
+        self.worker.release()
+        self.start_ui_polling()
+        self.status_var.set("Running queue... Click where you want to type!")
+
+    def hold_queue(self):
+        """Finish the current job, then wait"""
+        if self.worker is not None:
+            self.worker.hold()
+            self.status_var.set("Queue held, the current job is finished first")
+
+    def refresh_queue_view(self):
+        if self.queue_view is None:
+            return
+        self.queue_view.delete(*self.queue_view.get_children())
+        if self.worker is not None:
+            for job in self.worker.jobs():
+                length = job.length()
+                self.queue_view.insert("", tk.END, iid=str(id(job)), text=job.name,
+                                       values=(job.priority, "?" if length is None else length))
+        self.update_queue_status()
+
+    def update_queue_status(self):
+        if self.worker is None:
+            self.queue_status_var.set("Queue empty")
+            return
+        depth = self.worker.pending()
+        status = f"{depth} job(s) queued" if depth else "Queue empty"
+        if self.worker.held and depth:
+            status += ", held"
+        eta = self.worker.eta()
+        if eta is not None and (depth or self.worker.current_job is not None):
+            minutes, seconds = divmod(int(eta + 0.5), 60)
+            status += f", ETA {minutes}:{seconds:02d}"
+            if self.worker.measured_cps:
+                status += f" at {self.worker.measured_cps:.1f} chars/s measured"
+        self.queue_status_var.set(status)
+
+    def refresh_queue_status(self):
+        self.update_queue_status()
+        self.root.after(QUEUE_REFRESH_MS, self.refresh_queue_status)
+
     def save_current_text(self):
         text = self.text_input.get("1.0", tk.END).strip()
         if not text:
@@ -472,8 +1035,15 @@ class AutoTyperApp:
             self.status_var.set("Error: Please enter a name for the saved text")
             return
             
-        self.saved_texts[name] = text
-        self.save_to_file()
+        if not self.store_loaded():
+            return
+        try:
+            self.text_store.save(name, text)
+        except Exception as e:
+            self.status_var.set(f"Error saving texts: {str(e)}")
+            print(f"Save error: {e}")
+            return
+        self.text_index.add(name, text)
         self.update_saved_list()
         self.save_name_var.set("")
         self.status_var.set(f"Text saved as '{name}'")
@@ -485,9 +1055,11 @@ class AutoTyperApp:
             return
             
         selected_name = self.saved_list.get(selection[0])
-        if selected_name in self.saved_texts:
+        # Bodies are only read from the store when they are loaded
+        text = self.text_store.get(selected_name)
+        if text is not None:
             self.text_input.delete("1.0", tk.END)
-            self.text_input.insert("1.0", self.saved_texts[selected_name])
+            self.text_input.insert("1.0", text)
             self.status_var.set(f"Loaded text: '{selected_name}'")
             self.notebook.select(0)  # Switch to typing tab
 
@@ -498,35 +1070,195 @@ class AutoTyperApp:
             return
             
         selected_name = self.saved_list.get(selection[0])
-        if selected_name in self.saved_texts:
-            del self.saved_texts[selected_name]
-            self.save_to_file()
+        if selected_name in self.text_index:
+            try:
+                self.text_store.delete(selected_name)
+            except Exception as e:
+                self.status_var.set(f"Error saving texts: {str(e)}")
+                print(f"Save error: {e}")
+                return
+            self.text_index.remove(selected_name)
             self.update_saved_list()
+            self.refresh_abbreviations()
             self.status_var.set(f"Deleted text: '{selected_name}'")
 
+    def show_abbreviation(self):
+        """Show the abbreviation of the selected text"""
+        selection = self.saved_list.curselection()
+        if not selection:
+            return
+        try:
+            abbreviation = self.text_store.abbreviation(self.saved_list.get(selection[0]))
+        except Exception as e:
+            print(f"Error reading abbreviation: {e}")
+            return
+        self.abbreviation_var.set(abbreviation or "")
+
+    def set_abbreviation(self):
+        selection = self.saved_list.curselection()
+        if not selection:
+            self.status_var.set("Error: No text selected")
+            return
+        name = self.saved_list.get(selection[0])
+        abbreviation = self.abbreviation_var.get().strip()
+        if any(char.isspace() for char in abbreviation):
+            self.status_var.set("Error: Abbreviations cannot contain spaces")
+            return
+        try:
+            self.text_store.set_abbreviation(name, abbreviation)
+        except sqlite3.IntegrityError:
+            self.status_var.set(f"Error: '{abbreviation}' is already used by another text")
+            return
+        except Exception as e:
+            self.status_var.set(f"Error saving abbreviation: {str(e)}")
+            print(f"Abbreviation error: {e}")
+            return
+        self.refresh_abbreviations()
+        if abbreviation:
+            self.status_var.set(f"Typing '{abbreviation}' now types '{name}'")
+        else:
+            self.status_var.set(f"Removed the abbreviation of '{name}'")
+
+    def refresh_abbreviations(self):
+        if self.expander is None:
+            return
+        try:
+            self.expander.update(self.text_store.abbreviations())
+        except Exception as e:
+            print(f"Error reading abbreviations: {e}")
+
+    def toggle_expander(self):
+        """Install or remove the text expander's keyboard hook"""
+        if not self.expand_var.get():
+            if self.expander is not None:
+                self.expander.stop()
+                self.expander = None
+            self.status_var.set("Text expander off")
+            return
+        if not self.store_loaded():
+            self.expand_var.set(False)
+            return
+        try:
+            expander = AbbreviationExpander(
+                self.text_store.abbreviations(),
+                is_injecting=lambda: self.typing_active,
+            )
+            expander.start()
+        except Exception as e:
+            print(f"Text expander error: {e}")
+            self.status_var.set(f"Text expander unavailable: {str(e)}")
+            self.expand_var.set(False)
+            return
+        self.expander = expander
+        self.status_var.set(f"Text expander on, {len(expander.abbreviations)} abbreviation(s)")
+        self.root.after(FRAME_INTERVAL_MS, self.poll_expansions)
+
+    def poll_expansions(self):
+        expander = self.expander
+        if expander is None:
+            return
+        for abbreviation, name in expander.drain():
+            self.expand_abbreviation(abbreviation, name)
+        self.root.after(FRAME_INTERVAL_MS, self.poll_expansions)
+
+    def expand_abbreviation(self, abbreviation, name):
+        """Replace an abbreviation just typed somewhere with its saved text"""
+        if self.typing_busy():
+            # The window being typed into has the focus, not the user
+            return
+        settings = self.read_typing_settings()
+        if settings is None:
+            return
+        engine = self.get_typing_engine()
+        if engine is None:
+            return
+        try:
+            body = self.text_store.get(name)
+        except Exception as e:
+            self.status_var.set(f"Error loading text: {str(e)}")
+            return
+        if body is None:
+            return
+        self.show_typing_buttons()
+        self.status_var.set(f"Expanding '{abbreviation}' to '{name}'")
+        self.worker.submit(TypingJob(expansion_settings(settings), text=body, name=name,
+                                     abbreviation=abbreviation))
+        self.start_ui_polling()
+
+    def schedule_search(self):
+        """Filter the saved list shortly after the user stops typing"""
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(80, self.update_saved_list)
+
     def update_saved_list(self):
-        self.saved_list.delete(0, tk.END)
-        for name in sorted(self.saved_texts.keys()):
-            self.saved_list.insert(tk.END, name)
+        self.search_after_id = None
+        if self.saved_list is None:
+            # The Saved Texts tab has not been opened yet
+            return
+        self.sync_saved_list(self.text_index.search(self.search_var.get()))
+
+    def sync_saved_list(self, names):
+        """Make the listbox show names, touching only the rows that changed"""
+        old_names = self.visible_names
+        new_set = set(names)
+        old_set = set(old_names)
+        removed = [i for i, name in enumerate(old_names) if name not in new_set]
+        added = [(i, name) for i, name in enumerate(names) if name not in old_set]
+        
+        if len(removed) + len(added) > 100:
+            # Large changes are cheaper as one bulk replace
+            self.saved_list.delete(0, tk.END)
+            if names:
+                self.saved_list.insert(tk.END, *names)
+        else:
+            for i in reversed(removed):
+                self.saved_list.delete(i)
+            # Both lists are sorted, so inserting in order lands every row
+            # at its final position
+            for i, name in added:
+                self.saved_list.insert(i, name)
+        self.visible_names = list(names)
+
+    def index_saved_bodies(self):
+        """Read every saved body into the search index"""
+        try:
+            for name, body in self.text_store.items():
+                self.text_index.add(name, body)
+        except Exception as e:
+            print(f"Error indexing saved texts: {e}")
+
+    def check_body_index(self):
+        if self.store_thread.is_alive():
+            self.root.after(200, self.check_body_index)
+        elif self.search_var.get().strip():
+            # Body matches may have appeared since the last search
+            self.update_saved_list()
 
     def load_saved_texts(self):
-        if self.config_file.exists():
+        """Open the saved texts database and index it, runs off the Tk thread
+
+        The old JSON file is imported once. store_ready is set as soon as the
+        names are known, the bodies are indexed after that.
+        """
+        try:
             try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    self.saved_texts = json.load(f)
+                self.text_store = SavedTextStore(self.store_file)
             except Exception as e:
-                self.saved_texts = {}
                 print(f"Error loading saved texts: {e}")
-        else:
-            self.saved_texts = {}
-
-    def save_to_file(self):
-        try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.saved_texts, f, ensure_ascii=False, indent=2)
+                # Keep the app usable, texts saved this session live in memory
+                self.text_store = SavedTextStore(":memory:")
+            try:
+                self.text_store.migrate_json(self.config_file)
+            except Exception as e:
+                print(f"Error importing {self.config_file}: {e}")
+            for name in self.text_store.names():
+                self.text_index.add(name)
         except Exception as e:
-            self.status_var.set(f"Error saving texts: {str(e)}")
-            print(f"Save error: {e}")
+            print(f"Error loading saved texts: {e}")
+        finally:
+            self.store_ready.set()
+        self.index_saved_bodies()
 
     def apply_theme(self):
         """Apply the selected theme to the application"""
@@ -587,6 +1319,7 @@ class AutoTyperApp:
             self.text_input.event_generate("<<Cut>>")
         except Exception:
             try:
+                import pyperclip
                 selected_text = self.text_input.get(tk.SEL_FIRST, tk.SEL_LAST)
                 pyperclip.copy(selected_text)
                 self.text_input.delete(tk.SEL_FIRST, tk.SEL_LAST)
@@ -599,6 +1332,7 @@ class AutoTyperApp:
             self.text_input.event_generate("<<Copy>>")
         except Exception:
             try:
+                import pyperclip
                 selected_text = self.text_input.get(tk.SEL_FIRST, tk.SEL_LAST)
                 pyperclip.copy(selected_text)
             except:
@@ -607,10 +1341,11 @@ class AutoTyperApp:
     def paste_text(self):
         """Paste text from clipboard with special handling for Arabic"""
         try:
+            import pyperclip
             clipboard_text = pyperclip.paste()
             if clipboard_text:
                 # Check if text contains Arabic characters
-                has_arabic = any(0x0600 <= ord(c) <= 0x06FF for c in clipboard_text)
+                has_arabic = contains_arabic(clipboard_text)
                 if has_arabic and self.lang_mode_var.get() != "english":
                     # Handle Arabic text specially
                     self.text_input.insert(tk.INSERT, clipboard_text)
@@ -623,6 +1358,7 @@ class AutoTyperApp:
     def paste_arabic_text(self):
         """Force paste as Arabic text regardless of content"""
         try:
+            import pyperclip
             clipboard_text = pyperclip.paste()
             if clipboard_text:
                 self.text_input.insert(tk.INSERT, clipboard_text)
@@ -0,0 +1,50 @@
+"""Measure how many keystrokes per second a backend reaches with speed 0
+
+The same English text is typed in character mode without pacing, the rate
+is taken from the engine's PacingReport. Real backends type into whatever
+window has the focus, run them under Xvfb or with a scratch editor focused:
+
+    xvfb-run python benchmarks/backend_throughput.py xtest
+    python benchmarks/backend_throughput.py recording
+
+Usage: python benchmarks/backend_throughput.py [backend] [characters] [runs]
+"""
+
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing_core import TypingEngine, TypingSettings, create_backend
+
+
+TEXT = "The quick brown fox jumps over the lazy dog 0123456789.\n"
+
+
+def main():
+    name = sys.argv[1] if len(sys.argv) > 1 else "xtest"
+    chars = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    text = (TEXT * (chars // len(TEXT) + 1))[:chars]
+    backend = create_backend(name)
+    engine = TypingEngine(backend)
+    settings = TypingSettings(delay=0, speed=0, lang_mode="english", english_mode="character")
+    try:
+        rates = []
+        for _ in range(runs):
+            if not engine.run(text, settings):
+                print("Run did not finish")
+                return 1
+            rates.append(engine.last_report.achieved_cps)
+    finally:
+        backend.close()
+
+    print(f"{backend.name}: {len(text)} characters, median {statistics.median(rates):.0f} keystrokes/s, "
+          f"best {max(rates):.0f} over {runs} runs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""Measure the per-keystroke cost of the text expander
+
+Libraries of generated abbreviations, from a handful to many thousands,
+are matched against the same stream of random key events fed through
+AbbreviationExpander.on_event(), the function the keyboard hook calls.
+The cost per key should not grow with the library. The script also
+expands one snippet on the recording backend and checks the result.
+
+No display needed. Usage: python benchmarks/expander.py [keys] [largest library]
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing_core import TypingEngine, TypingSettings, RecordingBackend, AbbreviationExpander
+from typing_core.expander import expansion_settings
+
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+class KeyEvent:
+    """What the keyboard module passes to a hook"""
+
+    __slots__ = ("name", "event_type")
+
+    def __init__(self, name, event_type="down"):
+        self.name = name
+        self.event_type = event_type
+
+
+def library(size, rng):
+    abbreviations = {}
+    while len(abbreviations) < size:
+        abbreviation = ";" + "".join(rng.choice(LETTERS) for _ in range(rng.randint(2, 6)))
+        abbreviations[abbreviation] = f"snippet {len(abbreviations)}"
+    return abbreviations
+
+
+def key_stream(count, abbreviations, rng):
+    """Words and spaces, with an abbreviation every hundred keys or so"""
+    triggers = list(abbreviations)
+    events = []
+    while len(events) < count:
+        if rng.random() < 0.05:
+            word = rng.choice(triggers)
+        else:
+            word = "".join(rng.choice(LETTERS) for _ in range(rng.randint(1, 9)))
+        events += [KeyEvent(char) for char in word]
+        events.append(KeyEvent("space"))
+        if rng.random() < 0.02:
+            events.append(KeyEvent("backspace"))
+    return events[:count]
+
+
+def per_key(expander, events, runs):
+    times = []
+    on_event = expander.on_event
+    for _ in range(runs):
+        expander.matcher.reset()
+        start = time.perf_counter()
+        for event in events:
+            on_event(event)
+        times.append(time.perf_counter() - start)
+        expander.drain()
+    return statistics.median(times) / len(events)
+
+
+def main():
+    keys = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    largest = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    rng = random.Random(0)
+
+    print(f"{keys} key events, median of 3 runs")
+    size = 10
+    while size <= largest:
+        abbreviations = library(size, rng)
+        start = time.perf_counter()
+        expander = AbbreviationExpander(abbreviations)
+        build = time.perf_counter() - start
+        events = key_stream(keys, abbreviations, rng)
+        cost = per_key(expander, events, 3)
+        for event in events:
+            expander.on_event(event)
+        matched = len(expander.drain())
+        print(f"  {size:>7} abbreviations  build {build * 1000:8.1f} ms  "
+              f"{cost * 1e9:6.0f} ns/key  {matched} expansions")
+        size *= 10
+
+    # One expansion through the engine, abbreviation erased and snippet typed
+    backend = RecordingBackend()
+    engine = TypingEngine(backend)
+    snippet = "Kind regards,\nThe support team"
+    engine.expand(";kr", snippet, expansion_settings(TypingSettings()))
+    correct = backend.typed_text(initial="Thanks ;kr") == "Thanks " + snippet
+    print(f"  expansion: {len(backend.events)} backend calls for {len(snippet)} characters, "
+          f"{'ok' if correct else 'WRONG TEXT'}")
+    return 0 if correct else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Compare typing one text into several windows in turn and all at once
+
+For 1, 4 and 8 windows the same paced text is typed on the recording
+backend as one run per window, the way it had to be done before, and as
+one fan-out run (TypingEngine.fan_out()). The script reports both times,
+the focus changes of the fan-out run and checks that every window got
+the whole text. Plain, humanized with typos and mixed English and Arabic
+(pasted) text are tried, and an unpaced run.
+
+No display needed. Usage: python benchmarks/fanout.py [characters] [cps]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing_core import TypingEngine, TypingSettings, RecordingBackend
+
+
+ENGLISH = "The quick brown fox jumps over the lazy dog. "
+MIXED = "Order طلب number رقم 42 is ready. "
+
+# Window IDs, as XTestBackend would get them from xwininfo
+FIRST_WINDOW = 0x1a00003
+
+
+def cases(chars, cps):
+    english = (ENGLISH * (chars // len(ENGLISH) + 1))[:chars]
+    mixed = (MIXED * (chars // len(MIXED) + 1))[:chars]
+    paced = dict(delay=0, speed=0, target_cps=cps)
+    return [
+        ("english", english, TypingSettings(**paced)),
+        ("humanized, typos", english, TypingSettings(humanize=True, typo_rate=0.05, seed=1, **paced)),
+        ("mixed, pasted", mixed, TypingSettings(arabic_word_mode="character", **paced)),
+        ("unpaced", english, TypingSettings(delay=0, speed=0)),
+    ]
+
+
+def one_by_one(engine, text, windows, settings):
+    # Compiled once beforehand, both ways then take the plan from the cache
+    engine.compile(text, settings)
+    start = time.perf_counter()
+    for window in windows:
+        engine.backend.focus(window)
+        engine.run(text, settings)
+    return time.perf_counter() - start
+
+
+def at_once(engine, text, windows, settings):
+    start = time.perf_counter()
+    engine.fan_out(text, windows, settings)
+    return time.perf_counter() - start
+
+
+def main():
+    chars = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    cps = float(sys.argv[2]) if len(sys.argv) > 2 else 200.0
+    failed = False
+
+    print(f"{chars} characters at {cps:g} chars/s")
+    print(f"{'':<18}{'windows':>8}{'one by one':>14}{'at once':>12}{'faster':>8}{'focus':>7}")
+    for label, text, settings in cases(chars, cps):
+        for count in (1, 4, 8):
+            windows = [FIRST_WINDOW + i for i in range(count)]
+            backend = RecordingBackend()
+            engine = TypingEngine(backend)
+            sequential = one_by_one(engine, text, windows, settings)
+            backend.clear()
+            fanned = at_once(engine, text, windows, settings)
+            focus = sum(1 for event in backend.events if event.kind == "focus")
+            correct = all(backend.typed_text(window=window) == text for window in windows)
+            failed = failed or not correct
+            print(f"{label:<18}{count:>8}{sequential * 1000:>11.1f} ms{fanned * 1000:>9.1f} ms"
+                  f"{sequential / fanned:>7.1f}x{focus:>7}  {'ok' if correct else 'WRONG TEXT'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""Measure what the global hotkey hook costs each injected keystroke
+
+First, without a display: the engine's keystrokes for a text are fed as
+key events through HotkeyListener.on_event(), the function the keyboard
+hook calls, while the engine is typing (dropped at once) and while it is
+not (looked up in the bindings). The time per event is the hook's own
+cost per injected key.
+
+Then, with the keyboard module, the same unpaced text is typed with no
+hook installed, with the old keyboard.add_hotkey() bindings, and with
+HotkeyListener. The extra time per keystroke against the run without a
+hook is what each one costs, the keyboard library's dispatch included.
+That part needs a display and root on Linux, run it with a scratch
+editor focused or under Xvfb:
+
+    python benchmarks/hotkey_overhead.py [backend] [characters] [rounds]
+"""
+
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing_core import TypingEngine, TypingSettings, RecordingBackend, create_backend
+from typing_core.hotkeys import HotkeyListener, DEFAULT_HOTKEYS
+
+
+TEXT = "The quick brown fox jumps over the lazy dog 0123456789.\n"
+
+# Key names the keyboard module reports for the characters of TEXT
+KEY_NAMES = {" ": "space", "\n": "enter"}
+
+
+class KeyEvent:
+    """What the keyboard module passes to a hook"""
+
+    __slots__ = ("name", "event_type")
+
+    def __init__(self, name, event_type="down"):
+        self.name = name
+        self.event_type = event_type
+
+
+def injected_events(text, settings):
+    """A down and an up event for every key the engine sends for text"""
+    backend = RecordingBackend()
+    TypingEngine(backend).run(text, settings)
+    events = []
+    for char in backend.typed_text():
+        name = KEY_NAMES.get(char, char.lower())
+        events += [KeyEvent(name), KeyEvent(name, "up")]
+    return events
+
+
+def per_event(listener, events, runs=5):
+    times = []
+    on_event = listener.on_event
+    for _ in range(runs):
+        start = time.perf_counter()
+        for event in events:
+            on_event(event)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) / len(events)
+
+
+def hook_cost(text, settings):
+    events = injected_events(text, settings)
+    typing = HotkeyListener(is_injecting=lambda: True)
+    idle = HotkeyListener(is_injecting=lambda: False)
+    print(f"HotkeyListener.on_event(), {len(events)} key events, median of 5 runs:")
+    print(f"  while typing (dropped) {per_event(typing, events) * 1e9:8.0f} ns per event")
+    print(f"  while idle (matched)   {per_event(idle, events) * 1e9:8.0f} ns per event")
+
+
+def type_rate(engine, text, settings):
+    if not engine.run(text, settings):
+        raise RuntimeError("Run did not finish")
+    return engine.last_report.achieved_cps
+
+
+def main():
+    name = sys.argv[1] if len(sys.argv) > 1 else "auto"
+    chars = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    text = (TEXT * (chars // len(TEXT) + 1))[:chars]
+    settings = TypingSettings(delay=0, speed=0, lang_mode="english", english_mode="character")
+    hook_cost(text, settings)
+    try:
+        import keyboard
+    except ImportError as e:
+        print(f"Typing with the hooks installed needs the keyboard module: {e}")
+        return 0
+
+    backend = create_backend(name)
+    engine = TypingEngine(backend)
+    rates = {"no hook": [], "add_hotkey": [], "HotkeyListener": []}
+    try:
+        for _ in range(rounds):
+            rates["no hook"].append(type_rate(engine, text, settings))
+
+            for key in DEFAULT_HOTKEYS:
+                keyboard.add_hotkey(key, lambda: None)
+            try:
+                rates["add_hotkey"].append(type_rate(engine, text, settings))
+            finally:
+                keyboard.unhook_all_hotkeys()
+
+            listener = HotkeyListener(is_injecting=lambda: engine.active)
+            listener.start()
+            try:
+                rates["HotkeyListener"].append(type_rate(engine, text, settings))
+            finally:
+                listener.stop()
+    finally:
+        backend.close()
+
+    baseline = statistics.median(rates["no hook"])
+    print(f"{backend.name}, {len(text)} characters, median of {rounds} rounds:")
+    for label, values in rates.items():
+        rate = statistics.median(values)
+        # Extra time per keystroke against typing with no hook
+        cost = (1 / rate - 1 / baseline) * 1e6
+        print(f"  {label:<15} {rate:10.0f} keystrokes/s  {cost:7.1f} us per key")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Measure the cost and accuracy of humanized typing
+
+Three numbers per run:
+- compile: time to draw the delay schedule of a plan, per step, with
+  NumPy (when installed) and with the array fallback
+- hot loop: time per step spent in PacingScheduler.wait() with sleeping
+  stubbed out, for constant and for precomputed humanized delays
+- accuracy: how far the recording backend's keystrokes land from the
+  precomputed deadlines in a real paced run
+
+No display needed. Usage: python benchmarks/humanize.py [characters] [runs]
+"""
+
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing_core import TypingEngine, TypingSettings, RecordingBackend, compile_plan
+from typing_core.humanize import HumanTiming, HumanizedPlan
+from typing_core.pacing import PacingScheduler
+from typing_core.plan import ENGLISH_CHARACTER
+
+
+TEXT = "The quick brown fox jumps over the lazy dog. Then it rested! "
+
+
+def compile_cost(plan, use_numpy, runs):
+    nominal = PacingScheduler(unit_delay=0.05).step_duration
+    times = []
+    for seed in range(runs):
+        start = time.perf_counter()
+        HumanizedPlan(plan, HumanTiming(typo_rate=0.02, seed=seed, use_numpy=use_numpy), nominal)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) / len(plan.steps)
+
+
+def wait_cost(steps, durations, runs):
+    times = []
+    for _ in range(runs):
+        pacer = PacingScheduler(unit_delay=0.05, sleep=lambda seconds: None, durations=durations)
+        pacer.start()
+        wait = pacer.wait
+        start = time.perf_counter()
+        for _ in range(steps):
+            wait(1, 1)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) / steps
+
+
+def main():
+    chars = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    text = (TEXT * (chars // len(TEXT) + 1))[:chars]
+    plan = compile_plan(text, ENGLISH_CHARACTER)
+    steps = len(plan.steps)
+
+    print(f"{steps} steps, median of {runs} runs")
+    for label, use_numpy in (("numpy", True), ("array", False)):
+        timing = HumanTiming(use_numpy=use_numpy)
+        if use_numpy and timing.numpy is None:
+            print(f"  compile ({label}):  not installed")
+            continue
+        print(f"  compile ({label}):  {compile_cost(plan, use_numpy, runs) * 1e6:6.2f} us/step")
+
+    humanized = HumanizedPlan(plan, HumanTiming(seed=0), PacingScheduler(unit_delay=0.05).step_duration)
+    print(f"  wait, constant:    {wait_cost(steps, None, runs) * 1e9:6.0f} ns/step")
+    print(f"  wait, humanized:   {wait_cost(steps, humanized.durations, runs) * 1e9:6.0f} ns/step")
+
+    # A short paced run, keystroke times against the planned deadlines
+    sample = text[:400]
+    backend = RecordingBackend()
+    engine = TypingEngine(backend)
+    settings = TypingSettings(delay=0, speed=0.005, humanize=True, seed=1)
+    plan = engine.compile(sample, settings)
+    engine.execute_plan(plan, settings)
+    times = [event.time for event in backend.events]
+    deadlines = [0.0]
+    for duration in plan.durations[:len(times) - 1]:
+        deadlines.append(deadlines[-1] + duration)
+    errors = [abs((t - times[0]) - d) for t, d in zip(times, deadlines)]
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    print(f"  accuracy:          median {statistics.median(errors) * 1000:.2f} ms, "
+          f"max {max(errors) * 1000:.2f} ms off the schedule")
+    print(f"  key gaps:          mean {statistics.mean(gaps) * 1000:.2f} ms, "
+          f"stdev {statistics.stdev(gaps) * 1000:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
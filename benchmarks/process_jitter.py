@@ -0,0 +1,75 @@
+"""Compare keystroke timing in the app's process and in a worker process
+
+The same paced run is typed by a TypingEngine on a thread of this process
+and by a ProcessEngine, first idle and then while a CPU-bound thread keeps
+this process's GIL busy, the way a redraw or a search in the GUI would.
+For each the script prints the achieved rate and the p50, p99 and max of
+the pacing sleeps and key sends from the timing report; a keystroke
+that waits for the GIL shows up as sleeps that overshoot their step.
+
+No display needed. Usage: python benchmarks/process_jitter.py [characters] [cps]
+"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing_core import TypingEngine, TypingSettings, RecordingBackend, ProcessEngine
+
+
+TEXT = "The quick brown fox jumps over the lazy dog. "
+
+
+def busy(stop):
+    """Pure Python work that holds the GIL for its whole switch interval"""
+    while not stop.is_set():
+        sum(i * i for i in range(10000))
+
+
+def run(engine, text, settings, loaded):
+    stop = threading.Event()
+    if loaded:
+        threading.Thread(target=busy, args=(stop,), daemon=True).start()
+    try:
+        engine.run(text, settings)
+    finally:
+        stop.set()
+    return engine.last_telemetry
+
+
+def row(label, report):
+    ops = report.operations
+    cells = [f"{label:<22}{report.pacing.achieved_cps:>9.1f}"]
+    for names in (("pacing_sleep",), ("press", "write")):
+        stats = next((ops[name] for name in names if name in ops), None)
+        if stats is None:
+            cells.append(f"{'-':>24}")
+            continue
+        cells.append(f"{stats['p50'] * 1000:>8.2f}{stats['p99'] * 1000:>8.2f}{stats['max'] * 1000:>8.2f}")
+    print("".join(cells))
+
+
+def main():
+    chars = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    cps = float(sys.argv[2]) if len(sys.argv) > 2 else 200.0
+    text = (TEXT * (chars // len(TEXT) + 1))[:chars]
+    settings = TypingSettings(delay=0, speed=0, target_cps=cps, lang_mode="english",
+                              english_mode="character", instrument=True)
+
+    process = ProcessEngine("recording").start()
+    try:
+        print(f"{chars} characters at {cps:g} chars/s; sleeps and key sends in ms (p50, p99, max)")
+        print(f"{'':<22}{'chars/s':>9}{'sleep':>24}{'key':>24}")
+        for loaded in (False, True):
+            load = "busy GIL" if loaded else "idle"
+            row(f"thread, {load}", run(TypingEngine(RecordingBackend()), text, settings, loaded))
+            row(f"process, {load}", run(process, text, settings, loaded))
+    finally:
+        process.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""Compare typing only the changes of an edited document with typing it again
+
+A generated document of numbered lines gets a few small edits spread over
+it. For every diff level and navigation mode the script reports the time
+to compute the edit, the keys sent and the keys a full retype would send,
+and checks on the recording backend that the edit turns the old text into
+the new one.
+
+No display needed. Usage: python benchmarks/retype.py [lines] [edits]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing_core import TypingEngine, TypingSettings, RecordingBackend
+from typing_core.diff import keystrokes
+
+
+def document(lines):
+    return "".join(f"Line {i}: the quick brown fox jumps over the lazy dog.\n" for i in range(lines))
+
+
+def edited(text, edits, seed=0):
+    rng = random.Random(seed)
+    words = text.split(" ")
+    for _ in range(edits):
+        i = rng.randrange(len(words))
+        words[i] = rng.choice(("slow", "red", "sleepy", "")) if rng.random() < 0.7 else words[i] + " again"
+    return " ".join(words)
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    edits = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    old = document(lines)
+    new = edited(old, edits)
+    backend = RecordingBackend()
+    engine = TypingEngine(backend)
+
+    print(f"{len(new)} characters, {edits} edits, full retype sends {len(new)} keys")
+    failed = False
+    for level in ("character", "word"):
+        for navigation in ("arrows", "lines"):
+            settings = TypingSettings(delay=0, speed=0, diff_level=level, diff_navigation=navigation)
+            start = time.perf_counter()
+            plan = engine.compile_edit(old, new, settings)
+            elapsed = time.perf_counter() - start
+            keys = keystrokes(plan.steps)
+
+            backend.clear()
+            engine.execute_plan(plan, settings)
+            correct = backend.typed_text(initial=old) == new
+            failed = failed or not correct
+            print(f"  {level:<10} {navigation:<7} diff {elapsed * 1000:7.1f} ms  {keys:8d} keys  "
+                  f"{len(new) / max(keys, 1):8.1f}x fewer  {'ok' if correct else 'WRONG TEXT'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
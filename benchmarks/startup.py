@@ -0,0 +1,99 @@
+"""Measure cold-start time of the GUI until its first window is drawn
+
+Every run starts a fresh interpreter that imports auto_typer, builds the app
+and processes the first frame, then exits. The time is taken from before the
+interpreter is launched, so it includes Python's own startup. The modules
+that were imported by then are listed, so work that should be deferred
+(pyautogui, keyboard, pyperclip, the Saved Texts, Queue and Settings tabs) shows up
+when it sneaks back onto the startup path.
+
+Needs a display. Usage: python benchmarks/startup.py [runs]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that should not be imported before the first frame
+DEFERRED_MODULES = ("pyautogui", "keyboard", "pyperclip")
+
+CHILD = r"""
+import sys, time
+import tkinter as tk
+import auto_typer
+
+root = tk.Tk()
+app = auto_typer.AutoTyperApp(root)
+root.update()
+first_frame = time.perf_counter()
+loaded = [name for name in sys.argv[1:] if name in sys.modules]
+built_tabs = len(app.notebook.tabs()) - len(app.pending_tabs)
+print(first_frame, built_tabs, len(app.notebook.tabs()), ",".join(loaded))
+root.destroy()
+"""
+
+# Same clock as the child: perf_counter is system-wide on Linux and Windows
+IMPORT_CHILD = r"""
+import sys, time
+start = time.perf_counter()
+try:
+    __import__(sys.argv[1])
+except Exception:
+    print(-1)
+else:
+    print(time.perf_counter() - start)
+"""
+
+
+def measure_startup():
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD] + list(DEFERRED_MODULES),
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    first_frame, built_tabs, tabs, loaded = result.stdout.split("\n")[0].split(" ")
+    return float(first_frame) - start, f"{built_tabs} of {tabs}", [name for name in loaded.split(",") if name]
+
+
+def measure_import(module):
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_CHILD, module],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return float(result.stdout)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    # The first run warms the OS file cache and writes .pyc files
+    try:
+        measure_startup()
+    except subprocess.CalledProcessError as e:
+        print("App failed to start:\n" + e.stderr.strip().splitlines()[-1])
+        return 2
+    times = []
+    for _ in range(runs):
+        elapsed, built_tabs, loaded = measure_startup()
+        times.append(elapsed)
+
+    print(f"time to first window over {runs} runs: "
+          f"median {statistics.median(times) * 1000:.0f} ms, "
+          f"min {min(times) * 1000:.0f} ms, max {max(times) * 1000:.0f} ms")
+    print(f"tabs built at first frame: {built_tabs}")
+    print(f"deferred modules imported before first frame: {', '.join(loaded) or 'none'}")
+
+    print("import cost moved off the startup path:")
+    for module in DEFERRED_MODULES:
+        cost = measure_import(module)
+        print(f"  {module:<10} " + ("not installed" if cost < 0 else f"{cost * 1000:.0f} ms"))
+
+    return 1 if loaded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
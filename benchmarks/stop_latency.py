@@ -0,0 +1,92 @@
+"""Measure how long the engine takes to return after stop() is called
+
+Every typing mode is run against a RecordingBackend whose clipboard is slow
+enough that pastes always wait for the full clipboard timeout. Each run is
+stopped at a random moment (during the countdown, pacing sleeps, clipboard
+waits or pauses) and the time until TypingEngine.run() returns is recorded.
+The "backend paste" mode uses a backend that pastes inside write() through
+its own clipboard handshake, like XTestBackend once its spare keycodes run out.
+
+Usage: python benchmarks/stop_latency.py [runs per mode] [budget in ms]
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing_core import TypingEngine, TypingSettings, RecordingBackend, ClipboardHandshake
+
+
+ENGLISH_TEXT = "The quick brown fox jumps over the lazy dog. " * 20
+ARABIC_TEXT = "مرحبا بالعالم هذا نص تجريبي للكتابة التلقائية " * 20
+
+
+
+class PastingBackend(RecordingBackend):
+    """Types ASCII and pastes everything else from inside write()"""
+
+    name = "pasting"
+
+    def __init__(self, clipboard_latency=0.0, paste_timeout=0.3):
+        super().__init__(clipboard_latency, types_unicode=True)
+        self.paste_timeout = paste_timeout
+        self.handshake = ClipboardHandshake(self, sleep=self.sleep)
+
+    def write(self, text):
+        for char in text:
+            if char.isascii():
+                super().write(char)
+            else:
+                self.handshake.paste(char, self.paste_timeout)
+
+
+MODES = {
+    "english character": (ENGLISH_TEXT, dict(lang_mode="english", english_mode="character"), RecordingBackend),
+    "english word": (ENGLISH_TEXT, dict(lang_mode="english", english_mode="word"), RecordingBackend),
+    "arabic character": (ARABIC_TEXT, dict(lang_mode="arabic", arabic_word_mode="character"), RecordingBackend),
+    "arabic word": (ARABIC_TEXT, dict(lang_mode="arabic", arabic_word_mode="word"), RecordingBackend),
+    "arabic paste words": (ARABIC_TEXT, dict(lang_mode="arabic", arabic_mode="paste", speed=0.2), RecordingBackend),
+    "arabic paste whole": (ARABIC_TEXT, dict(lang_mode="arabic", arabic_mode="paste", speed=0.05), RecordingBackend),
+    "backend paste": (ARABIC_TEXT, dict(lang_mode="arabic", arabic_word_mode="character"), PastingBackend),
+}
+
+
+def measure(text, options, pause_first, backend_class=RecordingBackend):
+    backend = backend_class(clipboard_latency=10.0)
+    engine = TypingEngine(backend)
+    settings = TypingSettings(**dict(dict(delay=1, speed=0.05, clipboard_delay=0.3), **options))
+    worker = threading.Thread(target=engine.run, args=(text, settings))
+    worker.start()
+    time.sleep(random.uniform(0.0, 1.6))
+    if pause_first:
+        engine.pause()
+        time.sleep(0.05)
+    engine.stop()
+    worker.join()
+    return engine.last_stop_latency
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    budget = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.010
+    worst = 0.0
+    for name, (text, options, backend_class) in MODES.items():
+        results = [measure(text, options, i % 3 == 0, backend_class) for i in range(runs)]
+        # Runs that finished before stop() was called have nothing to measure
+        latencies = sorted(latency for latency in results if latency is not None)
+        if not latencies:
+            print(f"{name:20} finished before every stop")
+            continue
+        worst = max(worst, latencies[-1])
+        print(f"{name:20} median {latencies[len(latencies) // 2] * 1000:6.2f} ms"
+              f"  max {latencies[-1] * 1000:6.2f} ms")
+    print(f"worst case {worst * 1000:.2f} ms, budget {budget * 1000:.0f} ms")
+    return 0 if worst <= budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,331 @@
+"""Throughput, latency and memory of every typing mode, checked against baselines
+
+Every mode is run on generated English, Arabic or mixed corpora in three
+sizes against a recording backend with its simulated clipboard. Paced
+modes get an unreachable target rate, so their steps are compiled and
+sent one at a time like in a real run but never wait: what is measured is
+the cost of the mode itself. Multi-MB corpora are written to a file and
+streamed with FileSource, the way the app types large files.
+
+Each case runs in a fresh process and reports:
+- keys/s: keystrokes (pressed keys, written characters, Ctrl+V) per second
+- chars/s: characters of the corpus typed per second
+- first key: time from the start of the run to the first backend call
+- peak: Python memory allocated while typing, traced in an extra run
+- callbacks: on_progress and on_status calls, i.e. work handed to the UI
+
+Results are compared with benchmarks/baselines.json and cases that got
+worse by more than the tolerance are flagged; the exit status is 1 if any
+did. Each case process also times a fixed pure Python loop that does not
+touch the engine, and timings are scaled by how long that loop took
+against the baseline's, so baselines recorded on another machine still
+apply. Record your own with --save anyway when the machines differ a lot.
+
+No display needed. Usage:
+    python benchmarks/suite.py [--sizes small,medium,large] [--only TEXT] [--save]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing_core import TypingEngine, TypingSettings, RecordingBackend, FileSource
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# Characters per corpus size; large ones are streamed from a file
+SIZES = {"small": 2000, "medium": 200000, "large": 2000000}
+STREAMED_SIZES = ("large",)
+
+# Runs per case, the best is kept; short runs are noisy
+REPEATS = {"small": 25, "medium": 5, "large": 1}
+
+# Iterations and runs of the calibration loop, some 30 ms per run; it is
+# run before and after the timed runs of a case
+CALIBRATION_LOOPS = 100000
+CALIBRATION_RUNS = 5
+
+# Paced runs aim for this rate, which no backend reaches, so they never sleep
+UNBOUNDED_CPS = 1e9
+
+ENGLISH_WORDS = ("the quick brown fox jumps over lazy dog and then types a few more "
+                 "words of plain English text with numbers like 42 or 2024.").split()
+ARABIC_WORDS = ("مرحبا بالعالم "
+                "هذا نص تجريبي "
+                "للكتابة التلقائية "
+                "في البرنامج").split()
+
+# Settings of each mode and the corpora it is run on
+MODES = {
+    "english character": (dict(lang_mode="english", english_mode="character"), ("english",)),
+    "english word": (dict(lang_mode="english", english_mode="word"), ("english",)),
+    "arabic character": (dict(lang_mode="arabic", arabic_word_mode="character"), ("arabic",)),
+    "arabic word": (dict(lang_mode="arabic", arabic_word_mode="word"), ("arabic",)),
+    "arabic paste words": (dict(lang_mode="arabic", arabic_mode="paste", speed=0.2), ("arabic",)),
+    "arabic paste whole": (dict(lang_mode="arabic", arabic_mode="paste", speed=0.05), ("arabic",)),
+    "auto": (dict(lang_mode="auto"), ("mixed",)),
+    "unpaced": (dict(lang_mode="auto", speed=0, target_cps=0), ("english", "arabic", "mixed")),
+}
+
+# How much worse than the baseline a result may be before it is flagged.
+# Timings, even scaled to the machine, move by a third between runs on a
+# busy machine, so only large changes count; memory and callback counts
+# are the same every run.
+TIME_TOLERANCE = 0.5
+COUNT_TOLERANCE = 0.1
+# (relative, absolute) allowance of the metrics that should stay low
+LIMITS = {"first_key": (TIME_TOLERANCE, 0.002), "peak": (COUNT_TOLERANCE, 64 << 10),
+          "callbacks": (COUNT_TOLERANCE, 0)}
+
+
+def corpus(language, size):
+    """Deterministic text of size characters, lines of about 80"""
+    words = {"english": ENGLISH_WORDS, "arabic": ARABIC_WORDS}.get(language)
+    parts = []
+    length = 0
+    i = 0
+    while length < size:
+        if words is None:
+            # Mixed: English sentences with Arabic phrases in between
+            word = ARABIC_WORDS[i % len(ARABIC_WORDS)] if i % 7 in (3, 4) else ENGLISH_WORDS[i % len(ENGLISH_WORDS)]
+        else:
+            word = words[i % len(words)]
+        parts.append(word)
+        parts.append("\n" if i % 12 == 11 else " ")
+        length += len(word) + 1
+        i += 1
+    return "".join(parts)[:size]
+
+
+class CountingBackend(RecordingBackend):
+    """RecordingBackend that counts calls instead of keeping them
+
+    The simulated clipboard is kept, so paste modes run their handshake.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.keys = 0
+        self.first = None
+
+    def _record(self, kind, value):
+        if self.first is None:
+            self.first = time.perf_counter()
+        self.calls += 1
+        if kind == "write":
+            self.keys += len(value)
+        elif kind in ("press", "hotkey"):
+            self.keys += 1
+
+
+def calibrate():
+    """Seconds of a fixed pure Python loop, the best of CALIBRATION_RUNS
+
+    Dict updates, string building and calls, the kind of work the engine
+    does per keystroke, but none of its code, so a change to the engine
+    never moves the calibration.
+    """
+    best = None
+    for _ in range(CALIBRATION_RUNS):
+        start = time.perf_counter()
+        counts = {}
+        parts = []
+        for i in range(CALIBRATION_LOOPS):
+            key = i & 1023
+            counts[key] = counts.get(key, 0) + 1
+            parts.append(chr(97 + i % 26))
+        "".join(parts)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def write_corpus(language, size, directory):
+    path = os.path.join(directory, f"{language}-{size}.txt")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(corpus(language, size))
+    return path
+
+
+def run_once(text, path, settings):
+    """Type the corpus on a new engine, return it, its backend and the UI callbacks"""
+    callbacks = [0]
+
+    def count(*args):
+        callbacks[0] += 1
+
+    backend = CountingBackend()
+    engine = TypingEngine(backend, on_progress=count, on_status=count)
+    start = time.perf_counter()
+    if path is None:
+        completed = engine.run(text, settings)
+    else:
+        source = FileSource(path)
+        try:
+            completed = engine.run_source(source, settings)
+        finally:
+            source.close()
+    elapsed = time.perf_counter() - start
+    chars = engine.chars_typed
+    return {
+        "completed": completed,
+        "chars": chars,
+        "keys_per_s": backend.keys / elapsed if elapsed > 0 else 0.0,
+        "chars_per_s": chars / elapsed if elapsed > 0 else 0.0,
+        "first_key": backend.first - start if backend.first is not None else None,
+        "callbacks": callbacks[0],
+        "backend_calls": backend.calls,
+    }
+
+
+def measure(mode, language, size_name, path=None):
+    """Run one case in this (fresh) process
+
+    Streamed corpora are read from path, written by the caller. Every
+    run starts with a new engine, so compiling the plan is part of the
+    time to the first key. The timed runs are not traced; one more run
+    under tracemalloc gives the peak of Python memory allocated while
+    typing, the corpus itself not included.
+    """
+    options, _ = MODES[mode]
+    values = dict(delay=0, speed=0.05, target_cps=UNBOUNDED_CPS)
+    values.update(options)
+    settings = TypingSettings(**values)
+    text = corpus(language, SIZES[size_name]) if path is None else None
+
+    # Before and after the timed runs, the machine's speed drifts
+    calibration = calibrate()
+    best = None
+    for _ in range(REPEATS[size_name]):
+        result = run_once(text, path, settings)
+        if best is None:
+            best = result
+            continue
+        best["keys_per_s"] = max(best["keys_per_s"], result["keys_per_s"])
+        best["chars_per_s"] = max(best["chars_per_s"], result["chars_per_s"])
+        if result["first_key"] is not None and best["first_key"] is not None:
+            best["first_key"] = min(best["first_key"], result["first_key"])
+    calibration = (calibration + calibrate()) / 2
+
+    tracemalloc.start()
+    try:
+        run_once(text, path, settings)
+        best["peak"] = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    best["calibration"] = calibration
+    return best
+
+
+def slowdown(result, baseline):
+    """How much slower this machine ran the calibration than the baseline's"""
+    if not result.get("calibration") or not baseline.get("calibration"):
+        return 1.0
+    return result["calibration"] / baseline["calibration"]
+
+
+def regressions(result, baseline):
+    """Names of the metrics of result that are worse than baseline
+
+    Rates and the time to the first key are first scaled by slowdown().
+    """
+    scale = slowdown(result, baseline)
+    worse = []
+    for name in ("keys_per_s", "chars_per_s"):
+        if baseline.get(name) and result[name] < baseline[name] / scale * (1 - TIME_TOLERANCE):
+            worse.append(name)
+    for name, (tolerance, slack) in LIMITS.items():
+        if result[name] is None or baseline.get(name) is None:
+            continue
+        expected = baseline[name] * scale if name == "first_key" else baseline[name]
+        if result[name] > expected * (1 + tolerance) + slack:
+            worse.append(name)
+    return worse
+
+
+def load_baselines(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every typing mode against stored baselines.")
+    parser.add_argument("--sizes", default=",".join(SIZES), help="comma separated corpus sizes to run")
+    parser.add_argument("--only", default="", help="run the cases whose name contains TEXT")
+    parser.add_argument("--baselines", default=BASELINE_PATH, help="baseline file")
+    parser.add_argument("--save", action="store_true", help="store these results as the new baselines")
+    options = parser.parse_args(argv)
+
+    sizes = [size for size in options.sizes.split(",") if size]
+    for size in sizes:
+        if size not in SIZES:
+            parser.error(f"unknown size '{size}', choose from {', '.join(SIZES)}")
+    baselines = load_baselines(options.baselines)
+    results = dict(baselines) if options.save else {}
+    flagged = 0
+    scales = []
+
+    print(f"{'case':<36}{'chars':>9}{'keys/s':>11}{'chars/s':>11}{'first key':>11}"
+          f"{'peak KB':>9}{'callbacks':>10}")
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory, context.Pool(1, maxtasksperchild=1) as pool:
+        paths = {}
+        for mode, (_, languages) in MODES.items():
+            for language in languages:
+                for size in sizes:
+                    name = f"{mode}/{language}/{size}"
+                    if options.only not in name:
+                        continue
+                    path = None
+                    if size in STREAMED_SIZES:
+                        if (language, size) not in paths:
+                            paths[language, size] = write_corpus(language, SIZES[size], directory)
+                        path = paths[language, size]
+                    result = pool.apply(measure, (mode, language, size, path))
+                    first_key = f"{result['first_key'] * 1000:.2f} ms" if result["first_key"] is not None else "-"
+                    worse = []
+                    if name in baselines:
+                        worse = regressions(result, baselines[name])
+                        scales.append(slowdown(result, baselines[name]))
+                    flagged += bool(worse)
+                    note = ""
+                    if not result["completed"]:
+                        note = "  NOT FINISHED"
+                        flagged += 1
+                    elif worse:
+                        note = "  REGRESSION: " + ", ".join(worse)
+                    elif name not in baselines:
+                        note = "  (no baseline)"
+                    print(f"{name:<36}{result['chars']:>9}{result['keys_per_s']:>11.0f}"
+                          f"{result['chars_per_s']:>11.0f}{first_key:>11}{result['peak'] / 1024:>9.0f}"
+                          f"{result['callbacks']:>10}{note}")
+                    if result["completed"]:
+                        # An unfinished run is no baseline
+                        results[name] = result
+
+    if options.save:
+        with open(options.baselines, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baselines saved to {options.baselines}")
+        return 0
+    if scales:
+        scales.sort()
+        print(f"Baselines scaled to this machine, median slowdown {scales[len(scales) // 2]:.2f}x")
+    print(f"{flagged} case(s) regressed" if flagged else "No regressions")
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
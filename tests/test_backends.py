@@ -0,0 +1,153 @@
+"""Key mapping of the XTest backend, checked against a fake X keymap"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import pytest
+
+from typing_core import TypingEngine, TypingSettings, RecordingBackend
+from typing_core.backends import XTestBackend, char_keysym, XTEST_FLUSH_CHARS
+from typing_core.clipboard import ClipboardHandshake
+
+
+def test_char_keysym():
+    assert char_keysym("a") == ord("a")
+    assert char_keysym("é") == 0xE9
+    assert char_keysym("\n") == 0xFF0D and char_keysym("\t") == 0xFF09
+    assert char_keysym("€") == 0x010020AC
+    assert char_keysym("ع") == 0x01000000 | ord("ع")
+
+
+class FakeX11:
+    """US layout with letters, digits, space and Return"""
+
+    def __init__(self):
+        self.keymap = {}
+        keycode = 10
+        for plain, shifted in zip("abcdefghijklmnopqrstuvwxyz1234567890 ", "ABCDEFGHIJKLMNOPQRSTUVWXYZ!@#$%^&*() "):
+            self.keymap[keycode] = (ord(plain), ord(shifted))
+            keycode += 1
+        self.keymap[50] = (0xFFE1, 0xFFE1)    # Shift_L
+        self.keymap[36] = (0xFF0D, 0xFF0D)    # Return
+        self.names = {"Shift_L": 0xFFE1, "Return": 0xFF0D}
+        self.flushes = 0
+
+    def XStringToKeysym(self, name):
+        return self.names.get(name.decode(), 0)
+
+    def XKeysymToKeycode(self, display, keysym):
+        for keycode, levels in self.keymap.items():
+            if keysym in levels:
+                return keycode
+        return 0
+
+    def XkbKeycodeToKeysym(self, display, keycode, group, level):
+        return self.keymap.get(keycode, (0, 0))[level]
+
+    def XFlush(self, display):
+        self.flushes += 1
+
+
+def fake_backend(spare=()):
+    """XTestBackend wired to FakeX11, it types into a RecordingBackend"""
+    x11 = FakeX11()
+    for keycode in spare:
+        x11.keymap[keycode] = (0, 0)
+    output = RecordingBackend()
+    backend = XTestBackend.__new__(XTestBackend)
+    backend.control = None
+    backend._x11 = x11
+    backend._display = 1
+    backend._keys = {}
+    shift_down = []
+
+    def fake_key(display, keycode, down, delay):
+        if keycode == backend._shift:
+            shift_down[:] = [down]
+        elif down:
+            keysym = x11.keymap[keycode][1 if shift_down and shift_down[0] else 0]
+            output.write("\n" if keysym == 0xFF0D else chr(keysym & 0xFFFFFF))
+
+    def set_mapping(keycode, keysym):
+        x11.keymap[keycode] = (keysym, keysym)
+
+    backend._fake_key = fake_key
+    backend._set_mapping = set_mapping
+    backend._spare = list(spare)
+    backend._remapped = OrderedDict()
+    backend._flush = lambda: x11.XFlush(1)
+    backend._shift = backend._keycode("Shift_L")
+    backend.copy = output.copy
+    backend.read_clipboard = output.read_clipboard
+    backend.hotkey = output.hotkey
+    backend.paste_timeout = 0
+    backend.handshake = ClipboardHandshake(backend, sleep=backend.sleep)
+    return backend, output, x11
+
+
+def test_keys_shift_and_paste_without_spare_keycodes():
+    backend, output, x11 = fake_backend()
+    backend.write("Hello World!\n")
+    backend.press("enter")
+    assert output.typed_text() == "Hello World!\n\n"
+    # A character without a key is pasted
+    backend.write("a€b")
+    assert output.typed_text() == "Hello World!\n\na€b"
+    assert backend._keys[char_keysym("€")] is None
+
+
+def test_events_are_flushed_in_batches():
+    backend, output, x11 = fake_backend()
+    backend.write("x" * (XTEST_FLUSH_CHARS * 3))
+    assert x11.flushes == 4
+    assert output.typed_text() == "x" * (XTEST_FLUSH_CHARS * 3)
+
+
+def test_missing_characters_are_bound_to_spare_keycodes(monkeypatch):
+    monkeypatch.setattr("typing_core.backends.REMAP_SETTLE", 0)
+    backend, output, x11 = fake_backend(spare=(200, 201))
+    backend.write("عربي")
+    assert output.typed_text() == "عربي"
+    # Typed as keys, the clipboard was never used
+    assert not any(event.kind == "copy" for event in output.events)
+    # Four characters on two keycodes, the last two are still bound
+    assert list(backend._remapped) == [char_keysym("ب"), char_keysym("ي")]
+    assert set(backend._remapped.values()) == {200, 201} and len(backend._keys) == 2
+
+    backend.close = XTestBackend.close.__get__(backend)
+    backend._x11.XCloseDisplay = lambda display: None
+    backend.close()
+    assert x11.keymap[200] == (0, 0) and x11.keymap[201] == (0, 0)
+
+
+@pytest.mark.parametrize("spare", [(), (200,)])
+def test_stop_ends_the_backends_own_waits(spare, monkeypatch):
+    # Without spare keycodes the clipboard never takes the text, with one
+    # the second character waits for the first binding to be read
+    monkeypatch.setattr("typing_core.backends.REMAP_SETTLE", 10)
+    backend, output, x11 = fake_backend(spare=spare)
+    output.clipboard_latency = 60
+    backend.paste_timeout = 10
+    engine = TypingEngine(backend)
+    settings = TypingSettings(delay=0, speed=0, lang_mode="arabic", arabic_word_mode="character")
+    result = []
+    thread = threading.Thread(target=lambda: result.append(engine.run("عربي", settings)))
+    thread.start()
+    time.sleep(0.05)
+    engine.stop()
+    thread.join(1)
+    assert result == [False]
+    assert engine.last_stop_latency < 0.05
+
+
+@pytest.mark.parametrize("options", [dict(lang_mode="arabic", arabic_word_mode="character"), dict(lang_mode="auto", arabic_word_mode="character"),
+                                     dict(lang_mode="auto", speed=0.05, target_cps=1e9)])
+def test_unicode_backends_are_not_pasted_to(options):
+    text = "Order طلب number رقم 42 is ready.\n"
+    backend = RecordingBackend(types_unicode=True)
+    values = dict(delay=0, speed=0, clipboard_delay=0)
+    values.update(options)
+    assert TypingEngine(backend).run(text, TypingSettings(**values))
+    assert backend.typed_text() == text
+    assert {event.kind for event in backend.events} <= {"write", "press"}
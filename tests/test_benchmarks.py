@@ -0,0 +1,61 @@
+"""The benchmark suite's corpora and regression checks"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import suite  # noqa: E402
+
+
+BASELINE = {"keys_per_s": 1000.0, "chars_per_s": 800.0, "first_key": 0.01, "peak": 100000, "callbacks": 50}
+
+
+@pytest.mark.parametrize("language", ["english", "arabic", "mixed"])
+def test_corpus(language):
+    text = suite.corpus(language, 5000)
+    assert len(text) == 5000 and text == suite.corpus(language, 5000)
+    arabic = any("؀" <= char <= "ۿ" for char in text)
+    latin = any("a" <= char <= "z" for char in text)
+    assert (arabic, latin) == {"english": (False, True), "arabic": (True, False), "mixed": (True, True)}[language]
+
+
+def test_regressions():
+    assert suite.regressions(dict(BASELINE), BASELINE) == []
+    # Within the tolerances
+    result = dict(BASELINE, keys_per_s=600.0, first_key=0.016, peak=110000)
+    assert suite.regressions(result, BASELINE) == []
+    result = dict(BASELINE, chars_per_s=300.0, first_key=0.03, callbacks=60, peak=None)
+    assert suite.regressions(result, BASELINE) == ["chars_per_s", "first_key", "callbacks"]
+    # Metrics the baseline lacks are not compared
+    assert suite.regressions(dict(BASELINE, callbacks=500), {"keys_per_s": 1000.0}) == []
+
+
+@pytest.mark.parametrize("mode", ["english word", "arabic paste whole", "unpaced"])
+def test_run_once(mode, tmp_path):
+    options, languages = suite.MODES[mode]
+    values = dict(delay=0, speed=0.05, target_cps=suite.UNBOUNDED_CPS)
+    values.update(options)
+    settings = suite.TypingSettings(**values)
+    path = suite.write_corpus(languages[-1], 3000, str(tmp_path))
+    for text, source in ((suite.corpus(languages[-1], 3000), None), (None, path)):
+        result = suite.run_once(text, source, settings)
+        assert result["completed"] and result["backend_calls"] > 0
+        assert result["first_key"] is not None and result["callbacks"] > 0
+
+
+def test_timings_are_scaled_to_the_machine():
+    baseline = dict(BASELINE, calibration=0.1)
+    # A machine twice as slow: half the rate and twice the first key time are expected
+    slow = dict(BASELINE, keys_per_s=400.0, chars_per_s=350.0, first_key=0.025, calibration=0.2)
+    assert suite.slowdown(slow, baseline) == pytest.approx(2.0)
+    assert suite.regressions(slow, baseline) == []
+    assert suite.regressions(dict(slow, calibration=0.1), baseline) == ["keys_per_s", "chars_per_s", "first_key"]
+    # Memory and callbacks do not depend on the machine
+    assert suite.regressions(dict(slow, peak=200000), baseline) == ["peak"]
+
+
+def test_calibration_is_positive():
+    assert suite.calibrate() > 0
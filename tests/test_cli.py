@@ -0,0 +1,129 @@
+"""Command line parsing, job lists and headless runs"""
+
+import _thread
+import io
+import json
+import sys
+import time
+
+import pytest
+
+from typing_core import RecordingBackend, SavedTextStore
+from typing_core import cli
+
+
+def parse(*args):
+    return cli.build_parser().parse_args(list(args))
+
+
+def test_inputs_keep_their_order():
+    options = parse("--file", "a.txt", "--text", "hi", "-", "--saved", "sig")
+    assert options.inputs == [{"file": "a.txt"}, {"text": "hi"}, {"stdin": True}, {"saved": "sig"}]
+    assert getattr(parse("--jobs", "list.json"), "inputs", None) is None
+
+
+def test_settings_and_overrides():
+    options = parse("--speed", "0", "--wpm", "60", "--lang", "english")
+    settings = cli.settings_from(options)
+    assert settings.speed == 0 and settings.lang_mode == "english"
+    assert settings.target_cps == pytest.approx(5.0)
+    # A job's cps replaces the default wpm and the other way round
+    assert cli.settings_from(options, {"cps": 40, "english_mode": "word"}).target_cps == 40
+    assert cli.settings_from(options, {"cps": 40, "english_mode": "word"}).english_mode == "word"
+    assert cli.settings_from(parse("--cps", "9"), {"wpm": 120}).target_cps == pytest.approx(10.0)
+    with pytest.raises(ValueError):
+        cli.settings_from(options, {"sped": 1})
+
+
+def test_build_jobs(tmp_path):
+    store = SavedTextStore(tmp_path / "texts.db")
+    store.save("sig", "Best regards")
+    options = parse()
+    jobs = cli.build_jobs([{"saved": "sig"}, {"text": "x", "name": "X"}, {"file": "a.txt"},
+                           {"stdin": True}], options, lambda: store)
+    assert [job.name for job in jobs] == ["sig", "X", "a.txt", "stdin"]
+    assert jobs[0].text == "Best regards" and jobs[2].path == "a.txt"
+    with pytest.raises(ValueError):
+        cli.build_jobs([{"saved": "missing"}], options, lambda: store)
+    with pytest.raises(ValueError):
+        cli.build_jobs([{"text": "a", "file": "b"}], options, lambda: store)
+    store.close()
+
+
+def test_job_list_must_be_a_list(tmp_path):
+    path = tmp_path / "jobs.json"
+    path.write_text(json.dumps({"text": "a"}))
+    with pytest.raises(ValueError):
+        cli.load_job_list(path)
+    path.write_text(json.dumps([{"text": "a"}, {"file": "b"}]))
+    assert cli.load_job_list(path) == [{"text": "a"}, {"file": "b"}]
+
+
+def test_main_types_every_job(tmp_path, monkeypatch):
+    backend = RecordingBackend()
+    monkeypatch.setattr(cli, "create_backend", lambda name: backend)
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO("from stdin ".encode("utf-8"))))
+    path = tmp_path / "notes.txt"
+    path.write_text("from a file, نص ", encoding="utf-8")
+    jobs = tmp_path / "jobs.json"
+    jobs.write_text(json.dumps([{"text": "from the list", "english_mode": "word"}]))
+    code = cli.main(["--text", "first ", "--file", str(path), "-", "--jobs", str(jobs),
+                     "--delay", "0", "--speed", "0", "--clipboard-delay", "0", "--quiet",
+                     "--db", str(tmp_path / "texts.db"), "--checkpoints", str(tmp_path / "checkpoints.json")])
+    assert code == 0
+    assert backend.typed_text() == "first from a file, نص from stdin from the list"
+
+
+def test_main_runs_higher_priorities_first(tmp_path, monkeypatch):
+    backend = RecordingBackend()
+    monkeypatch.setattr(cli, "create_backend", lambda name: backend)
+    jobs = tmp_path / "jobs.json"
+    jobs.write_text(json.dumps([{"text": "later"}, {"text": "sooner ", "priority": 1}]))
+    assert cli.main(["--jobs", str(jobs), "--delay", "0", "--speed", "0", "--quiet",
+                     "--db", str(tmp_path / "texts.db"), "--checkpoints", str(tmp_path / "checkpoints.json")]) == 0
+    assert backend.typed_text() == "sooner later"
+
+
+class InterruptedBackend(RecordingBackend):
+    """Presses Ctrl+C in the terminal as soon as typing starts"""
+
+    def press(self, key):
+        if not self.events:
+            _thread.interrupt_main()
+        # Still busy typing when the stop comes
+        time.sleep(0.05)
+        super().press(key)
+
+    def close(self):
+        self._record("close", None)
+
+
+def test_ctrl_c_closes_the_backend_after_the_worker(tmp_path, monkeypatch):
+    backend = InterruptedBackend()
+    monkeypatch.setattr(cli, "create_backend", lambda name: backend)
+    code = cli.main(["--text", "long text " * 20, "--delay", "0", "--speed", "0.05", "--cps", "1e9",
+                     "--quiet", "--db", str(tmp_path / "texts.db"),
+                     "--checkpoints", str(tmp_path / "checkpoints.json")])
+    assert code == 130
+    # A key the worker was still sending would be recorded after the close
+    time.sleep(0.1)
+    assert backend.events[-1].kind == "close"
+    assert 0 < len(backend.events) - 1 < 20
+
+
+def test_main_errors(tmp_path, capsys):
+    db = str(tmp_path / "texts.db")
+    assert cli.main(["--saved", "missing", "--db", db]) == 2
+    assert "No saved text" in capsys.readouterr().err
+    with pytest.raises(SystemExit):
+        cli.main(["--db", db])
+
+
+def test_job_priorities_and_paragraphs(tmp_path):
+    store = SavedTextStore(tmp_path / "texts.db")
+    store.save("letter", "One.\n\nTwo.\n\nThree.")
+    jobs = cli.build_jobs([{"text": "later"}, {"saved": "letter", "first": 2, "last": 2, "priority": 3},
+                           {"text": "sooner", "priority": 1}], parse(), lambda: store)
+    assert [(job.text, job.priority) for job in jobs] == [("later", 0), ("Two.", 3), ("sooner", 1)]
+    assert not jobs[1].queued
+    store.close()
@@ -0,0 +1,79 @@
+"""The clipboard handshake waits for the copy, never longer than needed"""
+
+from typing_core import TypingEngine, TypingSettings, RecordingBackend, ClipboardHandshake, paste_batch_size
+from typing_core.clipboard import FIRST_POLL_INTERVAL, MAX_POLL_INTERVAL, MAX_PASTE_BATCH
+
+
+class FakeClock:
+    """Clock that only moves when the handshake sleeps"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class SlowClipboard(RecordingBackend):
+    """The copied text shows up after ready_at on the fake clock"""
+
+    def __init__(self, clock, ready_at):
+        super().__init__()
+        self.clock = clock
+        self.ready_at = ready_at
+
+    def read_clipboard(self):
+        return self.clipboard if self.clock() >= self.ready_at else ""
+
+
+def test_waits_until_the_clipboard_holds_the_text():
+    clock = FakeClock()
+    backend = SlowClipboard(clock, 0.05)
+    handshake = ClipboardHandshake(backend, sleep=clock.sleep, clock=clock)
+    handshake.paste("نص", 0.3)
+    assert backend.typed_text() == "نص"
+    assert handshake.timeouts == 0
+    assert 0.05 <= clock.now < 0.05 + MAX_POLL_INTERVAL
+    # Polling backs off from the first interval up to the longest
+    assert clock.sleeps[0] == FIRST_POLL_INTERVAL
+    assert clock.sleeps[1] == 2 * FIRST_POLL_INTERVAL
+    assert max(clock.sleeps) == MAX_POLL_INTERVAL
+
+
+def test_pastes_anyway_after_the_timeout():
+    clock = FakeClock()
+    backend = SlowClipboard(clock, 10.0)
+    handshake = ClipboardHandshake(backend, sleep=clock.sleep, clock=clock)
+    handshake.paste("نص", 0.3)
+    assert handshake.timeouts == 1
+    assert abs(clock.now - 0.3) < 1e-9
+    assert [event.kind for event in backend.events] == ["copy", "hotkey"]
+
+
+def test_fast_clipboard_costs_no_wait():
+    clock = FakeClock()
+    handshake = ClipboardHandshake(RecordingBackend(), sleep=clock.sleep, clock=clock)
+    handshake.paste("نص", 0.3)
+    assert clock.sleeps == []
+
+
+def test_batch_size():
+    assert paste_batch_size(0, 0.05) == MAX_PASTE_BATCH
+    assert paste_batch_size(0.2, 0.05) == 1
+    assert paste_batch_size(0.01, 0.05) == 5
+    assert paste_batch_size(0.001, 0.05) == MAX_PASTE_BATCH
+
+
+def test_engine_pastes_through_the_handshake():
+    text = "مرحبا بالعالم هذا نص تجريبي"
+    backend = RecordingBackend(clipboard_latency=0.005)
+    engine = TypingEngine(backend)
+    settings = TypingSettings(delay=0, speed=0, lang_mode="arabic", arabic_word_mode="character")
+    assert engine.run(text, settings)
+    assert backend.typed_text() == text
+    assert engine.clipboard.pastes >= 1 and engine.clipboard.timeouts == 0
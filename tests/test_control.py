@@ -0,0 +1,115 @@
+"""Pause and stop wake the engine right away, whatever it waits for"""
+
+import threading
+import time
+
+import pytest
+
+from typing_core import TypingEngine, TypingSettings, RecordingBackend, RunControl, TypingStopped
+from typing_core.jobs import TypingJob, TypingWorker
+
+
+ARABIC = "مرحبا بالعالم هذا نص تجريبي"
+
+
+def in_thread(func, *args):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(func(*args)))
+    thread.start()
+    return thread, result
+
+
+def test_sleep_raises_as_soon_as_stopped():
+    control = RunControl()
+    errors = []
+
+    def sleep():
+        try:
+            control.sleep(10)
+        except TypingStopped as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=sleep)
+    start = time.perf_counter()
+    thread.start()
+    time.sleep(0.02)
+    control.stop()
+    thread.join(1)
+    assert errors and time.perf_counter() - start < 1
+
+
+def test_pause_blocks_until_resumed():
+    control = RunControl()
+    control.pause()
+    thread, result = in_thread(control.wait_while_paused)
+    time.sleep(0.05)
+    assert not result
+    control.resume()
+    thread.join(1)
+    assert result[0] >= 0.04
+
+
+def test_stopped_control_raises():
+    control = RunControl()
+    control.stop()
+    with pytest.raises(TypingStopped):
+        control.sleep(0)
+    control.reset()
+    control.sleep(0)
+
+
+def test_stop_after_begin_is_kept():
+    control = RunControl()
+    control.stop()
+    control.begin()
+    assert not control.stopped
+    control.stop()
+    # The reset at the start of the run leaves the stop alone, once
+    control.reset()
+    assert control.stopped
+    control.reset()
+    assert not control.stopped
+
+
+def test_job_stopped_while_picked_up_is_not_typed():
+    backend = RecordingBackend()
+    engine = TypingEngine(backend)
+    worker = TypingWorker(engine, on_job_start=lambda job: engine.stop())
+    job = worker.submit(TypingJob(TypingSettings(delay=0, speed=0), text="never typed"))
+    assert job.done.wait(5)
+    worker.shutdown()
+    assert job.completed is False and backend.events == []
+
+
+@pytest.mark.parametrize("settings, text", [
+    # In the countdown
+    (TypingSettings(delay=10), "text"),
+    # In a pacing wait
+    (TypingSettings(delay=0, speed=10), "text"),
+    # Waiting for a clipboard that never takes the text
+    (TypingSettings(delay=0, speed=0, lang_mode="arabic", clipboard_delay=10), ARABIC),
+])
+def test_stop_latency(settings, text):
+    engine = TypingEngine(RecordingBackend(clipboard_latency=60))
+    thread, result = in_thread(engine.run, text, settings)
+    time.sleep(0.05)
+    engine.stop()
+    thread.join(1)
+    assert result == [False]
+    assert engine.last_stop_latency < 0.05
+
+
+def test_paused_run_continues_after_resume():
+    text = "pause in the middle " * 5
+    backend = RecordingBackend()
+    engine = TypingEngine(backend)
+
+    def progress(done, total):
+        if done == 10:
+            engine.pause()
+            threading.Timer(0.1, engine.resume).start()
+
+    engine.on_progress = progress
+    assert engine.run(text, TypingSettings(delay=0, speed=0.0001))
+    assert backend.typed_text() == text
+    assert engine.last_report.paused >= 0.09
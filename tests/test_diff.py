@@ -0,0 +1,52 @@
+"""Type Changes turns the old text into the new one"""
+
+import pytest
+
+from typing_core import TypingEngine, TypingSettings, RecordingBackend
+from typing_core.diff import edit_hunks
+
+
+OLD = "The quick brown fox\njumps over the lazy dog.\nمرحبا بالعالم\n"
+
+EDITS = [
+    ("", "Hello world"),
+    ("Hello world", ""),
+    (OLD, OLD),
+    (OLD, OLD.replace("quick", "slow")),
+    (OLD, OLD.replace("lazy dog", "sleepy cat").replace("The", "A")),
+    (OLD, "Intro line\n" + OLD + "Closing line"),
+    (OLD, OLD.replace("بالعالم", "يا عالم")),
+    (OLD, OLD.replace("\n", " ")),
+    (OLD, "Something else entirely"),
+]
+
+
+@pytest.mark.parametrize("old, new", EDITS)
+@pytest.mark.parametrize("level", ["character", "word"])
+@pytest.mark.parametrize("navigation", ["arrows", "lines"])
+@pytest.mark.parametrize("speed", [0, 0.05])
+def test_retype_round_trip(old, new, level, navigation, speed):
+    settings = TypingSettings(delay=0, speed=speed, target_cps=1e9 if speed else 0, diff_level=level,
+                              diff_navigation=navigation)
+    backend = RecordingBackend()
+    assert TypingEngine(backend).retype(old, new, settings)
+    assert backend.typed_text(initial=old) == new
+
+
+def test_retype_sends_fewer_keys():
+    new = OLD.replace("quick", "slow")
+    settings = TypingSettings(delay=0, speed=0)
+    backend = RecordingBackend()
+    assert TypingEngine(backend).retype(OLD, new, settings)
+    assert len(backend.events) < len(new) // 2
+
+
+def test_edit_hunks():
+    hunks = edit_hunks("kitten sitting", "sitten kitting")
+    assert sum((a1 - a0) + (b1 - b0) for a0, a1, b0, b1 in hunks) == 4
+    assert edit_hunks("same", "same") == []
+    assert edit_hunks("one two three", "one 2 three", level="word") == [(4, 7, 4, 5)]
+    # Too far apart, the caller types the new text from scratch
+    assert edit_hunks("a" * 50, "b" * 50, max_distance=10) is None
+    with pytest.raises(ValueError):
+        edit_hunks("a", "b", level="line")
@@ -0,0 +1,148 @@
+"""Every typing mode leaves exactly its text in the window"""
+
+import pytest
+
+from typing_core import TypingEngine, TypingSettings, RecordingBackend, FileSource
+from typing_core.plan import STREAMED_TEXT_CHARS
+
+
+ENGLISH = "The quick brown fox,  jumps over\tthe lazy dog 42.\nSecond line  ends here. "
+ARABIC = "مرحبا بالعالم، هذا نص تجريبي.\nسطر ثان  هنا "
+MIXED = "Order طلب number رقم 42 is ready,  café ok.\n"
+
+# Unpaced and without the clipboard wait, so no test sleeps
+FAST = dict(delay=0, speed=0, clipboard_delay=0)
+
+MODES = {
+    "english character": (dict(lang_mode="english", english_mode="character"), ENGLISH),
+    "english word": (dict(lang_mode="english", english_mode="word"), ENGLISH),
+    "arabic character": (dict(lang_mode="arabic", arabic_word_mode="character"), ARABIC),
+    "arabic word": (dict(lang_mode="arabic", arabic_word_mode="word"), ARABIC),
+    "arabic paste whole": (dict(lang_mode="arabic", arabic_mode="paste"), ARABIC),
+    "auto english": (dict(lang_mode="auto"), ENGLISH),
+    "auto arabic": (dict(lang_mode="auto", arabic_word_mode="character"), ARABIC),
+    "auto mixed": (dict(lang_mode="auto"), MIXED),
+    "auto mixed characters": (dict(lang_mode="auto", arabic_word_mode="character"), MIXED),
+    "auto mixed words": (dict(lang_mode="auto", english_mode="word"), MIXED),
+    "auto mixed paste": (dict(lang_mode="auto", arabic_mode="paste"), MIXED),
+    "humanized": (dict(lang_mode="auto", humanize=True, seed=1), MIXED),
+    "humanized typos": (dict(lang_mode="english", humanize=True, typo_rate=0.2, seed=1), ENGLISH),
+}
+
+# Word modes type the words with one space between them, whatever
+# whitespace was there
+WORD_MODES = ("english word", "arabic word")
+
+
+def settings_for(mode, **changes):
+    options, text = MODES[mode]
+    values = dict(FAST)
+    values.update(options)
+    values.update(changes)
+    return TypingSettings(**values), text * 3
+
+
+def expected(mode, text):
+    return " ".join(text.split()) if mode in WORD_MODES else text
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_run_types_text(mode):
+    settings, text = settings_for(mode)
+    backend = RecordingBackend()
+    assert TypingEngine(backend).run(text, settings)
+    assert backend.typed_text() == expected(mode, text)
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_paced_run_types_text(mode):
+    # A rate no backend reaches: every step is paced but never waits
+    settings, text = settings_for(mode, speed=0.05, target_cps=1e9)
+    backend = RecordingBackend()
+    assert TypingEngine(backend).run(text, settings)
+    assert backend.typed_text() == expected(mode, text)
+
+
+@pytest.mark.parametrize("mode", ["english character", "english word", "arabic word",
+                                  "auto english", "auto mixed", "auto mixed paste"])
+def test_file_is_typed_block_by_block(mode, tmp_path):
+    settings, text = settings_for(mode)
+    path = tmp_path / "text.txt"
+    path.write_text(text * 50, encoding="utf-8")
+    source = FileSource(path, block_size=64)
+    backend = RecordingBackend()
+    try:
+        assert TypingEngine(backend).run_source(source, settings)
+    finally:
+        source.close()
+    assert backend.typed_text() == expected(mode, text * 50)
+
+
+@pytest.mark.parametrize("mode", ["english character", "english word", "auto mixed", "auto mixed paste"])
+@pytest.mark.parametrize("paced", [False, True])
+def test_long_text_is_streamed(mode, paced):
+    settings, text = settings_for(mode, **(dict(speed=0.05, target_cps=1e9) if paced else {}))
+    text = text * (STREAMED_TEXT_CHARS // len(text) + 2)
+    backend = RecordingBackend()
+    engine = TypingEngine(backend)
+    progress = []
+    engine.on_progress = lambda done, total: progress.append((done, total))
+    assert engine.run(text, settings)
+    assert backend.typed_text() == expected(mode, text)
+    # Never cached, progress still counts characters
+    assert len(engine.plan_cache) == 0
+    assert progress[-1] == (len(text), len(text))
+
+
+def test_arabic_paste_words():
+    # Slow speeds paste word by word
+    settings = TypingSettings(delay=0, speed=0.2, target_cps=1e9, clipboard_delay=0,
+                              lang_mode="arabic", arabic_mode="paste")
+    backend = RecordingBackend()
+    assert TypingEngine(backend).run(ARABIC, settings)
+    assert backend.typed_text() == " ".join(ARABIC.split())
+    assert sum(event.kind == "copy" for event in backend.events) > 1
+
+
+def test_arabic_is_pasted():
+    settings, text = settings_for("arabic character")
+    backend = RecordingBackend()
+    assert TypingEngine(backend).run(text, settings)
+    kinds = {event.kind for event in backend.events}
+    assert "copy" in kinds and "write" not in kinds
+
+
+def test_mixed_text_types_english_with_keys():
+    settings, text = settings_for("auto mixed")
+    backend = RecordingBackend()
+    assert TypingEngine(backend).run(text, settings)
+    pasted = "".join(event.value for event in backend.events if event.kind == "copy")
+    assert "Order" not in pasted and "طلب" in pasted and "é" in pasted
+
+
+def test_progress_and_status():
+    settings, text = settings_for("english character")
+    progress = []
+    status = []
+    engine = TypingEngine(RecordingBackend(), on_progress=lambda done, total: progress.append((done, total)),
+                          on_status=status.append)
+    assert engine.run(text, settings)
+    assert progress[0] == (0, len(text)) and progress[-1] == (len(text), len(text))
+    assert [done for done, _ in progress] == sorted(done for done, _ in progress)
+    assert status[-1].startswith("Typing completed")
+
+
+def test_stop_ends_run():
+    settings, text = settings_for("english character")
+    # Unpaced runs send long steps, stop() is seen between them
+    text = text * 20
+    backend = RecordingBackend()
+    engine = TypingEngine(backend)
+
+    def progress(done, total):
+        if done >= 10:
+            engine.stop()
+    engine.on_progress = progress
+    assert not engine.run(text, settings)
+    assert text.startswith(backend.typed_text())
+    assert 10 <= len(backend.typed_text()) < len(text)
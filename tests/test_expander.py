@@ -0,0 +1,114 @@
+"""Abbreviations typed anywhere are found and replaced by their text"""
+
+import random
+import sqlite3
+import types
+
+import pytest
+
+from typing_core import AbbreviationMatcher, AbbreviationExpander, SavedTextStore
+from typing_core import TypingEngine, TypingSettings, RecordingBackend
+
+
+def brute_force(abbreviations, typed, word_start):
+    """Longest abbreviation that typed ends with, checked the slow way"""
+    for abbreviation in sorted(abbreviations, key=len, reverse=True):
+        if not typed.endswith(abbreviation):
+            continue
+        before = typed[:-len(abbreviation)]
+        if not word_start or not before or not before[-1].isalnum():
+            return abbreviation
+    return None
+
+
+@pytest.mark.parametrize("word_start", [True, False])
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_brute_force(word_start, seed):
+    rng = random.Random(seed)
+    abbreviations = {"".join(rng.choice("ab;c") for _ in range(rng.randint(1, 4))) for _ in range(20)}
+    matcher = AbbreviationMatcher(abbreviations, word_start)
+    typed = ""
+    for _ in range(2000):
+        char = rng.choice("ab;c ")
+        match = matcher.feed(char)
+        typed += char
+        assert match == brute_force(abbreviations, typed, word_start), typed[-10:]
+        if match is not None:
+            # The expander starts over after every expansion
+            matcher.reset()
+            typed = ""
+
+
+def test_backspace_undoes_a_key():
+    matcher = AbbreviationMatcher([";sig", "btw"])
+    for char in ";sx":
+        assert matcher.feed(char) is None
+    matcher.back()
+    assert matcher.feed("i") is None
+    assert matcher.feed("g") == ";sig"
+
+
+def test_word_start():
+    matcher = AbbreviationMatcher(["btw"])
+    assert [matcher.feed(char) for char in "abtw"][-1] is None
+    matcher.reset()
+    assert [matcher.feed(char) for char in "a btw"][-1] == "btw"
+
+
+def key(name, event_type="down"):
+    return types.SimpleNamespace(name=name, event_type=event_type)
+
+
+def type_keys(expander, names):
+    for name in names:
+        expander.on_event(key(name))
+        expander.on_event(key(name, "up"))
+
+
+def test_expander_queues_matches():
+    clock = [0.0]
+    injecting = [False]
+    expander = AbbreviationExpander({";sig": "signature"}, is_injecting=lambda: injecting[0],
+                                    clock=lambda: clock[0])
+    type_keys(expander, ["shift", ";", "s", "i", "g"])
+    assert expander.drain() == [(";sig", "signature")]
+    # Shortcuts and cursor keys break the word
+    expander.on_event(key("ctrl"))
+    type_keys(expander, [";", "s"])
+    expander.on_event(key("ctrl", "up"))
+    type_keys(expander, ["i", "g", ";", "left", "s", "i", "g"])
+    assert expander.drain() == []
+    # The engine's own keys and the ones still on their way are ignored
+    injecting[0] = True
+    type_keys(expander, [";", "s", "i", "g"])
+    injecting[0] = False
+    expander.settle()
+    type_keys(expander, [";", "s", "i", "g"])
+    assert expander.drain() == []
+    clock[0] = 1.0
+    expander.update({";hi": "greeting"})
+    type_keys(expander, ["space", ";", "h", "i"])
+    assert expander.drain() == [(";hi", "greeting")]
+
+
+def test_engine_expands_in_place():
+    backend = RecordingBackend()
+    settings = TypingSettings(delay=0, speed=0.05, target_cps=1e9, humanize=True, seed=1)
+    assert TypingEngine(backend).expand(";sig", "Best regards,\nSam", settings)
+    assert backend.typed_text(initial="Thanks ;sig") == "Thanks Best regards,\nSam"
+
+
+def test_store_abbreviations(tmp_path):
+    store = SavedTextStore(tmp_path / "texts.db")
+    store.save("signature", "Best regards")
+    store.save("greeting", "Hello")
+    store.set_abbreviation("signature", ";sig")
+    # Saving the text again keeps its abbreviation
+    store.save("signature", "Kind regards")
+    assert store.abbreviation("signature") == ";sig"
+    assert store.abbreviations() == {";sig": "signature"}
+    with pytest.raises(sqlite3.IntegrityError):
+        store.set_abbreviation("greeting", ";sig")
+    store.set_abbreviation("signature", "")
+    assert store.abbreviations() == {}
+    store.close()
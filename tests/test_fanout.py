@@ -0,0 +1,60 @@
+"""One run types the same text into several windows"""
+
+import pytest
+
+from typing_core import TypingEngine, TypingSettings, RecordingBackend
+from typing_core.fanout import parse_window_ids
+
+
+ENGLISH = "The quick brown fox,  jumps over\tthe lazy dog 42.\n"
+MIXED = "Order طلب number رقم 42 is ready,  café ok.\n"
+WINDOWS = [0x1a00003, 0x1a00004, 0x1a00005]
+
+FAST = dict(delay=0, speed=0.05, target_cps=1e9, clipboard_delay=0)
+
+MODES = {
+    "english character": (dict(lang_mode="english"), ENGLISH),
+    "unpaced": (dict(lang_mode="auto", speed=0, target_cps=0), MIXED),
+    "arabic paste whole": (dict(lang_mode="arabic", arabic_mode="paste", speed=0), MIXED),
+    "auto mixed": (dict(lang_mode="auto"), MIXED),
+    "humanized typos": (dict(lang_mode="english", humanize=True, typo_rate=0.2, seed=1), ENGLISH),
+}
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_every_window_gets_the_text(mode):
+    options, text = MODES[mode]
+    values = dict(FAST)
+    values.update(options)
+    backend = RecordingBackend()
+    backend.focus(0x500)
+    assert TypingEngine(backend).fan_out(text * 3, WINDOWS, TypingSettings(**values))
+    for window in WINDOWS:
+        assert backend.typed_text(window=window) == text * 3
+    # The window that had the focus gets it back
+    assert backend.focused_window() == 0x500
+
+
+def test_clipboard_text_is_copied_once():
+    backend = RecordingBackend()
+    settings = TypingSettings(delay=0, speed=0, lang_mode="arabic", arabic_mode="paste", clipboard_delay=0)
+    assert TypingEngine(backend).fan_out("مرحبا بالعالم", WINDOWS, settings)
+    assert sum(event.kind == "copy" for event in backend.events) == 1
+    assert sum(event.kind == "hotkey" for event in backend.events) == len(WINDOWS)
+
+
+def test_bad_targets_fail_before_typing():
+    statuses = []
+    backend = RecordingBackend()
+    engine = TypingEngine(backend, on_status=statuses.append)
+    assert not engine.fan_out("text", [0x1a00003, -1], TypingSettings(delay=0, speed=0))
+    assert not engine.fan_out("text", [], TypingSettings(delay=0, speed=0))
+    assert backend.events == [] and len(statuses) == 2
+
+
+def test_parse_window_ids():
+    assert parse_window_ids("0x1a00003, 27262980;0x1a00003 ") == [0x1a00003, 27262980]
+    with pytest.raises(ValueError):
+        parse_window_ids("0x1a00003 main")
+    with pytest.raises(ValueError):
+        parse_window_ids("0")
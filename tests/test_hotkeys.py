@@ -0,0 +1,59 @@
+"""Global hotkeys become commands on a queue, our own keystrokes are ignored"""
+
+import sys
+import types
+
+import pytest
+
+from typing_core.hotkeys import HotkeyListener
+
+
+@pytest.fixture
+def keyboard(monkeypatch):
+    """Stands in for the keyboard module, sends key events to its hooks"""
+    module = types.ModuleType("keyboard")
+    module.hooks = []
+
+    def hook(callback):
+        module.hooks.append(callback)
+        return callback
+
+    def press(key):
+        for event_type in ("down", "up"):
+            for callback in list(module.hooks):
+                callback(types.SimpleNamespace(name=key, event_type=event_type))
+
+    module.hook = hook
+    module.unhook = module.hooks.remove
+    module.press = press
+    monkeypatch.setitem(sys.modules, "keyboard", module)
+    return module
+
+
+def test_presses_become_commands(keyboard):
+    stopped = []
+    listener = HotkeyListener(direct={"stop": lambda: stopped.append(True)})
+    listener.start()
+    assert len(keyboard.hooks) == 1
+    for key in ("f6", "a", "f7", "f8"):
+        keyboard.press(key)
+    # One command per press, key ups are ignored
+    assert listener.drain() == ["start", "pause", "stop"]
+    assert listener.drain() == []
+    # Direct commands run right away on the hook thread
+    assert stopped == [True]
+    listener.stop()
+    assert keyboard.hooks == []
+
+
+def test_own_keystrokes_are_skipped(keyboard):
+    injecting = [True]
+    listener = HotkeyListener(bindings={"space": "pause", "x": "start", "f8": "stop"},
+                              is_injecting=lambda: injecting[0])
+    listener.start()
+    for key in ("space", "x", "f8"):
+        keyboard.press(key)
+    assert listener.drain() == ["stop"]
+    injecting[0] = False
+    keyboard.press("space")
+    assert listener.drain() == ["pause"]
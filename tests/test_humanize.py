@@ -0,0 +1,67 @@
+"""Humanized delays keep the requested rate and typos are corrected"""
+
+import pytest
+
+from typing_core import TypingEngine, TypingSettings, RecordingBackend, HumanTiming
+from typing_core.humanize import HumanizedPlan, key_factor, NEIGHBOR_KEYS, step_text
+from typing_core.plan import PlanCache, ENGLISH_CHARACTER, PRESS, WAIT
+
+
+TEXT = "The quick brown fox jumps over the lazy dog. It was not amused! " * 30
+
+
+@pytest.mark.parametrize("distribution", ["lognormal", "gamma"])
+def test_delays_keep_the_nominal_total(distribution):
+    timing = HumanTiming(distribution=distribution, seed=3, use_numpy=False)
+    nominal = [0.05] * 500
+    factors = [key_factor(a, b) for a, b in zip(" " + TEXT[:499], TEXT[:500])]
+    delays = timing.delays(nominal, factors)
+    assert len(delays) == 500
+    assert sum(delays) == pytest.approx(sum(nominal))
+    assert min(delays) > 0 and max(delays) > 1.5 * min(delays)
+    # Same seed, same delays
+    again = HumanTiming(distribution=distribution, seed=3, use_numpy=False)
+    assert list(again.delays(nominal, factors)) == list(delays)
+    with pytest.raises(ValueError):
+        HumanTiming(distribution="uniform")
+
+
+def test_key_factors():
+    assert key_factor("t", "h") < 1.0
+    assert key_factor(" ", "q") > 1.0
+    assert key_factor(".", "I") > key_factor(" ", "i")
+    assert key_factor(None, "a") == 1.0
+
+
+def test_typos_stay_inside_their_step():
+    plan = PlanCache().get_plan(TEXT, ENGLISH_CHARACTER)
+    timing = HumanTiming(typo_rate=0.1, seed=1, use_numpy=False)
+    humanized = HumanizedPlan(plan, timing, lambda units, chars: 0.05)
+    assert len(humanized.steps) == len(plan.steps) == len(humanized.durations)
+    typos = 0
+    for (actions, chars, units), (plain, _, _) in zip(humanized.steps, plan.steps):
+        if actions != plain:
+            typos += 1
+            wrong, wait, backspace = actions[0], actions[1], actions[2]
+            assert wrong[0] == PRESS and wrong[1].lower() in NEIGHBOR_KEYS[step_text(plain).lower()]
+            assert wait[0] == WAIT and backspace == (PRESS, "backspace")
+            assert actions[4:] == plain
+    assert 0.05 * len(plan.steps) < typos < 0.15 * len(plan.steps)
+
+
+@pytest.mark.parametrize("typo_rate", [0.0, 0.3])
+def test_humanized_run(typo_rate):
+    backend = RecordingBackend()
+    settings = TypingSettings(delay=0, speed=0.05, target_cps=1e9, humanize=True, typo_rate=typo_rate, seed=2)
+    assert TypingEngine(backend).run(TEXT, settings)
+    assert backend.typed_text() == TEXT
+    backspaces = sum(event.value == "backspace" for event in backend.events)
+    assert (backspaces > 0) == (typo_rate > 0)
+
+
+def test_humanized_rate_matches_the_target():
+    backend = RecordingBackend()
+    engine = TypingEngine(backend)
+    settings = TypingSettings(delay=0, speed=0.05, target_cps=400, humanize=True, seed=5)
+    assert engine.run(TEXT[:400], settings)
+    assert 0.7 * 400 < engine.last_report.achieved_cps < 1.1 * 400
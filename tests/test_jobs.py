@@ -0,0 +1,215 @@
+"""The worker runs queued jobs one after another on one thread"""
+
+import threading
+
+import pytest
+
+from typing_core import TypingEngine, TypingSettings, RecordingBackend, SavedTextStore, CheckpointStore
+from typing_core.jobs import TypingJob, TypingWorker, saved_text_job, paragraphs, text_section
+
+
+FAST = dict(delay=0, speed=0, clipboard_delay=0)
+
+
+def test_jobs_run_in_order():
+    backend = RecordingBackend()
+    done = []
+    worker = TypingWorker(TypingEngine(backend), on_job_done=lambda job: done.append(job.name))
+    for text in ("one ", "two ", "three"):
+        worker.submit(TypingJob(TypingSettings(**FAST), text=text, name=text.strip()))
+    worker.join()
+    worker.shutdown()
+    assert backend.typed_text() == "one two three"
+    assert done == ["one", "two", "three"]
+
+
+def test_failed_job_does_not_stop_the_worker(tmp_path):
+    backend = RecordingBackend()
+    worker = TypingWorker(TypingEngine(backend))
+    missing = worker.submit(TypingJob(TypingSettings(**FAST), path=tmp_path / "missing.txt"))
+    after = worker.submit(TypingJob(TypingSettings(**FAST), text="still typed"))
+    worker.join()
+    worker.shutdown()
+    assert missing.completed is False and isinstance(missing.error, OSError)
+    assert after.completed and backend.typed_text() == "still typed"
+
+
+def test_cancel_stops_the_current_job_and_drops_the_rest():
+    backend = RecordingBackend()
+    engine = TypingEngine(backend)
+    started = threading.Event()
+    engine.on_progress = lambda done, total: started.set()
+    worker = TypingWorker(engine)
+    # Paced at 20 characters a second, so it is still typing when cancelled
+    slow = worker.submit(TypingJob(TypingSettings(delay=0, speed=0.05, target_cps=20), text="x" * 200))
+    waiting = worker.submit(TypingJob(TypingSettings(**FAST), text="never"))
+    assert started.wait(5)
+    worker.cancel()
+    assert slow.done.wait(5) and waiting.done.wait(5)
+    worker.shutdown()
+    assert slow.completed is False and waiting.completed is False
+    assert "never" not in backend.typed_text()
+
+
+BODY = "First paragraph.\n\nSecond one,\nstill second.\n  \nThird.\n\nFourth."
+
+
+def test_paragraph_sections():
+    assert paragraphs(BODY) == ["First paragraph.", "Second one,\nstill second.", "Third.", "Fourth."]
+    assert text_section(BODY) == BODY
+    assert text_section(BODY, 2, 3) == "Second one,\nstill second.\n\nThird."
+    assert text_section(BODY, last=1) == "First paragraph."
+    assert text_section(BODY, first=4) == "Fourth."
+
+
+def test_priorities_and_hold(tmp_path):
+    store = SavedTextStore(tmp_path / "texts.db")
+    for name in ("low", "high", "middle"):
+        store.save(name, name + " ")
+    backend = RecordingBackend()
+    worker = TypingWorker(TypingEngine(backend), held=True)
+    for name, priority in (("low", 0), ("high", 5), ("middle", 1)):
+        worker.submit(saved_text_job(store, name, TypingSettings(**FAST), priority=priority))
+    # Held: queued jobs wait, a direct job still runs
+    worker.submit(TypingJob(TypingSettings(**FAST), text="direct "))
+    worker.join()
+    assert backend.typed_text() == "direct "
+    assert [job.name for job in worker.jobs()] == ["high", "middle", "low"]
+    worker.release()
+    worker.join()
+    worker.shutdown()
+    assert backend.typed_text() == "direct high middle low "
+    with pytest.raises(ValueError):
+        saved_text_job(store, "missing", TypingSettings(**FAST))
+    store.close()
+
+
+def test_journal_restores_the_queue(tmp_path):
+    path = tmp_path / "texts.db"
+    store = SavedTextStore(path)
+    store.save("letter", BODY)
+    notes = tmp_path / "notes.txt"
+    notes.write_text("from a file", encoding="utf-8")
+    worker = TypingWorker(TypingEngine(RecordingBackend()), journal=store, held=True)
+    worker.submit(saved_text_job(store, "letter", TypingSettings(**FAST), 2, 3, priority=1))
+    worker.submit(TypingJob(TypingSettings(**FAST), path=str(notes), queued=True, record={"file": str(notes)}))
+    dropped = worker.submit(saved_text_job(store, "letter", TypingSettings(**FAST)))
+    assert worker.remove(dropped) and dropped.completed is False
+    worker.shutdown()
+    store.close()
+
+    # Next session
+    store = SavedTextStore(path)
+    assert len(store.jobs()) == 2
+    backend = RecordingBackend()
+    worker = TypingWorker(TypingEngine(backend), journal=store, held=True)
+    jobs = worker.restore()
+    assert [job.name for job in jobs] == ["letter (paragraphs 2-3)", str(notes)]
+    worker.release()
+    worker.join()
+    worker.shutdown()
+    assert backend.typed_text() == "Second one,\nstill second.\n\nThird.from a file"
+    # Finished jobs leave the journal
+    assert store.jobs() == []
+    store.close()
+
+
+def test_stopped_queued_job_holds_the_queue():
+    backend = RecordingBackend()
+    engine = TypingEngine(backend, checkpoints=CheckpointStore())
+    engine.on_progress = lambda done, total: done >= 500 and engine.stop()
+    worker = TypingWorker(engine)
+    text = "".join(f"line {i}\n" for i in range(300))
+    first = worker.submit(TypingJob(TypingSettings(**FAST), text=text, queued=True))
+    second = worker.submit(TypingJob(TypingSettings(**FAST), text="after", queued=True))
+    worker.join()
+    assert worker.held and [job for job in worker.jobs()] == [first, second]
+    assert not first.done.is_set() and first.resume
+    engine.on_progress = None
+    worker.release()
+    worker.join()
+    worker.shutdown()
+    assert first.completed and second.completed
+    # Picked up where it stopped
+    assert backend.typed_text() == text + "after"
+
+
+def test_new_job_ignores_an_old_checkpoint(tmp_path):
+    store = SavedTextStore(tmp_path / "texts.db")
+    text = "".join(f"line {i}\n" for i in range(300))
+    store.save("long", text)
+    backend = RecordingBackend()
+    engine = TypingEngine(backend, checkpoints=CheckpointStore())
+    engine.on_progress = lambda done, total: done >= 500 and engine.stop()
+    assert not engine.run(text, TypingSettings(**FAST))
+    assert engine.resume_point(text) is not None
+
+    engine.on_progress = None
+    backend.clear()
+    worker = TypingWorker(engine)
+    job = worker.submit(saved_text_job(store, "long", TypingSettings(**FAST)))
+    assert not job.resume
+    worker.join()
+    worker.shutdown()
+    assert job.completed and backend.typed_text() == text
+    store.close()
+
+
+def test_restored_job_resumes_only_if_it_had_started(tmp_path):
+    path = tmp_path / "texts.db"
+    store = SavedTextStore(path)
+    text = "".join(f"line {i}\n" for i in range(300))
+    store.save("long", text)
+    store.save("short", "short text")
+    checkpoints = CheckpointStore(tmp_path / "checkpoints.json")
+    engine = TypingEngine(RecordingBackend(), checkpoints=checkpoints)
+    engine.on_progress = lambda done, total: done >= 500 and engine.stop()
+    worker = TypingWorker(engine, journal=store)
+    worker.submit(saved_text_job(store, "long", TypingSettings(**FAST), priority=1))
+    worker.submit(saved_text_job(store, "short", TypingSettings(**FAST)))
+    worker.join()
+    worker.shutdown()
+    checkpoints.flush()
+    store.close()
+
+    store = SavedTextStore(path)
+    assert [record.get("resume", False) for _, record, _, _ in store.jobs()] == [True, False]
+    backend = RecordingBackend()
+    worker = TypingWorker(TypingEngine(backend, checkpoints=CheckpointStore(tmp_path / "checkpoints.json")),
+                          journal=store, held=True)
+    jobs = worker.restore()
+    assert [job.resume for job in jobs] == [True, False]
+    worker.release()
+    worker.join()
+    worker.shutdown()
+    assert all(job.completed for job in jobs)
+    # The long text continued after the 500 characters typed before the restart
+    assert backend.typed_text() == text[engine.resume_point(text).chars:] + "short text"
+    store.close()
+
+
+def test_eta():
+    settings = TypingSettings(delay=2, speed=0, target_cps=10)
+    worker = TypingWorker(TypingEngine(RecordingBackend()), held=True)
+    worker.submit(TypingJob(settings, text="x" * 50, queued=True))
+    worker.submit(TypingJob(TypingSettings(delay=0, speed=0.5), text="x" * 4, queued=True))
+    assert worker.eta() == pytest.approx(2 + 5 + 2)
+    worker.submit(TypingJob(TypingSettings(delay=0, speed=0), text="x", queued=True))
+    # No rate to go by yet
+    assert worker.eta() is None
+    worker.cancel()
+    worker.shutdown()
+
+
+def test_job_that_never_typed_has_no_report():
+    backend = RecordingBackend()
+    engine = TypingEngine(backend)
+    worker = TypingWorker(engine)
+    first = worker.submit(TypingJob(TypingSettings(**FAST), text="typed"))
+    worker.join()
+    worker.on_job_start = lambda job: engine.stop()
+    second = worker.submit(TypingJob(TypingSettings(**FAST), text="never"))
+    assert second.done.wait(5)
+    worker.shutdown()
+    assert first.report is not None and first.report.chars == 5
+    assert second.completed is False and second.report is None
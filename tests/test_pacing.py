@@ -0,0 +1,91 @@
+"""Pacing against absolute deadlines"""
+
+import pytest
+
+from typing_core import TypingEngine, TypingSettings, RecordingBackend, PacingScheduler, wpm_to_cps
+from typing_core.pacing import MAX_LAG
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def scheduler(clock, **options):
+    pacer = PacingScheduler(sleep=clock.sleep, clock=clock, **options)
+    pacer.start()
+    return pacer
+
+
+def test_backend_time_comes_out_of_the_wait():
+    clock = FakeClock()
+    pacer = scheduler(clock, unit_delay=0.5)
+    for _ in range(4):
+        clock.now += 0.3   # the backend call
+        pacer.wait(1, 1)
+    assert clock.sleeps == pytest.approx([0.2] * 4)
+    assert clock.now == pytest.approx(102.0)
+
+
+def test_target_rate_weights_steps_by_characters():
+    clock = FakeClock()
+    pacer = scheduler(clock, unit_delay=1.0, cps=10)
+    pacer.wait(1, 5)
+    pacer.wait(3, 1)
+    assert clock.sleeps == pytest.approx([0.5, 0.1])
+
+
+def test_falling_far_behind_restarts_the_schedule():
+    clock = FakeClock()
+    pacer = scheduler(clock, unit_delay=0.1)
+    clock.now += MAX_LAG + 1
+    pacer.wait(1, 1)
+    # No burst of unpaced steps to make up for the stall
+    pacer.wait(1, 1)
+    assert clock.sleeps == pytest.approx([0.1])
+
+
+def test_catch_up_makes_up_for_a_stall():
+    clock = FakeClock()
+    pacer = scheduler(clock, unit_delay=0.1, catch_up=True)
+    clock.now += MAX_LAG + 1
+    for _ in range(10):
+        pacer.wait(1, 1)
+    assert clock.sleeps == []
+
+
+def test_pauses_move_the_deadline_and_the_report():
+    clock = FakeClock()
+    pacer = scheduler(clock, unit_delay=0.5)
+    clock.now += 2.0
+    pacer.add_pause(2.0)
+    pacer.wait(1, 1)
+    assert clock.sleeps == pytest.approx([0.5])
+    report = pacer.report(1)
+    assert report.paused == pytest.approx(2.0)
+    assert report.elapsed == pytest.approx(0.5)
+    assert report.achieved_cps == pytest.approx(2.0)
+    assert report.requested_cps == pytest.approx(2.0)
+
+
+def test_wpm():
+    assert wpm_to_cps(60) == pytest.approx(5.0)
+
+
+def test_engine_meets_the_target_rate():
+    backend = RecordingBackend()
+    engine = TypingEngine(backend)
+    text = "paced text " * 6
+    assert engine.run(text, TypingSettings(delay=0, target_cps=300))
+    report = engine.last_report
+    assert report.requested_cps == 300
+    assert 0.7 * 300 < report.achieved_cps < 1.05 * 300
+    assert backend.typed_text() == text
@@ -0,0 +1,80 @@
+"""Compiled plans and the plan cache"""
+
+from typing_core import TypingEngine, TypingSettings, RecordingBackend, PlanCache, compile_plan
+from typing_core.plan import (ENGLISH_CHARACTER, ENGLISH_WORD, ARABIC_CHARACTER, ARABIC_WORD, ARABIC_PASTE_WHOLE,
+                              COALESCED_STEP_CHARS, STREAMED_TEXT_CHARS, PRESS, WRITE, PASTE)
+
+
+TEXT = "Hello world, this is plain text.\nAnd a second line. " * 20
+
+
+def test_paced_plan_has_a_step_per_character():
+    plan = compile_plan(TEXT, ENGLISH_CHARACTER)
+    assert len(plan.steps) == len(TEXT)
+    assert sum(chars for _, chars, _ in plan.steps) == plan.total_chars == len(TEXT)
+    assert plan.steps[5] == (((PRESS, 'space'),), 1, 1)
+
+
+def test_unpaced_plan_coalesces_writes():
+    plan = compile_plan(TEXT, ENGLISH_CHARACTER, coalesce=True)
+    assert sum(chars for _, chars, _ in plan.steps) == len(TEXT)
+    assert len(plan.steps) <= len(TEXT) // COALESCED_STEP_CHARS + 1
+    # Only the newlines are separate key presses
+    assert plan.action_count() <= 2 * TEXT.count("\n") + len(plan.steps)
+    assert all(op in (WRITE, PRESS) for actions, _, _ in plan.steps for op, _ in actions)
+
+
+def test_word_plan():
+    plan = compile_plan("one two  three", ENGLISH_WORD)
+    assert [actions for actions, _, _ in plan.steps] == [
+        ((WRITE, "one"), (PRESS, "space")), ((WRITE, "two"), (PRESS, "space")), ((WRITE, "three"),)]
+
+
+def test_arabic_plans_paste():
+    text = "مرحبا بالعالم"
+    assert compile_plan(text, ARABIC_PASTE_WHOLE).steps == ((((PASTE, text),), len(text), 1),)
+    plan = compile_plan(text, ARABIC_CHARACTER)
+    assert plan.steps[5] == (((PRESS, 'space'),), 1, 1)
+    # Unpaced, the spaces go into the same paste
+    plan = compile_plan(text, ARABIC_CHARACTER, coalesce=True)
+    assert plan.steps == ((((PASTE, text),), len(text), len(text)),)
+
+
+def test_word_pastes_are_batched():
+    plan = compile_plan("a b c d e", ARABIC_WORD, paste_batch=2)
+    assert [(actions[0], units) for actions, _, units in plan.steps] == [
+        ((PASTE, "a b"), 2), ((PASTE, "c d"), 2), ((PASTE, "e"), 1)]
+
+
+def test_cache_reuses_plans():
+    cache = PlanCache(max_plans=2)
+    first = cache.get_plan("abc", ENGLISH_CHARACTER)
+    assert cache.get_plan("abc", ENGLISH_CHARACTER) is first
+    assert cache.get_plan("abc", ENGLISH_CHARACTER, coalesce=True) is not first
+    cache.get_plan("def", ENGLISH_CHARACTER)
+    # The least recently used plan went
+    assert len(cache) == 2 and cache.get_plan("abc", ENGLISH_CHARACTER) is not first
+    assert cache.hits == 1 and cache.misses == 4
+
+
+def test_engine_compiles_once():
+    engine = TypingEngine(RecordingBackend())
+    settings = TypingSettings(delay=0, speed=0)
+    for _ in range(3):
+        assert engine.run(TEXT, settings)
+    assert engine.plan_cache.misses == 1 and engine.plan_cache.hits == 2
+    assert engine.backend.typed_text() == TEXT * 3
+
+
+def test_plan_cache_bounds():
+    cache = PlanCache(max_plans=4, max_chars=1000)
+    for i in range(10):
+        cache.get_plan(f"text {i} " * 20, ENGLISH_CHARACTER)
+        assert len(cache) <= 4 and cache.chars <= 1000
+    cache.get_plan("x" * 2000, ENGLISH_CHARACTER)
+    assert cache.chars <= 1000
+    plan = cache.get_plan("text 9 " * 20, ENGLISH_CHARACTER)
+    assert cache.hits == 1 and plan.total_chars == 140
+    cache = PlanCache()
+    cache.get_plan("y" * (STREAMED_TEXT_CHARS + 1), ENGLISH_CHARACTER)
+    assert len(cache) == 0 and cache.chars == 0
@@ -0,0 +1,137 @@
+"""The process engine types in a worker process and survives its crash"""
+
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+
+import pytest
+
+from typing_core import TypingEngine, TypingSettings, ProcessEngine
+from typing_core.process import _serve
+from typing_core.jobs import TypingJob, TypingWorker
+from typing_core.sources import StreamSource
+
+
+TEXT = "Typed in another process, نص عربي. " * 20
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = ProcessEngine("recording", checkpoint_path=tmp_path / "checkpoints.json")
+    yield engine
+    engine.close()
+
+
+def test_run_and_report(engine):
+    progress = []
+    engine.on_progress = lambda done, total: progress.append((done, total))
+    assert engine.run(TEXT, TypingSettings(delay=0, speed=0))
+    assert engine.last_report.chars == len(TEXT)
+    assert engine.chars_typed == len(TEXT) and engine.last_text == TEXT
+    assert progress[-1] == (len(TEXT), len(TEXT))
+    with pytest.raises(ValueError):
+        engine.run_source(StreamSource(None), TypingSettings(delay=0, speed=0))
+
+
+def test_stop_and_resume(engine):
+    # Paced at 500 characters a second, so there is time to stop it
+    settings = TypingSettings(delay=0, speed=0.05, target_cps=500)
+    engine.on_progress = lambda done, total: done >= 100 and engine.stop()
+    assert not engine.run(TEXT, settings)
+    assert engine.stopped and engine.last_stop_latency is not None
+    checkpoint = engine.resume_point(TEXT)
+    assert checkpoint is not None and 100 <= checkpoint.chars < len(TEXT)
+
+    engine.on_progress = None
+    assert engine.run(TEXT, TypingSettings(delay=0, speed=0), resume=True)
+    assert engine.last_report.chars == len(TEXT) - checkpoint.chars
+    assert engine.resume_point(TEXT) is None
+
+
+def test_crash_fails_the_run_and_restarts(engine):
+    statuses = []
+    engine.on_status = statuses.append
+    settings = TypingSettings(delay=0, speed=0.05, target_cps=200)
+    assert engine.run("warm up", TypingSettings(delay=0, speed=0))
+    timer = threading.Timer(0.2, lambda: engine._process.kill())
+    timer.start()
+    assert not engine.run(TEXT, settings)
+    timer.join()
+    assert any("stopped unexpectedly" in status for status in statuses)
+    assert engine.run("after the crash", TypingSettings(delay=0, speed=0))
+    assert engine.restarts == 1
+
+
+def test_job_stopped_while_picked_up_is_skipped(engine):
+    engine.start()
+    worker = TypingWorker(engine, on_job_start=lambda job: engine.stop())
+    job = worker.submit(TypingJob(TypingSettings(delay=0, speed=0), text=TEXT))
+    assert job.done.wait(10)
+    worker.shutdown()
+    assert job.completed is False and engine.chars_typed == 0
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="needs SIGSTOP and /proc")
+def test_hung_worker_reads_as_no_checkpoint(engine, monkeypatch):
+    monkeypatch.setattr("typing_core.process.REPLY_TIMEOUT", 0.2)
+    settings = TypingSettings(delay=0, speed=0.05, target_cps=500)
+    engine.on_progress = lambda done, total: done >= 100 and engine.stop()
+    assert not engine.run(TEXT, settings)
+    pid = engine._process.pid
+    os.kill(pid, signal.SIGSTOP)
+    # The signal takes effect asynchronously
+    deadline = time.monotonic() + 2
+    while "(stopped)" not in open(f"/proc/{pid}/status").read() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    try:
+        assert engine.resume_point(TEXT) is None
+    finally:
+        os.kill(pid, signal.SIGCONT)
+    # The late answer is not taken for the next query's
+    assert engine.resume_point("other text") is None
+    assert engine.resume_point(TEXT) is not None
+
+
+def test_stop_that_arrives_as_the_job_starts_is_kept(monkeypatch):
+    # The worker's main loop on a thread of this process, the stop for the
+    # job arrives just before the engine starts the run
+    parent, child = multiprocessing.Pipe()
+    monkeypatch.setattr(signal, "signal", lambda *args: None)
+    run = TypingEngine._run
+
+    def run_after_stop(engine, *args, **kwargs):
+        parent.send(("stop", 1))
+        deadline = time.monotonic() + 5
+        while not engine.control.stopped and time.monotonic() < deadline:
+            time.sleep(0.001)
+        return run(engine, *args, **kwargs)
+
+    monkeypatch.setattr(TypingEngine, "_run", run_after_stop)
+    server = threading.Thread(target=_serve, args=(child, "recording", None), daemon=True)
+    server.start()
+    assert parent.recv()[0] == "ready"
+    parent.send(("run", 1, "text", TEXT, TypingSettings(delay=0, speed=0), False))
+    while True:
+        message = parent.recv()
+        if message[0] == "done":
+            break
+    parent.send(("close",))
+    server.join(5)
+    assert message[1] == 1 and message[2] is False and message[-1] == 0
+
+
+def test_resume_point_never_starts_the_process(engine):
+    assert engine.resume_point(TEXT) is None
+    assert engine._process is None
+
+    settings = TypingSettings(delay=0, speed=0.05, target_cps=500)
+    engine.on_progress = lambda done, total: done >= 100 and engine.stop()
+    assert not engine.run(TEXT, settings)
+    checkpoint = engine.resume_point(TEXT)
+    engine.close()
+    # Read from the checkpoint file the process left behind
+    assert engine.resume_point(TEXT).as_dict() == checkpoint.as_dict()
+    assert engine._process is None
@@ -0,0 +1,84 @@
+"""A stopped run resumes where it stopped"""
+
+import pytest
+
+from typing_core import TypingEngine, TypingSettings, RecordingBackend, CheckpointStore, FileSource
+from typing_core.checkpoint import Checkpoint
+
+
+TEXT = "Resume me where I stopped, طلب رقم 42. " * 40
+
+
+def stop_after(engine, chars):
+    def progress(done, total):
+        if done >= chars:
+            engine.stop()
+    engine.on_progress = progress
+
+
+@pytest.mark.parametrize("options", [dict(speed=0), dict(speed=0.05, target_cps=1e9),
+                                     dict(speed=0.05, target_cps=1e9, arabic_mode="paste")])
+def test_resume_text(options, tmp_path):
+    settings = TypingSettings(delay=0, **options)
+    backend = RecordingBackend()
+    engine = TypingEngine(backend, checkpoints=CheckpointStore(tmp_path / "checkpoints.json"))
+    stop_after(engine, len(TEXT) // 3)
+    assert not engine.run(TEXT, settings)
+    assert engine.resume_point(TEXT) is not None
+
+    # A new session reads the checkpoint back from the file
+    engine = TypingEngine(backend, checkpoints=CheckpointStore(tmp_path / "checkpoints.json"))
+    assert engine.run(TEXT, settings, resume=True)
+    assert backend.typed_text() == TEXT
+    assert engine.resume_point(TEXT) is None
+
+
+def test_resume_file(tmp_path):
+    path = tmp_path / "text.txt"
+    path.write_text(TEXT * 20, encoding="utf-8")
+    settings = TypingSettings(delay=0, speed=0.05, target_cps=1e9)
+    backend = RecordingBackend()
+    engine = TypingEngine(backend, checkpoints=CheckpointStore())
+    stop_after(engine, len(TEXT) * 5)
+    source = FileSource(path, block_size=256)
+    try:
+        assert not engine.run_source(source, settings)
+    finally:
+        source.close()
+    engine.on_progress = None
+    source = FileSource(path, block_size=256)
+    try:
+        assert engine.run_source(source, settings, resume=True)
+    finally:
+        source.close()
+    assert backend.typed_text() == TEXT * 20
+
+
+def test_checkpoints_survive_a_reopen(tmp_path):
+    clock = [0.0]
+    path = tmp_path / "checkpoints.json"
+    store = CheckpointStore(path, flush_interval=2.0, clock=lambda: clock[0], max_checkpoints=2)
+    checkpoint = Checkpoint("text:a", "a", "english_character", False, 1)
+    store.begin(checkpoint)
+    checkpoint.step, checkpoint.chars = 5, 7
+    store.maybe_flush()
+    # Not written before the interval has passed
+    assert not path.exists()
+    clock[0] = 2.0
+    store.maybe_flush()
+    assert CheckpointStore(path).get("text:a").as_dict() == checkpoint.as_dict()
+
+    # The oldest checkpoint goes first
+    store.begin(Checkpoint("text:b", "b", "english_character", False, 1))
+    store.begin(Checkpoint("text:c", "c", "english_character", False, 1))
+    store.flush()
+    reopened = CheckpointStore(path)
+    assert len(reopened) == 2 and reopened.get("text:a") is None
+    store.discard("text:b")
+    assert CheckpointStore(path).get("text:b") is None
+
+
+def test_damaged_file_is_ignored(tmp_path):
+    path = tmp_path / "checkpoints.json"
+    path.write_text("{not json")
+    assert len(CheckpointStore(path)) == 0
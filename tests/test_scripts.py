@@ -0,0 +1,35 @@
+"""Script segmentation of mixed text"""
+
+import pytest
+
+from typing_core import contains_arabic, segment_scripts
+from typing_core.scripts import ASCII, RTL, OTHER
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "plain ASCII only",
+    "مرحبا بالعالم",
+    "Order طلب number رقم 42 is ready.",
+    "café – naïve “quotes” 😀 and שלום",
+    "ﻣﺮﺣﺒﺎ presentation forms",
+])
+def test_runs_join_back(text):
+    assert "".join(run for _, run in segment_scripts(text)) == text
+
+
+def test_right_to_left_runs_keep_their_spaces():
+    assert segment_scripts("Hi مرحبا بالعالم, bye") == [
+        (ASCII, "Hi "), (RTL, "مرحبا بالعالم"), (ASCII, ", bye")]
+
+
+def test_other_scripts():
+    assert segment_scripts("naïve") == [(ASCII, "na"), (OTHER, "ï"), (ASCII, "ve")]
+    assert segment_scripts("שלום") == [(RTL, "שלום")]
+
+
+def test_contains_arabic():
+    assert contains_arabic("text with ب")
+    # Supplement and presentation forms too
+    assert contains_arabic("ݐ") and contains_arabic("ﻻ")
+    assert not contains_arabic("café שלום")
@@ -0,0 +1,38 @@
+"""TypingSettings are read-only snapshots that round-trip through JSON"""
+
+import json
+import pickle
+
+import pytest
+
+from typing_core import TypingSettings
+
+
+def test_settings_are_read_only():
+    settings = TypingSettings(speed=0.1)
+    with pytest.raises(AttributeError):
+        settings.speed = 0
+    with pytest.raises(AttributeError):
+        settings.anything = 1
+    with pytest.raises(AttributeError):
+        del settings.delay
+
+
+def test_replace_copies():
+    settings = TypingSettings(speed=0.1, lang_mode="arabic")
+    faster = settings.replace(speed=0.01)
+    assert faster.speed == 0.01 and faster.lang_mode == "arabic"
+    assert settings.speed == 0.1 and faster != settings
+    with pytest.raises(TypeError):
+        settings.replace(sped=1)
+
+
+def test_dict_json_and_pickle_round_trip():
+    settings = TypingSettings(delay=1, target_cps=40, humanize=True, seed=7, diff_level="word")
+    values = json.loads(json.dumps(settings.as_dict()))
+    assert TypingSettings.from_dict(values) == settings
+    # Keys written by a newer version are ignored
+    values["added_later"] = True
+    assert TypingSettings.from_dict(values) == settings
+    copy = pickle.loads(pickle.dumps(settings))
+    assert copy == settings and hash(copy) == hash(settings)
@@ -0,0 +1,74 @@
+"""Files and pipes are decoded block by block"""
+
+import io
+
+import pytest
+
+from typing_core import TypingEngine, TypingSettings, RecordingBackend, FileSource, StreamSource
+
+
+TEXT = "a" + "Order طلب number رقم 42.\n" + "é€\U0001f600" + "سطر ثان  هنا "
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_characters_split_across_blocks(size):
+    # Two to four byte characters cut at every possible place
+    source = StreamSource(io.BytesIO(TEXT.encode("utf-8")), block_size=size)
+    assert "".join(source.blocks()) == TEXT
+    assert source.bytes_read == len(TEXT.encode("utf-8"))
+    assert source.size == 0 and source.contains_arabic() is None
+
+
+def test_file_source(tmp_path):
+    path = tmp_path / "text.txt"
+    path.write_bytes(b"\xef\xbb\xbf" + TEXT.encode("utf-8"))
+    source = FileSource(path, block_size=5)
+    try:
+        assert source.size == path.stat().st_size
+        assert source.contains_arabic()
+        # The byte order mark is dropped
+        assert "".join(source.blocks()) == TEXT
+        assert source.bytes_read == source.size
+    finally:
+        source.close()
+
+
+@pytest.mark.parametrize("text, arabic", [
+    ("plain English, café, €5 and \U0001f600", False),
+    ("שלום and Ελληνικά", False),
+    ("one word: سلام", True),
+    ("presentation form ﻻ", True),
+    ("", False),
+])
+def test_file_arabic_detection(text, arabic, tmp_path):
+    path = tmp_path / "text.txt"
+    path.write_text(text, encoding="utf-8")
+    source = FileSource(path)
+    try:
+        assert source.contains_arabic() is arabic
+    finally:
+        source.close()
+
+
+@pytest.mark.parametrize("bom", [False, True])
+def test_file_progress_counts_typed_bytes(bom, tmp_path):
+    line = "Progress of a file, مع نص عربي.\n"
+    text = line * (40000 // len(line.encode("utf-8")))
+    path = tmp_path / "text.txt"
+    path.write_bytes((b"\xef\xbb\xbf" if bom else b"") + text.encode("utf-8"))
+    progress = []
+    engine = TypingEngine(RecordingBackend(), on_progress=lambda done, total: progress.append((done, total)))
+    source = FileSource(path)
+    try:
+        settings = TypingSettings(delay=0, speed=0.05, target_cps=1e9, lang_mode="auto", arabic_word_mode="character")
+        assert engine.run_source(source, settings)
+    finally:
+        source.close()
+    size = path.stat().st_size
+    done = [done for done, total in progress if done]
+    # One step in, a file read ahead by a whole block reports only what was typed
+    assert 0 < done[0] <= 3
+    assert done == sorted(done) and progress[-1] == (size, size)
+    # Halfway through the characters is halfway through the bytes
+    middle = done[len(done) // 2]
+    assert abs(middle - size / 2) < 0.05 * size
@@ -0,0 +1,40 @@
+"""Heavy modules stay off the import path of the GUI and the engine"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Records every attempt to import a deferred module, installed or not
+CHILD = r"""
+import sys
+
+DEFERRED = ("pyautogui", "keyboard", "pyperclip")
+attempts = []
+
+class Recorder:
+    def find_spec(self, name, path=None, target=None):
+        if name.split(".")[0] in DEFERRED:
+            attempts.append(name)
+        return None
+
+sys.meta_path.insert(0, Recorder())
+import {module}
+print(",".join(sorted(set(attempts))))
+"""
+
+
+@pytest.mark.parametrize("module", ["auto_typer", "typing_core", "typing_core.cli"])
+def test_import_defers_heavy_modules(module):
+    try:
+        import tkinter  # noqa: F401
+    except ImportError:
+        if module == "auto_typer":
+            pytest.skip("tkinter is not available")
+    result = subprocess.run([sys.executable, "-c", CHILD.replace("{module}", module)],
+                            cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
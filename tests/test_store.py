@@ -0,0 +1,71 @@
+"""Saved texts in SQLite"""
+
+import json
+import threading
+
+import pytest
+
+from typing_core import SavedTextStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SavedTextStore(tmp_path / "texts.db")
+    yield store
+    store.close()
+
+
+def test_save_get_delete(store):
+    store.save("greeting", "Hello")
+    store.save("arabic", "مرحبا")
+    assert store.get("greeting") == "Hello" and store.get("arabic") == "مرحبا"
+    assert sorted(store.names()) == ["arabic", "greeting"] and len(store) == 2
+    store.save("greeting", "Hello again")
+    assert store.get("greeting") == "Hello again" and len(store) == 2
+    store.delete("greeting")
+    assert "greeting" not in store and store.get("greeting") is None
+    assert store.items() == [("arabic", "مرحبا")]
+
+
+def test_texts_survive_a_reopen(tmp_path):
+    store = SavedTextStore(tmp_path / "texts.db")
+    store.save("kept", "body")
+    store.close()
+    store = SavedTextStore(tmp_path / "texts.db")
+    assert store.get("kept") == "body"
+    store.close()
+
+
+def test_migrate_json_once(store, tmp_path):
+    legacy = tmp_path / "auto_typer_config.json"
+    legacy.write_text(json.dumps({"one": "first", "two": "ثاني"}), encoding="utf-8")
+    store.save("one", "edited since")
+    assert store.migrate_json(legacy) == 2
+    # An existing text is not overwritten by the old file
+    assert store.get("one") == "edited since" and store.get("two") == "ثاني"
+    assert not legacy.exists() and (tmp_path / "auto_typer_config.json.migrated").exists()
+    assert store.migrate_json(legacy) == 0
+
+
+def test_saves_from_threads(store):
+    def save(prefix):
+        for i in range(50):
+            store.save(f"{prefix}{i}", str(i))
+
+    threads = [threading.Thread(target=save, args=(prefix,)) for prefix in "abcd"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(store) == 200 and store.get("c42") == "42"
+
+
+def test_profiles(store):
+    assert store.profile_names() == [] and store.profile("fast") is None
+    store.save_profile("fast", {"speed": 0, "theme": "dark"})
+    store.save_profile("careful", {"speed": 0.2})
+    store.save_profile("fast", {"speed": 0.01})
+    assert store.profile_names() == ["careful", "fast"]
+    assert store.profile("fast") == {"speed": 0.01}
+    store.delete_profile("careful")
+    assert store.profile_names() == ["fast"]
@@ -0,0 +1,66 @@
+"""Latency histograms and the timing report of instrumented runs"""
+
+import json
+import random
+
+import pytest
+
+from typing_core import TypingEngine, TypingSettings, RecordingBackend, LatencyHistogram
+from typing_core import cli
+
+
+def test_percentiles_within_bucket_precision():
+    rng = random.Random(0)
+    values = [rng.lognormvariate(-7, 1.5) for _ in range(5000)]
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    values.sort()
+    for percent in (1, 50, 90, 99, 100):
+        exact = values[max(0, -(-len(values) * percent // 100) - 1)]
+        # Upper bound of a bucket that is at most 12.5% wide, plus 1 us resolution
+        assert exact - 1e-6 <= histogram.percentile(percent) <= exact * 1.125 + 1e-6
+    assert histogram.count == 5000 and histogram.max == values[-1]
+    assert histogram.as_dict()["mean"] == pytest.approx(sum(values) / len(values))
+
+
+def test_empty_and_tiny_values():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) == 0.0
+    histogram.record(0)
+    histogram.record(-1e-3)
+    histogram.record(3e-6)
+    assert histogram.percentile(50) == 0.0
+    assert histogram.percentile(100) == pytest.approx(3e-6)
+
+
+def test_instrumented_run_reports_operations():
+    backend = RecordingBackend()
+    engine = TypingEngine(backend)
+    settings = TypingSettings(delay=0, speed=0.05, target_cps=1e9, clipboard_delay=0, instrument=True)
+    assert engine.run("Hello مرحبا\nworld", settings)
+    report = engine.last_telemetry
+    operations = report.operations
+    # One paced step per English character and the newline
+    assert operations["press"]["count"] == len("Hello \nworld")
+    assert operations["copy"]["count"] >= 1 and operations["paste_hotkey"]["count"] >= 1
+    assert operations["progress"]["count"] > 0
+    assert report.as_dict()["pacing"]["chars"] == len("Hello مرحبا\nworld")
+    assert json.loads(report.to_json())["operations"]["press"] == operations["press"]
+    assert "paste_hotkey" in report.format()
+
+
+def test_normal_run_has_no_report():
+    engine = TypingEngine(RecordingBackend())
+    assert engine.run("Hello", TypingSettings(delay=0, speed=0))
+    assert engine.last_telemetry is None
+
+
+def test_cli_writes_reports(tmp_path, monkeypatch):
+    monkeypatch.setattr(cli, "create_backend", lambda name: RecordingBackend())
+    path = tmp_path / "report.json"
+    assert cli.main(["--text", "one", "--text", "two", "--delay", "0", "--speed", "0",
+                     "--quiet", "--report", str(path), "--db", str(tmp_path / "texts.db")]) == 0
+    reports = json.loads(path.read_text())
+    assert [report["name"] for report in reports] == ["text", "text"]
+    assert all(report["completed"] and report["operations"]["write"]["count"] for report in reports)
@@ -0,0 +1,77 @@
+"""Search over saved text names and bodies"""
+
+import random
+
+from typing_core import TextIndex, normalize
+from typing_core.text_index import body_words
+
+
+def index_of(texts):
+    index = TextIndex()
+    for name, body in texts.items():
+        index.add(name, body)
+    return index
+
+
+TEXTS = {
+    "Meeting notes": "Agenda for Monday, budget review and hiring.",
+    "Signature": "Best regards,\nSam",
+    "رسالة ترحيب": "مرحبا بكم في الشركة، نتمنى لكم يوما سعيدا",
+    "Invoice reply": "Thanks for the invoice, payment is scheduled.",
+}
+
+
+def test_names_by_substring():
+    index = index_of(TEXTS)
+    assert index.search("note") == ["Meeting notes"]
+    assert index.search("SIG") == ["Signature"]
+    assert index.search("in") == ["Invoice reply", "Meeting notes"]
+    assert index.search("") == sorted(TEXTS)
+
+
+def test_bodies_by_word_prefix():
+    index = index_of(TEXTS)
+    assert index.search("budg") == ["Meeting notes"]
+    assert index.search("invoice payment") == ["Invoice reply"]
+    assert index.search("payment budget") == []
+    # Too short to search bodies with
+    assert index.search("b") == []
+
+
+def test_arabic_folding_and_article():
+    index = index_of(TEXTS)
+    # Without diacritics and with the article dropped
+    assert index.search("شركة") == ["رسالة ترحيب"]
+    assert index.search("مرحبًا") == ["رسالة ترحيب"]
+    assert normalize("إلى") == normalize("الي")
+
+
+def test_arabic_proclitics():
+    index = index_of({"Greeting": "بالعالم والكتاب"})
+    for query in ["العالم", "عالم", "كتاب", "الكتاب", "بالعالم"]:
+        assert index.search(query) == ["Greeting"], query
+    assert body_words("وقت") == {"وقت"}
+
+
+def test_updates_touch_only_one_text():
+    index = index_of(TEXTS)
+    index.set_body("Signature", "Kind regards")
+    assert index.search("best") == []
+    assert index.search("kind") == ["Signature"]
+    assert index.remove("Signature") == 2
+    assert index.search("kind") == [] and "Signature" not in index
+    assert index.remove("Signature") is None
+    assert index.add("Another") == 0
+
+
+def test_matches_a_plain_scan():
+    rng = random.Random(0)
+    words = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta"]
+    texts = {f"text {i} {rng.choice(words)}": " ".join(rng.choice(words) for _ in range(5))
+             for i in range(200)}
+    index = index_of(texts)
+    for query in ["alp", "gamma", "text 1", "eps zet", "delta beta"]:
+        expected = sorted(name for name, body in texts.items()
+                          if query in name.casefold()
+                          or all(any(word.startswith(part) for word in body.split()) for part in query.split()))
+        assert index.search(query) == expected, query
@@ -0,0 +1,45 @@
+"""The UI channel keeps only the latest progress and every event in order"""
+
+import threading
+
+from typing_core.ui_channel import UIUpdateChannel
+
+
+def test_progress_is_coalesced():
+    channel = UIUpdateChannel()
+    for done in range(1000):
+        channel.post_progress(done, 1000)
+    progress, events = channel.drain()
+    assert progress == (999, 1000) and events == []
+    assert channel.progress_posts == 1000
+    assert channel.drain() == (None, [])
+
+
+def test_events_keep_their_order():
+    channel = UIUpdateChannel()
+    channel.post_status("Starting")
+    channel.post_progress(1, 2)
+    channel.post_event("done", True)
+    channel.post_status("Typing completed")
+    assert channel.drain() == ((1, 2), [("status", "Starting"), ("done", True),
+                                        ("status", "Typing completed")])
+
+
+def test_posts_from_threads_are_not_lost():
+    channel = UIUpdateChannel()
+
+    def post(name):
+        for i in range(500):
+            channel.post_event(name, i)
+
+    threads = [threading.Thread(target=post, args=(name,)) for name in "abcd"]
+    for thread in threads:
+        thread.start()
+    events = []
+    while any(thread.is_alive() for thread in threads):
+        events += channel.drain()[1]
+    for thread in threads:
+        thread.join()
+    events += channel.drain()[1]
+    for name in "abcd":
+        assert [i for kind, i in events if kind == name] == list(range(500))
@@ -0,0 +1,33 @@
+"""Typing core used by the Auto Typer GUI
+
+Everything in this package runs without a display, the Tk app only builds
+settings, picks a backend and drives the engine.
+"""
+
+from .backends import (
+    OutputBackend,
+    PyAutoGUIBackend,
+    ClipboardPasteBackend,
+    XTestBackend,
+    RecordingBackend,
+    BackendEvent,
+    create_backend,
+    default_backend,
+)
+from .checkpoint import Checkpoint, CheckpointStore, text_key
+from .clipboard import ClipboardHandshake, paste_batch_size
+from .control import RunControl, TypingStopped
+from .diff import compile_edit, edit_hunks
+from .engine import TypingEngine, TypingSettings
+from .expander import AbbreviationMatcher, AbbreviationExpander
+from .fanout import FanOutPlan, parse_window_id, parse_window_ids
+from .humanize import HumanTiming, HumanizedPlan
+from .jobs import TypingJob, TypingWorker
+from .pacing import PacingScheduler, PacingReport, wpm_to_cps
+from .process import ProcessEngine, TypingProcessError
+from .plan import KeystrokePlan, StreamingPlan, PlanCache, compile_plan, select_strategy
+from .scripts import contains_arabic, segment_scripts
+from .sources import TextSource, FileSource, StringSource, StreamSource
+from .store import SavedTextStore
+from .telemetry import Telemetry, TelemetryReport, LatencyHistogram
+from .text_index import TextIndex, normalize
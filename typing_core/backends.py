@@ -0,0 +1,641 @@
+import atexit
+import os
+import sys
+import time
+from collections import OrderedDict, namedtuple
+
+from .clipboard import ClipboardHandshake
+
+
+# One entry in a RecordingBackend log: seconds since the backend was
+# created, the kind of call ("press", "write", "hotkey", "copy", "focus") and
+# its value
+BackendEvent = namedtuple("BackendEvent", "time kind value")
+
+# Keys that RecordingBackend.typed_text() turns back into characters
+SPECIAL_KEY_TEXT = {"space": " ", "enter": "\n", "tab": "\t"}
+
+# pyautogui key names that differ from X keysym names
+X_KEY_NAMES = {
+    "enter": "Return", "return": "Return", "tab": "Tab", "space": "space",
+    "backspace": "BackSpace", "esc": "Escape", "escape": "Escape", "delete": "Delete",
+    "del": "Delete", "insert": "Insert", "home": "Home", "end": "End",
+    "pageup": "Prior", "pagedown": "Next", "up": "Up", "down": "Down",
+    "left": "Left", "right": "Right", "ctrl": "Control_L", "ctrlleft": "Control_L",
+    "ctrlright": "Control_R", "shift": "Shift_L", "shiftleft": "Shift_L",
+    "shiftright": "Shift_R", "alt": "Alt_L", "altleft": "Alt_L", "altright": "Alt_R",
+    "win": "Super_L", "winleft": "Super_L", "command": "Super_L", "capslock": "Caps_Lock",
+}
+
+# Keysyms of the control characters write() may be given
+X_CONTROL_KEYSYMS = {"\n": 0xFF0D, "\r": 0xFF0D, "\t": 0xFF09, "\b": 0xFF08}
+
+# Characters queued before XTestBackend flushes them to the X server and
+# checks for stop()
+XTEST_FLUSH_CHARS = 32
+
+# Seconds applications get to pick up a changed keyboard mapping before a
+# key event depends on it
+REMAP_SETTLE = 0.02
+
+# Xlib constants for focusing windows
+X_REVERT_TO_PARENT = 2
+X_CURRENT_TIME = 0
+X_POINTER_ROOT = 1
+X_IS_VIEWABLE = 2
+X_SET_INPUT_FOCUS = 42
+
+# Errors the X server reported, per display, see _x_error_handler()
+_X_ERRORS = {}
+_X_ERROR_HANDLER = []
+
+
+def _x_error_handler(ctypes):
+    """Xlib error handler that records errors instead of exiting
+
+    Xlib's default handler ends the process on any error, a target window
+    that was closed would take the app with it. The handler is global to
+    Xlib, so it is installed once and files errors by display.
+    """
+    if not _X_ERROR_HANDLER:
+        class XErrorEvent(ctypes.Structure):
+            _fields_ = [("type", ctypes.c_int), ("display", ctypes.c_void_p),
+                        ("resourceid", ctypes.c_ulong), ("serial", ctypes.c_ulong),
+                        ("error_code", ctypes.c_ubyte), ("request_code", ctypes.c_ubyte),
+                        ("minor_code", ctypes.c_ubyte)]
+
+        @ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.POINTER(XErrorEvent))
+        def handler(display, event):
+            error = event.contents
+            _X_ERRORS.setdefault(display, []).append((error.request_code, error.error_code, error.resourceid))
+            return 0
+        # Kept referenced, Xlib calls it for as long as the process lives
+        _X_ERROR_HANDLER.append(handler)
+    return _X_ERROR_HANDLER[0]
+
+
+def char_keysym(char):
+    """X keysym of a character, Latin-1 code points are their own keysyms"""
+    keysym = X_CONTROL_KEYSYMS.get(char)
+    if keysym is not None:
+        return keysym
+    code = ord(char)
+    if 0x20 <= code <= 0x7E or 0xA0 <= code <= 0xFF:
+        return code
+    return 0x01000000 | code
+
+
+class OutputBackend:
+    """Base class for everything the typing engine can send keystrokes to"""
+
+    name = "base"
+
+    # True if write() can type any character without the clipboard, so the
+    # engine does not have to paste non-ASCII text
+    types_unicode = False
+
+    # RunControl of the engine driving this backend, set by the engine so
+    # long writes can stop between characters
+    control = None
+
+    # True if focus() can move the keyboard focus to a window by its ID, so
+    # the engine can type into several windows, see TypingEngine.fan_out()
+    focuses_windows = False
+
+    def press(self, key):
+        """Press and release a single key (a character or a key name)"""
+        raise NotImplementedError
+
+    def write(self, text):
+        """Type a run of characters"""
+        raise NotImplementedError
+
+    def hotkey(self, *keys):
+        """Press a key combination such as ('ctrl', 'v')"""
+        raise NotImplementedError
+
+    def copy(self, text):
+        """Put text on the clipboard"""
+        raise NotImplementedError
+
+    def read_clipboard(self):
+        """Return the current clipboard contents"""
+        raise NotImplementedError
+
+    def focus(self, window):
+        """Send the following keys to the window with this ID"""
+        raise NotImplementedError
+
+    def focused_window(self):
+        """ID of the window that has the keyboard focus, None if unknown"""
+        return None
+
+    def check_window(self, window):
+        """Raise ValueError if keys cannot be sent to the window with this ID"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the backend"""
+        pass
+
+    def sleep(self, seconds):
+        """Wait inside a write, stop() ends the wait when an engine drives the backend"""
+        if self.control is None:
+            time.sleep(seconds)
+        else:
+            self.control.sleep(seconds)
+
+
+class PyAutoGUIBackend(OutputBackend):
+    """Send keystrokes with pyautogui and use pyperclip for the clipboard"""
+
+    name = "pyautogui"
+
+    def __init__(self):
+        # Imported here so the engine can be loaded on machines without a display
+        import pyautogui
+        import pyperclip
+        # pyautogui sleeps PAUSE (0.1 s) after every call, on top of the
+        # engine's own pacing; the fail-safe corner stays enabled
+        pyautogui.PAUSE = 0
+        self._pyautogui = pyautogui
+        self._pyperclip = pyperclip
+
+    def press(self, key):
+        self._pyautogui.press(key)
+
+    def write(self, text):
+        if self.control is None:
+            self._pyautogui.write(text)
+            return
+        # pyautogui cannot be interrupted inside a call, so send one
+        # character at a time and give stop() a chance in between
+        for char in text:
+            self.control.check()
+            self._pyautogui.write(char)
+
+    def hotkey(self, *keys):
+        self._pyautogui.hotkey(*keys)
+
+    def copy(self, text):
+        self._pyperclip.copy(text)
+
+    def read_clipboard(self):
+        return self._pyperclip.paste()
+
+
+class ClipboardPasteBackend(PyAutoGUIBackend):
+    """Send every run of text through the clipboard and Ctrl+V
+
+    Special keys still go through pyautogui, only write() is redirected.
+    """
+
+    name = "clipboard"
+
+    def __init__(self, settle_delay=0.3):
+        super().__init__()
+        # Longest wait for the clipboard to take the new text
+        self.settle_delay = settle_delay
+        self.handshake = ClipboardHandshake(self, sleep=self.sleep)
+
+    def write(self, text):
+        self.handshake.paste(text, self.settle_delay)
+
+
+class XTestBackend(OutputBackend):
+    """Send keystrokes straight to the X server through the XTest extension
+
+    Key events are queued in Xlib and flushed every XTEST_FLUSH_CHARS
+    characters, with none of pyautogui's per-call sleeps and checks.
+    Characters that have no key on the current layout (Arabic on a US
+    layout, for example) are bound to spare keycodes, which costs a short
+    settle once per character; after that they are single key events like
+    any other key. When there are more such characters than spare keycodes
+    the oldest binding is reused. Bindings are removed again by close().
+    Only without any spare keycode are characters pasted. The clipboard goes
+    through pyperclip like in PyAutoGUIBackend. Works with any X server,
+    including Xvfb.
+
+    focus() moves the input focus to a window with XSetInputFocus and waits
+    for the server to answer, one round trip, so keys never go on into the
+    previous window when the target was closed or hidden.
+    """
+
+    name = "xtest"
+    types_unicode = True
+    focuses_windows = True
+
+    def __init__(self, display_name=None, paste_timeout=0.3):
+        import ctypes
+        import ctypes.util
+        import pyperclip
+        self._pyperclip = pyperclip
+
+        x11_path = ctypes.util.find_library("X11")
+        xtst_path = ctypes.util.find_library("Xtst")
+        if not x11_path or not xtst_path:
+            raise OSError("The XTest backend needs libX11 and libXtst")
+        x11 = ctypes.cdll.LoadLibrary(x11_path)
+        xtst = ctypes.cdll.LoadLibrary(xtst_path)
+
+        x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        x11.XOpenDisplay.restype = ctypes.c_void_p
+        x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        x11.XFlush.argtypes = [ctypes.c_void_p]
+        x11.XStringToKeysym.argtypes = [ctypes.c_char_p]
+        x11.XStringToKeysym.restype = ctypes.c_ulong
+        x11.XKeysymToKeycode.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+        x11.XKeysymToKeycode.restype = ctypes.c_ubyte
+        x11.XkbKeycodeToKeysym.argtypes = [ctypes.c_void_p, ctypes.c_ubyte, ctypes.c_int, ctypes.c_int]
+        x11.XkbKeycodeToKeysym.restype = ctypes.c_ulong
+        x11.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XFree.argtypes = [ctypes.c_void_p]
+        x11.XDisplayKeycodes.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)]
+        x11.XGetKeyboardMapping.argtypes = [ctypes.c_void_p, ctypes.c_ubyte, ctypes.c_int, ctypes.POINTER(ctypes.c_int)]
+        x11.XGetKeyboardMapping.restype = ctypes.POINTER(ctypes.c_ulong)
+        x11.XChangeKeyboardMapping.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int,
+                                               ctypes.POINTER(ctypes.c_ulong), ctypes.c_int]
+
+        class XWindowAttributes(ctypes.Structure):
+            _fields_ = [(name, ctypes.c_int) for name in ("x", "y", "width", "height", "border_width", "depth")] + [
+                ("visual", ctypes.c_void_p), ("root", ctypes.c_ulong), ("class", ctypes.c_int),
+                ("bit_gravity", ctypes.c_int), ("win_gravity", ctypes.c_int), ("backing_store", ctypes.c_int),
+                ("backing_planes", ctypes.c_ulong), ("backing_pixel", ctypes.c_ulong), ("save_under", ctypes.c_int),
+                ("colormap", ctypes.c_ulong), ("map_installed", ctypes.c_int), ("map_state", ctypes.c_int),
+                ("all_event_masks", ctypes.c_long), ("your_event_mask", ctypes.c_long),
+                ("do_not_propagate_mask", ctypes.c_long), ("override_redirect", ctypes.c_int),
+                ("screen", ctypes.c_void_p)]
+        self._window_attributes = XWindowAttributes
+
+        x11.XSetInputFocus.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.c_int, ctypes.c_ulong]
+        x11.XGetInputFocus.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_int)]
+        x11.XGetWindowAttributes.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(XWindowAttributes)]
+        x11.XSetErrorHandler.argtypes = [ctypes.c_void_p]
+        x11.XSetErrorHandler.restype = ctypes.c_void_p
+        xtst.XTestQueryExtension.argtypes = [ctypes.c_void_p] + [ctypes.POINTER(ctypes.c_int)] * 4
+        xtst.XTestFakeKeyEvent.argtypes = [ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_ulong]
+        self._ctypes = ctypes
+        self._x11 = x11
+
+        x11.XSetErrorHandler(ctypes.cast(_x_error_handler(ctypes), ctypes.c_void_p))
+        display = x11.XOpenDisplay(display_name.encode() if display_name else None)
+        if not display:
+            raise OSError(f"Cannot open X display {display_name or os.environ.get('DISPLAY', '')!r}")
+        self._display = display
+        dummy = [ctypes.c_int() for _ in range(4)]
+        if not xtst.XTestQueryExtension(display, *[ctypes.byref(value) for value in dummy]):
+            x11.XCloseDisplay(display)
+            self._display = None
+            raise OSError("The X server does not support the XTest extension")
+
+        # Bound once, these are called for every key event
+        self._fake_key = xtst.XTestFakeKeyEvent
+        self._flush = lambda: x11.XFlush(display)
+        # keysym -> (keycode, needs shift), None if the layout has no key
+        self._keys = {}
+        self._shift = self._keycode("Shift_L")
+        # Keycodes without any keysym, and keysym -> keycode bound to them
+        self._spare = self._spare_keycodes()
+        self._remapped = OrderedDict()
+        self.paste_timeout = paste_timeout
+        self.handshake = ClipboardHandshake(self, sleep=self.sleep)
+        atexit.register(self.close)
+
+    def _spare_keycodes(self):
+        ctypes = self._ctypes
+        low, high, per_keycode = ctypes.c_int(), ctypes.c_int(), ctypes.c_int()
+        self._x11.XDisplayKeycodes(self._display, ctypes.byref(low), ctypes.byref(high))
+        count = high.value - low.value + 1
+        mapping = self._x11.XGetKeyboardMapping(self._display, low.value, count, ctypes.byref(per_keycode))
+        if not mapping:
+            return []
+        try:
+            width = per_keycode.value
+            return [low.value + i for i in range(count)
+                    if not any(mapping[i * width + j] for j in range(width))]
+        finally:
+            self._x11.XFree(mapping)
+
+    def _set_mapping(self, keycode, keysym):
+        # Both levels get the keysym so Shift never changes the character
+        keysyms = (self._ctypes.c_ulong * 2)(keysym, keysym)
+        self._x11.XChangeKeyboardMapping(self._display, keycode, 2, keysyms, 1)
+        self._x11.XSync(self._display, False)
+
+    def _remap(self, keysym):
+        """Bind keysym to a spare keycode, return the keycode or None"""
+        if self._spare:
+            keycode = self._spare.pop()
+        elif self._remapped:
+            # Keys already sent with the old binding must be read by the
+            # application before the binding changes
+            self._flush()
+            self.sleep(REMAP_SETTLE)
+            old_keysym, keycode = self._remapped.popitem(last=False)
+            self._keys.pop(old_keysym, None)
+        else:
+            return None
+        self._set_mapping(keycode, keysym)
+        # Recorded before the wait, a stop() during it still leaves the
+        # binding to be undone by close()
+        self._remapped[keysym] = keycode
+        self.sleep(REMAP_SETTLE)
+        return keycode
+
+    def _keycode(self, name):
+        keysym = self._x11.XStringToKeysym(X_KEY_NAMES.get(name.lower(), name).encode())
+        keycode = self._x11.XKeysymToKeycode(self._display, keysym) if keysym else 0
+        if not keycode:
+            raise ValueError(f"Unknown key '{name}'")
+        return keycode
+
+    def _lookup(self, keysym):
+        """Keycode and shift state that produce keysym, None if there is none"""
+        key = self._keys.get(keysym, False)
+        if key is False:
+            key = None
+            keycode = self._x11.XKeysymToKeycode(self._display, keysym)
+            if keycode:
+                # Level 0 is the plain key, level 1 the shifted one
+                for level in (0, 1):
+                    if self._x11.XkbKeycodeToKeysym(self._display, keycode, 0, level) == keysym:
+                        key = (keycode, level == 1)
+                        break
+            if key is None:
+                keycode = self._remap(keysym)
+                if keycode is not None:
+                    key = (keycode, False)
+            self._keys[keysym] = key
+        return key
+
+    def _tap(self, keycode, shift):
+        display, fake_key = self._display, self._fake_key
+        if shift:
+            fake_key(display, self._shift, True, 0)
+        fake_key(display, keycode, True, 0)
+        fake_key(display, keycode, False, 0)
+        if shift:
+            fake_key(display, self._shift, False, 0)
+
+    def press(self, key):
+        if len(key) == 1:
+            self.write(key)
+            return
+        self._tap(self._keycode(key), False)
+        self._flush()
+
+    def write(self, text):
+        queued = 0
+        for char in text:
+            key = self._lookup(char_keysym(char))
+            if key is None:
+                self._flush()
+                queued = 0
+                self.handshake.paste(char, self.paste_timeout)
+                continue
+            self._tap(*key)
+            queued += 1
+            if queued >= XTEST_FLUSH_CHARS:
+                self._flush()
+                queued = 0
+                if self.control is not None:
+                    self.control.check()
+        self._flush()
+
+    def hotkey(self, *keys):
+        keycodes = [self._keycode(key) for key in keys]
+        for keycode in keycodes:
+            self._fake_key(self._display, keycode, True, 0)
+        for keycode in reversed(keycodes):
+            self._fake_key(self._display, keycode, False, 0)
+        self._flush()
+
+    def copy(self, text):
+        self._pyperclip.copy(text)
+
+    def read_clipboard(self):
+        return self._pyperclip.paste()
+
+    def focus(self, window):
+        _X_ERRORS.pop(self._display, None)
+        self._x11.XSetInputFocus(self._display, window, X_REVERT_TO_PARENT, X_CURRENT_TIME)
+        self._x11.XSync(self._display, False)
+        if any(request == X_SET_INPUT_FOCUS for request, _, _ in _X_ERRORS.pop(self._display, ())):
+            raise OSError(f"Cannot focus window {window:#x}, it was closed or hidden")
+
+    def focused_window(self):
+        ctypes = self._ctypes
+        window, revert = ctypes.c_ulong(), ctypes.c_int()
+        self._x11.XGetInputFocus(self._display, ctypes.byref(window), ctypes.byref(revert))
+        # None and PointerRoot are not windows that can be focused again
+        return window.value if window.value > X_POINTER_ROOT else None
+
+    def check_window(self, window):
+        attributes = self._window_attributes()
+        if not self._x11.XGetWindowAttributes(self._display, window, self._ctypes.byref(attributes)):
+            _X_ERRORS.pop(self._display, None)
+            raise ValueError(f"No window with ID {window:#x}")
+        if attributes.map_state != X_IS_VIEWABLE:
+            raise ValueError(f"Window {window:#x} is not shown, it cannot get the focus")
+
+    def close(self):
+        if self._display:
+            # Give the spare keycodes back to the layout
+            for keycode in self._remapped.values():
+                self._set_mapping(keycode, 0)
+            self._remapped.clear()
+            self._x11.XCloseDisplay(self._display)
+            self._display = None
+
+
+class RecordingBackend(OutputBackend):
+    """Record every call in memory instead of touching the real keyboard
+
+    Used to run and measure the engine on headless machines. The clipboard
+    is simulated so that paste-based modes behave like they do on a desktop,
+    clipboard_latency delays when a copied text becomes readable. With
+    types_unicode set it stands in for a backend like XTestBackend.
+    Any window ID can be focused, typed_text() rebuilds each one.
+    """
+
+    name = "recording"
+    focuses_windows = True
+
+    def __init__(self, clipboard_latency=0.0, types_unicode=False):
+        self.types_unicode = types_unicode
+        self.events = []
+        self.clipboard = ""
+        self.clipboard_latency = clipboard_latency
+        self._previous_clipboard = ""
+        self._copied_at = 0.0
+        self._focused = None
+        self._start = time.perf_counter()
+
+    def _record(self, kind, value):
+        self.events.append(BackendEvent(time.perf_counter() - self._start, kind, value))
+
+    def press(self, key):
+        self._record("press", key)
+
+    def write(self, text):
+        self._record("write", text)
+
+    def hotkey(self, *keys):
+        self._record("hotkey", keys)
+
+    def copy(self, text):
+        self._previous_clipboard = self.clipboard
+        self.clipboard = text
+        self._copied_at = time.perf_counter()
+        self._record("copy", text)
+
+    def read_clipboard(self):
+        if time.perf_counter() - self._copied_at < self.clipboard_latency:
+            return self._previous_clipboard
+        return self.clipboard
+
+    def focus(self, window):
+        self._focused = window
+        self._record("focus", window)
+
+    def focused_window(self):
+        return self._focused
+
+    def check_window(self, window):
+        if not isinstance(window, int) or window <= 0:
+            raise ValueError(f"No window with ID {window!r}")
+
+    def clear(self):
+        """Forget all recorded events"""
+        self.events = []
+        self._start = time.perf_counter()
+
+    def typed_text(self, initial="", window=None):
+        """Rebuild the text the target window would have received
+
+        The window is modelled as a plain text field without line wrapping
+        that starts with initial and the cursor at its end. Arrows, Home,
+        End, Backspace, Delete, Ctrl+Home, Ctrl+End and Ctrl+A (a selection
+        the next edit replaces) are applied to it. With window set, only
+        the keys sent while that window had the focus count.
+        """
+        clipboard = ""
+        # Characters left of the cursor, and right of it in reverse order
+        before = list(initial)
+        after = []
+        selected = False
+        focused = None
+        for event in self.events:
+            kind, value = event.kind, event.value
+            if kind == "copy":
+                clipboard = value
+                continue
+            if kind == "focus":
+                focused = value
+                continue
+            if window is not None and focused != window:
+                continue
+            if kind == "hotkey":
+                value = tuple(value)
+                if value == ('ctrl', 'a'):
+                    selected = True
+                    continue
+                if value == ('ctrl', 'v'):
+                    if selected:
+                        before, after = [], []
+                    before += clipboard
+                elif value == ('ctrl', 'home'):
+                    after += reversed(before)
+                    before = []
+                elif value == ('ctrl', 'end'):
+                    before += reversed(after)
+                    after = []
+            elif kind == "press" and value in ("left", "right"):
+                if value == "left" and before:
+                    after.append(before.pop())
+                elif value == "right" and after:
+                    before.append(after.pop())
+            elif kind == "press" and value in LINE_KEYS:
+                text = before + after[::-1]
+                cursor = _line_key(text, len(before), value)
+                before, after = text[:cursor], text[cursor:][::-1]
+            elif kind in ("press", "write"):
+                if selected:
+                    before, after = [], []
+                    if value in ("backspace", "delete"):
+                        selected = False
+                        continue
+                if value == "backspace":
+                    if before:
+                        before.pop()
+                elif value == "delete":
+                    if after:
+                        after.pop()
+                elif kind == "write":
+                    before += value
+                else:
+                    before += SPECIAL_KEY_TEXT.get(value, value)
+            selected = False
+        return "".join(before) + "".join(reversed(after))
+
+
+# Keys typed_text() moves the cursor by lines with
+LINE_KEYS = ("up", "down", "home", "end")
+
+
+def _line_key(text, cursor, key):
+    """Cursor offset in text after pressing a line key"""
+    start = cursor
+    while start > 0 and text[start - 1] != "\n":
+        start -= 1
+    if key == "home":
+        return start
+    end = cursor
+    while end < len(text) and text[end] != "\n":
+        end += 1
+    if key == "end":
+        return end
+    column = cursor - start
+    if key == "up":
+        if start == 0:
+            return 0
+        previous_start = start - 1
+        while previous_start > 0 and text[previous_start - 1] != "\n":
+            previous_start -= 1
+        return min(previous_start + column, start - 1)
+    if end == len(text):
+        return end
+    next_end = end + 1
+    while next_end < len(text) and text[next_end] != "\n":
+        next_end += 1
+    return min(end + 1 + column, next_end)
+
+
+def default_backend():
+    """XTestBackend on an X11 desktop, PyAutoGUIBackend everywhere else"""
+    if sys.platform.startswith("linux") and os.environ.get("DISPLAY"):
+        try:
+            return XTestBackend()
+        except Exception as e:
+            print(f"XTest backend unavailable, using pyautogui: {e}")
+    return PyAutoGUIBackend()
+
+
+# Backends that can be picked by name, e.g. from the command line, "auto"
+# picks the fastest one that works here
+BACKENDS = {
+    "auto": default_backend,
+    XTestBackend.name: XTestBackend,
+    PyAutoGUIBackend.name: PyAutoGUIBackend,
+    ClipboardPasteBackend.name: ClipboardPasteBackend,
+    RecordingBackend.name: RecordingBackend,
+}
+
+
+def create_backend(name):
+    """Instantiate the backend registered under name"""
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown backend '{name}', choose from {', '.join(BACKENDS)}")
+    return backend_class()
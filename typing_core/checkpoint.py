@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+# Where the app and the command line keep checkpoints
+DEFAULT_CHECKPOINT_PATH = Path("auto_typer_checkpoints.json")
+
+# Seconds between writes of the checkpoint file while typing
+FLUSH_INTERVAL = 2.0
+
+# Interrupted documents remembered at once, the oldest is dropped first
+MAX_CHECKPOINTS = 16
+
+
+def text_key(text):
+    """Checkpoint key of a text, a hash so the text itself is not stored"""
+    return "text:" + hashlib.sha1(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class Checkpoint:
+    """How far an interrupted run got through its plan
+
+    A plan is fully determined by the text and strategy, coalesce and
+    paste_batch, so recompiling with the same values and skipping the first
+    step steps lands exactly after the last step that was sent completely.
+    """
+
+    __slots__ = ("key", "name", "strategy", "coalesce", "paste_batch", "step", "chars", "total")
+
+    def __init__(self, key, name, strategy, coalesce, paste_batch, step=0, chars=0, total=0):
+        self.key = key
+        self.name = name
+        self.strategy = strategy
+        self.coalesce = coalesce
+        self.paste_batch = paste_batch
+        self.step = step
+        self.chars = chars
+        self.total = total
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, values):
+        return cls(**{name: values[name] for name in cls.__slots__ if name in values})
+
+
+class CheckpointStore:
+    """Checkpoints of interrupted runs, kept in memory and flushed to a file
+
+    The engine moves a checkpoint forward after every step, which only
+    changes two attributes; the file is rewritten at most every
+    flush_interval seconds, and right away when a run stops or finishes.
+    Writes go to a temporary file first, so a crash never leaves a torn
+    file. With path None nothing is written.
+    """
+
+    def __init__(self, path=None, flush_interval=FLUSH_INTERVAL, clock=time.monotonic,
+                 max_checkpoints=MAX_CHECKPOINTS):
+        self.path = Path(path) if path is not None else None
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self.max_checkpoints = max_checkpoints
+        self._lock = threading.Lock()
+        self._checkpoints = OrderedDict()
+        self._next_flush = 0.0
+        if self.path is not None and self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    for values in json.load(f):
+                        checkpoint = Checkpoint.from_dict(values)
+                        self._checkpoints[checkpoint.key] = checkpoint
+            except Exception as e:
+                # A damaged file only costs the ability to resume
+                print(f"Error loading checkpoints: {e}")
+
+    def get(self, key):
+        """Checkpoint of an interrupted run for key, or None"""
+        if key is None:
+            return None
+        with self._lock:
+            return self._checkpoints.get(key)
+
+    def begin(self, checkpoint):
+        """Start tracking a run, replacing any older checkpoint for its key"""
+        with self._lock:
+            self._checkpoints.pop(checkpoint.key, None)
+            self._checkpoints[checkpoint.key] = checkpoint
+            while len(self._checkpoints) > self.max_checkpoints:
+                self._checkpoints.popitem(last=False)
+        self._next_flush = self.clock() + self.flush_interval
+
+    def maybe_flush(self):
+        """Write the file if the flush interval has passed, called per step"""
+        if self.clock() >= self._next_flush:
+            self.flush()
+
+    def discard(self, key):
+        """Forget a checkpoint, its run has finished"""
+        with self._lock:
+            if self._checkpoints.pop(key, None) is None:
+                return
+        self.flush()
+
+    def flush(self):
+        """Write every checkpoint to the file now"""
+        self._next_flush = self.clock() + self.flush_interval
+        if self.path is None:
+            return
+        with self._lock:
+            data = [checkpoint.as_dict() for checkpoint in self._checkpoints.values()]
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Error saving checkpoints: {e}")
+
+    def __len__(self):
+        return len(self._checkpoints)
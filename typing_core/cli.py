@@ -0,0 +1,295 @@
+"""Command line entry point, types saved texts, files or stdin without a GUI
+
+Examples:
+    python -m typing_core --saved "signature" --file notes.txt --speed 0
+    echo "hello" | python -m typing_core - --delay 1
+    python -m typing_core --jobs batch.json --between 2
+    python -m typing_core --file notes.txt --report timings.json
+    python -m typing_core --file notes.txt --resume
+    python -m typing_core --file notes_v2.txt --since notes.txt
+    python -m typing_core --file notes.txt --process
+    python -m typing_core --saved "signature" --window 0x1a00003 --window 0x2c00007
+
+A job list is a JSON array; every entry names one input ("text", "saved",
+"file" or "stdin": true) and may override any typing option, for example
+{"file": "report.txt", "english_mode": "word", "cps": 40}. Entries with a
+higher "priority" run first, and a "saved" entry can give "first" and
+"last" to type only those paragraphs. "since" (like --since) names a file
+whose text the window already holds, only the changes to it are typed.
+"windows" (like --window) is a list of X window IDs to type into at once.
+"""
+
+import argparse
+import json
+import sys
+
+from .backends import BACKENDS, create_backend
+from .checkpoint import CheckpointStore, DEFAULT_CHECKPOINT_PATH
+from .diff import LEVELS
+from .engine import TypingEngine, TypingSettings
+from .fanout import parse_window_id
+from .humanize import DEFAULT_JITTER, DISTRIBUTIONS
+from .jobs import TypingJob, TypingWorker, saved_text_job
+from .pacing import wpm_to_cps
+from .process import ProcessEngine, TypingProcessError
+from .store import SavedTextStore, DEFAULT_STORE_PATH, LEGACY_JSON_PATH
+
+
+# Keys of a job list entry that select what to type
+INPUT_KINDS = ("text", "saved", "file", "stdin")
+
+# Typing options accepted both as --options and as job list keys
+SETTING_KEYS = ("delay", "speed", "lang_mode", "english_mode", "arabic_mode",
+                "arabic_word_mode", "clipboard_delay", "catch_up", "instrument",
+                "humanize", "jitter", "distribution", "typo_rate", "seed",
+                "diff_level", "diff_navigation")
+
+
+class _AppendInput(argparse.Action):
+    """Collect --text/--saved/--file/- in the order they were given"""
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        inputs = getattr(namespace, "inputs", None) or []
+        if self.const == "stdin":
+            if values is None:
+                # The optional "-" positional was not given
+                return
+            inputs.append({"stdin": True})
+        else:
+            inputs.append({self.const: values})
+        namespace.inputs = inputs
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m typing_core",
+        description="Type saved texts, files or stdin into the focused window.",
+    )
+    parser.add_argument("stdin", nargs="?", choices=["-"], action=_AppendInput, const="stdin",
+                        help="type text read from stdin")
+    parser.add_argument("--text", action=_AppendInput, const="text", metavar="TEXT",
+                        help="type TEXT (repeatable)")
+    parser.add_argument("--saved", action=_AppendInput, const="saved", metavar="NAME",
+                        help="type a saved text from the app (repeatable)")
+    parser.add_argument("--file", action=_AppendInput, const="file", metavar="PATH",
+                        help="type a UTF-8 file, streamed from disk (repeatable)")
+    parser.add_argument("--jobs", metavar="JSON", help="job list file, run after the other inputs")
+
+    options = parser.add_argument_group("typing options (defaults for every job)")
+    options.add_argument("--delay", type=float, default=3.0, help="countdown before each job (default 3)")
+    options.add_argument("--speed", type=float, default=0.05, help="delay per character or word (default 0.05)")
+    options.add_argument("--cps", type=float, default=0.0, help="target characters per second")
+    options.add_argument("--wpm", type=float, default=0.0, help="target words per minute")
+    options.add_argument("--lang", dest="lang_mode", choices=["auto", "arabic", "english"], default="auto")
+    options.add_argument("--english-mode", choices=["character", "word"], default="character")
+    options.add_argument("--arabic-mode", choices=["character", "paste"], default="character")
+    options.add_argument("--arabic-word-mode", choices=["word", "character"], default="word")
+    options.add_argument("--clipboard-delay", type=float, default=0.3,
+                         help="longest wait for the clipboard (default 0.3)")
+    options.add_argument("--catch-up", action="store_true", help="make up time lost to pauses")
+    options.add_argument("--instrument", action="store_true", help="collect timing reports (implied by --report)")
+    options.add_argument("--humanize", action="store_true", help="randomize the delays between keys")
+    options.add_argument("--jitter", type=float, default=DEFAULT_JITTER,
+                         help=f"spread of humanized delays, relative to the mean (default {DEFAULT_JITTER})")
+    options.add_argument("--distribution", choices=DISTRIBUTIONS, default="lognormal",
+                         help="distribution of humanized delays")
+    options.add_argument("--typo-rate", type=float, default=0.0,
+                         help="share of humanized letters typed wrong and corrected, e.g. 0.02")
+    options.add_argument("--seed", type=int, help="random seed for repeatable humanized runs")
+    options.add_argument("--diff-level", choices=LEVELS, default="character",
+                         help="granularity of the changes typed with --since")
+    options.add_argument("--diff-navigation", choices=["arrows", "lines"], default="arrows",
+                         help="lines also moves with Up/Down/End, for fields that do not wrap")
+
+    parser.add_argument("--resume", action="store_true",
+                        help="continue interrupted runs of the same texts and files where they stopped")
+    parser.add_argument("--checkpoints", default=str(DEFAULT_CHECKPOINT_PATH), help="checkpoint file")
+    parser.add_argument("--since", metavar="PATH",
+                        help="the window already holds the text of PATH, type only the changes")
+    parser.add_argument("--window", dest="windows", action="append", type=parse_window_id, metavar="ID",
+                        help="type into the X window with this ID instead of the focused one; "
+                             "repeat it to type into several windows in one run")
+    parser.add_argument("--between", type=float, default=0.0, metavar="SECONDS",
+                        help="extra pause between jobs")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="auto",
+                        help="how keystrokes are sent (default: xtest on X11, pyautogui elsewhere)")
+    parser.add_argument("--process", action="store_true",
+                        help="send keystrokes from a separate worker process (not with stdin)")
+    parser.add_argument("--db", default=str(DEFAULT_STORE_PATH), help="saved texts database")
+    parser.add_argument("--quiet", action="store_true", help="only print errors")
+    parser.add_argument("--report", metavar="PATH", help="write the timing report of every job to PATH as JSON")
+    return parser
+
+
+def settings_from(options, overrides=None):
+    """TypingSettings from parsed options, with per-job overrides applied"""
+    values = {key: getattr(options, key) for key in SETTING_KEYS}
+    cps, wpm = options.cps, options.wpm
+    for key, value in (overrides or {}).items():
+        if key in SETTING_KEYS:
+            values[key] = value
+        elif key == "cps":
+            cps, wpm = value, 0
+        elif key == "wpm":
+            cps, wpm = 0, value
+        elif key not in INPUT_KINDS and key not in JOB_KEYS:
+            raise ValueError(f"Unknown job option '{key}'")
+    values["target_cps"] = wpm_to_cps(wpm) if wpm else cps
+    return TypingSettings(**values)
+
+
+# Job entry keys that are not settings
+JOB_KEYS = ("name", "resume", "priority", "first", "last", "since", "windows")
+
+
+def read_text(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def load_job_list(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    if not isinstance(entries, list):
+        raise ValueError(f"{path} must contain a JSON list of jobs")
+    return entries
+
+
+def build_jobs(entries, options, store_opener):
+    """Turn input entries into TypingJobs, saved texts are read right away"""
+    jobs = []
+    for entry in entries:
+        kinds = [kind for kind in INPUT_KINDS if kind in entry]
+        if len(kinds) != 1:
+            raise ValueError(f"Job {entry!r} needs exactly one of {', '.join(INPUT_KINDS)}")
+        settings = settings_from(options, entry)
+        name = entry.get("name")
+        resume = entry.get("resume", options.resume)
+        priority = entry.get("priority", 0)
+        if "text" in entry:
+            job = TypingJob(settings, text=entry["text"], name=name, resume=resume)
+        elif "saved" in entry:
+            # first and last pick a range of paragraphs, like the Queue tab
+            job = saved_text_job(store_opener(), entry["saved"], settings,
+                                 entry.get("first"), entry.get("last"))
+            job.name = name or job.name
+            job.resume = resume
+            job.queued = False
+        elif "file" in entry:
+            job = TypingJob(settings, path=entry["file"], name=name, resume=resume)
+        else:
+            job = TypingJob(settings, stream=sys.stdin.buffer, name=name)
+        job.priority = priority
+        since = entry.get("since", options.since)
+        if since is not None:
+            # Both texts are needed whole to diff them
+            if job.stream is not None:
+                raise ValueError("--since needs a text, a saved text or a file, not stdin")
+            job.previous = read_text(since)
+            if job.path is not None:
+                job.text, job.path = read_text(job.path), None
+        windows = entry.get("windows", options.windows)
+        if windows:
+            # Every window gets the same steps, the text is compiled once
+            if job.stream is not None or since is not None:
+                raise ValueError("Windows can be given for texts, saved texts and files, not stdin or --since")
+            job.targets = [parse_window_id(window) for window in windows]
+            if job.path is not None:
+                job.text, job.path = read_text(job.path), None
+        jobs.append(job)
+    return jobs
+
+
+def write_reports(path, jobs):
+    reports = [{"name": job.name, "completed": job.completed,
+                **(job.telemetry.as_dict() if job.telemetry else {})} for job in jobs]
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2)
+    except OSError as e:
+        print(f"Error writing report: {e}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = build_parser()
+    options = parser.parse_args(argv)
+    if options.report:
+        options.instrument = True
+    entries = list(getattr(options, "inputs", None) or [])
+
+    store = []
+
+    def open_store():
+        # Only touch the database when a saved text is asked for
+        if not store:
+            store.append(SavedTextStore(options.db))
+            try:
+                store[0].migrate_json(LEGACY_JSON_PATH)
+            except Exception as e:
+                print(f"Error importing {LEGACY_JSON_PATH}: {e}", file=sys.stderr)
+        return store[0]
+
+    try:
+        if options.jobs:
+            entries.extend(load_job_list(options.jobs))
+        if not entries:
+            parser.error("nothing to type, give --text, --saved, --file, - or --jobs")
+        jobs = build_jobs(entries, options, open_store)
+        if options.process and any(job.stream is not None for job in jobs):
+            raise ValueError("--process can type texts, saved texts and files, not stdin")
+        backend = None if options.process else create_backend(options.backend)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    def on_status(message):
+        if not options.quiet or message.startswith("Error"):
+            print(message, file=sys.stderr)
+
+    if options.process:
+        try:
+            engine = ProcessEngine(options.backend, on_status=on_status,
+                                   checkpoint_path=options.checkpoints).start()
+        except TypingProcessError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+    else:
+        engine = TypingEngine(backend, on_status=on_status, checkpoints=CheckpointStore(options.checkpoints))
+    worker = TypingWorker(engine)
+    # The first job starts as soon as it is submitted, so order them here
+    jobs.sort(key=lambda job: -job.priority)
+    for i, job in enumerate(jobs):
+        if i:
+            # The pause between jobs is part of the countdown, so Ctrl+C
+            # still interrupts it right away
+            job.settings = job.settings.replace(delay=job.settings.delay + options.between)
+        worker.submit(job)
+
+    try:
+        for job in jobs:
+            # Event.wait with a timeout keeps Ctrl+C working on Windows
+            while not job.done.wait(0.2):
+                pass
+            if not options.quiet:
+                print(f"[{job.name}] {'done' if job.completed else 'not finished'}"
+                      + (f", {job.report.summary()}" if job.report else ""), file=sys.stderr)
+                if job.telemetry:
+                    print(job.telemetry.format(), file=sys.stderr)
+    except KeyboardInterrupt:
+        worker.cancel()
+        print("Stopped", file=sys.stderr)
+        return 130
+    finally:
+        # A stopped job can still be inside a backend call, the backend is
+        # only closed once the worker has let go of it
+        worker.shutdown(wait=True)
+        if options.report:
+            write_reports(options.report, jobs)
+        if options.process:
+            engine.close()
+        else:
+            backend.close()
+        if store:
+            store[0].close()
+
+    return 0 if all(job.completed for job in jobs) else 1
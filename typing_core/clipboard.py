@@ -0,0 +1,85 @@
+import math
+import time
+
+
+# Polling starts fast and backs off, most clipboards settle within a few ms
+FIRST_POLL_INTERVAL = 0.002
+MAX_POLL_INTERVAL = 0.02
+
+# Cost assumed for one paste before any has been measured
+DEFAULT_PASTE_COST = 0.05
+
+# Upper bound for the number of words sent in one paste
+MAX_PASTE_BATCH = 8
+
+
+def paste_batch_size(speed, paste_cost, max_batch=MAX_PASTE_BATCH):
+    """Number of words to paste at once so pasting keeps up with speed
+
+    A paste costs paste_cost seconds no matter how long the text is, so when
+    the per-word delay is shorter than that, several words go in one paste.
+    """
+    if speed <= 0:
+        return max_batch
+    return max(1, min(max_batch, math.ceil(paste_cost / speed)))
+
+
+class ClipboardHandshake:
+    """Copy text, wait until the clipboard really holds it, then press Ctrl+V
+
+    Replaces the fixed clipboard_delay sleep: the delay is only used as a
+    timeout, so a fast clipboard costs a few milliseconds instead of 0.3 s.
+    """
+
+    def __init__(self, backend, sleep=time.sleep, clock=time.monotonic):
+        self.backend = backend
+        self.sleep = sleep
+        self.clock = clock
+        # Moving average of how long one copy-and-paste takes
+        self.paste_cost = DEFAULT_PASTE_COST
+        self.pastes = 0
+        self.timeouts = 0
+        # Telemetry of the current run, set by the engine when instrumented
+        self.telemetry = None
+
+    def wait_for(self, text, timeout):
+        """Poll the clipboard until it holds text, return False on timeout"""
+        deadline = self.clock() + timeout
+        interval = FIRST_POLL_INTERVAL
+        while True:
+            try:
+                if self.backend.read_clipboard() == text:
+                    return True
+            except Exception:
+                # Some clipboards fail while ownership is changing, retry
+                pass
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                return False
+            self.sleep(min(interval, remaining))
+            interval = min(interval * 2, MAX_POLL_INTERVAL)
+
+    def paste(self, text, timeout):
+        """Paste text into the focused window, waiting at most timeout seconds"""
+        start = self.clock()
+        self.backend.copy(text)
+        copied = self.clock()
+        if not self.wait_for(text, timeout):
+            # Paste anyway, this is what the fixed delay used to do
+            self.timeouts += 1
+        waited = self.clock()
+        self.backend.hotkey('ctrl', 'v')
+
+        end = self.clock()
+        elapsed = end - start
+        if self.telemetry is not None:
+            self.telemetry.record("copy", copied - start)
+            self.telemetry.record("clipboard_wait", waited - copied)
+            self.telemetry.record("paste_hotkey", end - waited)
+        self.paste_cost = 0.8 * self.paste_cost + 0.2 * elapsed
+        self.pastes += 1
+        return elapsed
+
+    def batch_size(self, speed):
+        """Words per paste for the given speed, from the measured paste cost"""
+        return paste_batch_size(speed, self.paste_cost)
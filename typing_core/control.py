@@ -0,0 +1,103 @@
+import threading
+import time
+
+
+class TypingStopped(Exception):
+    """Raised inside the engine when a run is stopped while it waits"""
+
+
+class RunControl:
+    """Pause, resume and stop state shared between the engine and its callers
+
+    Every wait in the engine goes through sleep() or wait_while_paused(),
+    which block on a condition variable instead of polling, so stop() wakes
+    them immediately and a paused run uses no CPU.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self._cond = threading.Condition()
+        self.stopped = False
+        self.paused = False
+        # Clock time of the last stop() call, used to measure stop latency
+        self.stop_requested_at = None
+        # Set by begin(), the next reset() keeps what happened since
+        self._begun = False
+
+    def begin(self):
+        """A run was handed over and will start soon
+
+        Clears the state like reset(), but a stop() from now until the
+        run starts is kept: the reset() at its start does nothing, so a
+        job stopped while it was being picked up is never typed.
+        """
+        with self._cond:
+            self.stopped = False
+            self.paused = False
+            self.stop_requested_at = None
+            self._begun = True
+
+    def reset(self):
+        """Prepare for a new run, unless begin() already did"""
+        with self._cond:
+            if self._begun:
+                self._begun = False
+                return
+            self.stopped = False
+            self.paused = False
+            self.stop_requested_at = None
+
+    def stop(self):
+        with self._cond:
+            if not self.stopped:
+                self.stopped = True
+                self.stop_requested_at = self.clock()
+            self._cond.notify_all()
+
+    def pause(self):
+        with self._cond:
+            self.paused = True
+            self._cond.notify_all()
+
+    def resume(self):
+        with self._cond:
+            self.paused = False
+            self._cond.notify_all()
+
+    def toggle_pause(self):
+        """Flip the paused state, return True if the run is now paused"""
+        with self._cond:
+            self.paused = not self.paused
+            self._cond.notify_all()
+            return self.paused
+
+    def check(self):
+        """Raise TypingStopped if the run was stopped"""
+        if self.stopped:
+            raise TypingStopped()
+
+    def sleep(self, seconds):
+        """Sleep for seconds, raise TypingStopped as soon as stop() is called"""
+        if seconds <= 0:
+            self.check()
+            return
+        deadline = self.clock() + seconds
+        with self._cond:
+            while not self.stopped:
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    return
+                self._cond.wait(remaining)
+        raise TypingStopped()
+
+    def wait_while_paused(self):
+        """Block while paused, return the seconds spent waiting"""
+        if not self.paused:
+            self.check()
+            return 0.0
+        start = self.clock()
+        with self._cond:
+            while self.paused and not self.stopped:
+                self._cond.wait()
+        self.check()
+        return self.clock() - start
@@ -0,0 +1,240 @@
+from array import array
+from bisect import bisect_right
+
+from .plan import (
+    KeystrokePlan,
+    iter_steps,
+    WORD_TOKEN_RE,
+    key_steps,
+    PRESS,
+    HOTKEY,
+    WRITE,
+    PASTE,
+)
+
+
+# Diff granularity: single characters, or words and the whitespace between them
+LEVELS = ("character", "word")
+
+# Largest edit distance (in tokens) searched for before giving up and
+# replacing the whole text; the search keeps about its square in memory
+MAX_EDIT_DISTANCE = 2000
+
+
+def tokens(text, level):
+    if level == "word":
+        return WORD_TOKEN_RE.findall(text)
+    return text
+
+
+def myers_hunks(a, b, max_distance=MAX_EDIT_DISTANCE):
+    """Changed regions between sequences a and b, or None if too far apart
+
+    Implements Myers' O((N+M)D) shortest edit script. A common prefix and
+    suffix are cut off first, so a small edit in a long text only searches
+    the part in between. Returns (a_start, a_end, b_start, b_end) tuples in
+    order: a[a_start:a_end] is replaced by b[b_start:b_end].
+    """
+    prefix = 0
+    limit = min(len(a), len(b))
+    while prefix < limit and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    limit -= prefix
+    while suffix < limit and a[len(a) - 1 - suffix] == b[len(b) - 1 - suffix]:
+        suffix += 1
+    a = a[prefix:len(a) - suffix]
+    b = b[prefix:len(b) - suffix]
+    n, m = len(a), len(b)
+    if not n or not m:
+        return [(prefix, prefix + n, prefix, prefix + m)] if n or m else []
+
+    # Furthest x reached on every diagonal k = x - y, one row per distance d
+    offset = min(n + m, max_distance) + 1
+    v = array('i', [0]) * (2 * offset + 1)
+    trace = []
+    distance = None
+    for d in range(min(n + m, max_distance) + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                distance = d
+                break
+        trace.append(v[offset - d:offset + d + 1])
+        if distance is not None:
+            break
+    if distance is None:
+        return None
+
+    # Walk back from the end, collecting single deletions and insertions
+    edits = []
+    x, y = n, m
+    for d in range(distance, 0, -1):
+        previous = trace[d - 1]
+        k = x - y
+        if k == -d or (k != d and previous[k - 1 + d - 1] < previous[k + 1 + d - 1]):
+            previous_k = k + 1
+        else:
+            previous_k = k - 1
+        previous_x = previous[previous_k + d - 1]
+        previous_y = previous_x - previous_k
+        while x > previous_x and y > previous_y:
+            x -= 1
+            y -= 1
+        edits.append((previous_x, previous_y, x == previous_x))
+        x, y = previous_x, previous_y
+
+    # Merge edits that touch into hunks
+    hunks = []
+    for x, y, insert in reversed(edits):
+        end = (x, y + 1) if insert else (x + 1, y)
+        if hunks and hunks[-1][1] == x and hunks[-1][3] == y:
+            hunks[-1] = (hunks[-1][0], end[0], hunks[-1][2], end[1])
+        else:
+            hunks.append((x, end[0], y, end[1]))
+    return [(a0 + prefix, a1 + prefix, b0 + prefix, b1 + prefix) for a0, a1, b0, b1 in hunks]
+
+
+def edit_hunks(old, new, level="character", max_distance=MAX_EDIT_DISTANCE):
+    """Changed regions between two texts in character offsets, or None"""
+    if level not in LEVELS:
+        raise ValueError(f"Unknown diff level '{level}'")
+    old_tokens = tokens(old, level)
+    new_tokens = tokens(new, level)
+    hunks = myers_hunks(old_tokens, new_tokens, max_distance)
+    if hunks is None or level == "character":
+        return hunks
+    old_offsets = _offsets(old_tokens)
+    new_offsets = _offsets(new_tokens)
+    return [(old_offsets[a0], old_offsets[a1], new_offsets[b0], new_offsets[b1])
+            for a0, a1, b0, b1 in hunks]
+
+
+def _offsets(parts):
+    offsets = [0]
+    for part in parts:
+        offsets.append(offsets[-1] + len(part))
+    return offsets
+
+
+def keystrokes(steps):
+    """Keys a list of steps sends, a write or paste counts one per character"""
+    return sum(len(value) if op in (WRITE, PASTE) else 1
+               for actions, _, _ in steps for op, value in actions)
+
+
+class _Cursor:
+    """Where the cursor is while the hunks of an edit are applied
+
+    Hunks go from the last to the first, so everything before the cursor's
+    hunk is still the old text and line numbers there can be looked up in
+    old; only the text inserted at the cursor has to be added.
+    """
+
+    def __init__(self, old):
+        self.old = old
+        self.line_starts = [0] + [i + 1 for i, char in enumerate(old) if char == '\n']
+        self.offset = len(old)
+        self.line, self.column = self.line_column(len(old))
+        self.inserted = ""
+
+    def line_column(self, offset):
+        line = bisect_right(self.line_starts, offset) - 1
+        return line, offset - self.line_starts[line]
+
+    def line_length(self, line):
+        start = self.line_starts[line]
+        if line + 1 < len(self.line_starts):
+            end = self.line_starts[line + 1] - 1
+        else:
+            end = len(self.old)
+        return end - start
+
+    def moves(self, target, lines):
+        """Cheapest keys that move the cursor left to the old offset target
+
+        Arrows, or Ctrl+Home and arrows. With lines set, also Up or Down
+        to the line and End, which assumes a field that does not wrap.
+        """
+        options = [[('left', self.offset - target)], [(('ctrl', 'home'), 1), ('right', target)]]
+        target_line, target_column = self.line_column(target)
+        if lines and target_line < self.line:
+            length = self.line_length(target_line)
+            if self.inserted and target_line == self.line - self.inserted.count('\n'):
+                # The target's line continues into the inserted text
+                length = (self.offset - len(self.inserted) - self.line_starts[target_line]) + self.inserted.index('\n')
+            back = length - target_column
+            options.append([('up', self.line - target_line), ('end', 1), ('left', back)])
+            options.append([(('ctrl', 'home'), 1), ('down', target_line), ('end', 1), ('left', back)])
+            if target_line > 0:
+                options.append([('up', self.line - target_line + 1), ('end', 1), ('right', target_column + 1)])
+                options.append([(('ctrl', 'home'), 1), ('down', target_line - 1), ('end', 1),
+                                ('right', target_column + 1)])
+        return min(options, key=lambda keys: sum(count for _, count in keys))
+
+    def moved(self, offset, inserted):
+        """The cursor is now at old offset, with inserted typed before it"""
+        self.offset = offset + len(inserted)
+        self.inserted = inserted
+        self.line, self.column = self.line_column(offset)
+        newlines = inserted.count('\n')
+        if newlines:
+            self.line += newlines
+            self.column = len(inserted) - inserted.rindex('\n') - 1
+        else:
+            self.column += len(inserted)
+
+
+def _move_steps(keys, coalesce):
+    steps = []
+    for key, count in keys:
+        if isinstance(key, tuple):
+            steps.append((((HOTKEY, key),), 1, 1))
+        else:
+            steps += key_steps(key, count, coalesce)
+    return steps
+
+
+def compile_edit(old, new, strategy, coalesce=False, paste_batch=1, level="character",
+                 max_distance=MAX_EDIT_DISTANCE, lines=False):
+    """Plan that turns a field holding old into new, starting at its end
+
+    Hunks are applied from the last to the first, so the offsets of the
+    ones still to come never move: the cursor goes left to the end of a
+    hunk, Backspace removes the old part and the new part is typed with
+    strategy like any other text. Moving takes arrows, or Ctrl+Home and
+    arrows, and with lines set Up, Down and End too (see _Cursor.moves).
+    The cursor is put back at the end of the text afterwards. When that
+    takes more keys than selecting everything and typing new, or the
+    texts are too far apart, the plan does that instead. Navigation keys
+    count as one character each for progress and pacing.
+    """
+    hunks = edit_hunks(old, new, level, max_distance)
+    steps = []
+    if hunks is not None:
+        cursor = _Cursor(old)
+        for a0, a1, b0, b1 in reversed(hunks):
+            steps += _move_steps(cursor.moves(a1, lines), coalesce)
+            steps += key_steps('backspace', a1 - a0, coalesce)
+            if b1 > b0:
+                steps += iter_steps((new[b0:b1],), strategy, coalesce, paste_batch)
+            cursor.moved(a0, new[b0:b1])
+        cursor = cursor.offset
+        if cursor != len(new):
+            steps.append((((HOTKEY, ('ctrl', 'end')),), 1, 1))
+    if hunks is None or keystrokes(steps) > len(new) + 1:
+        steps = [(((HOTKEY, ('ctrl', 'a')),), 1, 1)]
+        if new:
+            steps += iter_steps((new,), strategy, coalesce, paste_batch)
+        else:
+            steps.append((((PRESS, 'backspace'),), 1, 1))
+    return KeystrokePlan(None, strategy, tuple(steps), sum(chars for _, chars, _ in steps),
+                         coalesce, paste_batch)
@@ -0,0 +1,545 @@
+import time
+from itertools import islice
+
+from .checkpoint import Checkpoint, text_key
+from .clipboard import ClipboardHandshake
+from .control import RunControl, TypingStopped
+from .diff import compile_edit, keystrokes
+from .fanout import FanOutPlan
+from .humanize import HumanTiming, HumanizedPlan, DEFAULT_JITTER
+from .pacing import PacingScheduler
+from .scripts import contains_arabic
+from .sources import StringSource
+from .telemetry import Telemetry
+from .plan import (
+    KeystrokePlan,
+    PlanCache,
+    StreamingPlan,
+    key_steps,
+    select_strategy,
+    mixed_strategy,
+    uses_word_pastes,
+    PRESS,
+    WRITE,
+    PASTE,
+    HOTKEY,
+    WAIT,
+    FOCUS,
+    PASTE_AGAIN,
+    STREAMED_TEXT_CHARS,
+    ARABIC_PASTE_WORDS,
+    ARABIC_PASTE_WHOLE,
+    ENGLISH_CHARACTER,
+    MIXED,
+)
+
+
+class TypingSettings:
+    """Typing options read from the GUI (or a script) before a run starts
+
+    A read-only snapshot: the engine reads plain attributes in its loops
+    and nothing can change them halfway through a run. replace() returns a
+    copy with some options changed; as_dict() and from_dict() turn it into
+    JSON for the job journal and settings profiles.
+    """
+
+    __slots__ = ("delay", "speed", "lang_mode", "english_mode", "arabic_mode",
+                 "arabic_word_mode", "clipboard_delay", "target_cps", "catch_up",
+                 "instrument", "humanize", "jitter", "distribution", "typo_rate", "seed",
+                 "diff_level", "diff_navigation")
+
+    def __init__(self, delay=3.0, speed=0.05, lang_mode="auto",
+                 english_mode="character", arabic_mode="character",
+                 arabic_word_mode="word", clipboard_delay=0.3,
+                 target_cps=0.0, catch_up=False, instrument=False, humanize=False,
+                 jitter=DEFAULT_JITTER, distribution="lognormal", typo_rate=0.0, seed=None,
+                 diff_level="character", diff_navigation="arrows"):
+        init = object.__setattr__
+        init(self, "delay", delay)
+        init(self, "speed", speed)
+        # A target rate in characters per second replaces speed when set
+        init(self, "target_cps", target_cps)
+        init(self, "catch_up", catch_up)
+        init(self, "lang_mode", lang_mode)
+        init(self, "english_mode", english_mode)
+        init(self, "arabic_mode", arabic_mode)
+        init(self, "arabic_word_mode", arabic_word_mode)
+        init(self, "clipboard_delay", clipboard_delay)
+        # Time every backend call, sleep and progress update of the run
+        init(self, "instrument", instrument)
+        # Randomized delays between keys and occasional corrected typos,
+        # only when typing is paced
+        init(self, "humanize", humanize)
+        init(self, "jitter", jitter)
+        init(self, "distribution", distribution)
+        init(self, "typo_rate", typo_rate)
+        init(self, "seed", seed)
+        # Granularity of the diff when only the changes are retyped, and
+        # "lines" to also move with Up, Down and End (no line wrapping)
+        init(self, "diff_level", diff_level)
+        init(self, "diff_navigation", diff_navigation)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"TypingSettings are read-only, use replace({name}=...)")
+
+    def __delattr__(self, name):
+        raise AttributeError("TypingSettings are read-only")
+
+    def __reduce__(self):
+        # Pickled for the typing process, __setattr__ is in the way of the default
+        return (self.__class__.from_dict, (self.as_dict(),))
+
+    def __eq__(self, other):
+        if not isinstance(other, TypingSettings):
+            return NotImplemented
+        return self.as_dict() == other.as_dict()
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self):
+        options = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"TypingSettings({options})"
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, values):
+        """Settings from as_dict() output, keys this version lacks are ignored"""
+        return cls(**{name: value for name, value in values.items() if name in cls.__slots__})
+
+    def replace(self, **changes):
+        """Copy with the given options changed"""
+        values = self.as_dict()
+        values.update(changes)
+        return self.__class__(**values)
+
+
+class TypingEngine:
+    """Types text through an output backend without touching any GUI
+
+    Progress and status are reported through the optional on_progress(done,
+    total) and on_status(message) callbacks, so the same engine can be driven
+    by the Tk app or run headless against a RecordingBackend. pause(),
+    resume() and stop() are safe to call from any thread. With a
+    CheckpointStore, runs record how far they got and can be resumed.
+    """
+
+    def __init__(self, backend, on_progress=None, on_status=None, plan_cache=None,
+                 clock=time.perf_counter, checkpoints=None):
+        self.backend = backend
+        self.checkpoints = checkpoints
+        self.plan_cache = plan_cache if plan_cache is not None else PlanCache()
+        self.on_progress = on_progress
+        self.on_status = on_status
+        self.clock = clock
+        self.control = RunControl(clock)
+        self.sleep = self.control.sleep
+        self.clipboard = ClipboardHandshake(backend, sleep=self.sleep, clock=clock)
+        # Long backend writes check the control between characters
+        backend.control = self.control
+        self.running = False
+        self.pacer = None
+        self.telemetry = None
+        self._chars_typed = 0
+        # PacingReport of the last run that reached the typing phase
+        self.last_report = None
+        # TelemetryReport of the last instrumented run
+        self.last_telemetry = None
+        # Seconds between the last stop() and the run actually returning
+        self.last_stop_latency = None
+        # Text the last finished run left in its window, see retype()
+        self.last_text = None
+
+    def _status(self, message):
+        if self.on_status:
+            self.on_status(message)
+
+    def _progress(self, done, total):
+        if self.on_progress:
+            self.on_progress(done, total)
+
+    def select_strategy(self, text, settings):
+        """Pick the typing strategy for text from the language settings
+
+        Auto mode no longer switches a whole document to pasting when it finds
+        one Arabic letter: text containing Arabic is split into script runs
+        and only the non-ASCII runs are pasted.
+        """
+        if settings.lang_mode == "auto" and contains_arabic(text):
+            return mixed_strategy(settings)
+        return select_strategy(settings.lang_mode == "arabic", settings)
+
+    @property
+    def active(self):
+        """True while a run is in progress and has not been stopped"""
+        return self.running and not self.control.stopped
+
+    @property
+    def chars_typed(self):
+        """Characters sent so far in the current or last run"""
+        return self._chars_typed
+
+    @property
+    def paused(self):
+        return self.control.paused
+
+    def pause(self):
+        self.control.pause()
+
+    def resume(self):
+        self.control.resume()
+
+    def toggle_pause(self):
+        return self.control.toggle_pause()
+
+    def stop(self):
+        self.control.stop()
+
+    def begin_run(self):
+        """The next run was picked up, a stop() from now on applies to it"""
+        self.control.begin()
+
+    def _wait_while_paused(self):
+        """Block while paused, raise TypingStopped if the run was stopped"""
+        paused_for = self.control.wait_while_paused()
+        if paused_for:
+            if self.pacer:
+                self.pacer.add_pause(paused_for)
+            if self.telemetry:
+                self.telemetry.record("pause", paused_for)
+
+    def types_directly(self, settings):
+        """True if non-ASCII text is typed as keys instead of pasted
+
+        Needs a backend that can type any character; choosing the paste
+        mode for Arabic still pastes.
+        """
+        return self.backend.types_unicode and settings.arabic_mode != "paste"
+
+    def _paste(self, text, settings):
+        # The clipboard delay is now only the longest we wait for the copy
+        self.clipboard.paste(text, settings.clipboard_delay)
+
+    def run(self, text, settings, resume=False):
+        """Type text with the given settings, return True if it finished
+
+        With resume set, a run of the same text that was interrupted is
+        continued after the last step it sent.
+        """
+        # Only a hash of the text goes into the checkpoint, never the text
+        key = text_key(text) if self.checkpoints is not None else None
+        completed = self._run(settings, len(text), lambda resume_from: self.compile_text(text, settings, resume_from),
+                              key, None, resume)
+        self.last_text = text if completed else None
+        return completed
+
+    def retype(self, previous, text, settings):
+        """Turn a window that holds previous into text, sending only the changes
+
+        The cursor is expected at the end of previous, where a run leaves
+        it. Only cursor moves, backspaces and the inserted text are sent,
+        see compile_edit(). An interrupted retype leaves the window in
+        between, so it is not checkpointed and last_text is cleared.
+        """
+        plan = self.compile_edit(previous, text, settings)
+        completed = self._run(settings, plan.position(0)[1], lambda resume_from: plan)
+        self.last_text = text if completed else None
+        if completed:
+            self._status(f"Changes typed: {keystrokes(plan.steps)} keys instead of {len(text)} "
+                         f"({self.last_report.summary()})")
+        return completed
+
+    def expand(self, abbreviation, text, settings):
+        """Replace abbreviation, just typed before the cursor, with text
+
+        The abbreviation is erased with Backspace and text typed in the
+        same plan, compiled like a run of text (and cached with it), so a
+        snippet goes out in as few backend calls as its mode allows.
+        """
+        plan = self.compile(text, settings.replace(humanize=False))
+        steps = tuple(key_steps('backspace', len(abbreviation), plan.coalesce)) + plan.steps
+        plan = self.humanized(KeystrokePlan(None, plan.strategy, steps, len(abbreviation) + plan.total_chars,
+                                            plan.coalesce, plan.paste_batch), settings)
+        # The window holds more than the snippet, Type Changes cannot follow
+        self.last_text = None
+        return self._run(settings, plan.position(0)[1], lambda resume_from: plan)
+
+    def fan_out(self, text, targets, settings):
+        """Type text into every window in targets, return True if it finished
+
+        One plan is compiled and every step goes to all windows before the
+        pacing wait, see FanOutPlan, so the run takes about as long as one
+        into a single window and has one countdown. Windows are given by
+        ID and need a backend that can focus them (the XTest one); the
+        window that had the focus gets it back at the end. A stopped run
+        leaves the windows at most one step apart and is not checkpointed.
+        """
+        targets = list(dict.fromkeys(targets))
+        self.last_text = None
+        if not self.backend.focuses_windows:
+            self._status(f"Error: the {self.backend.name} backend cannot type into other windows")
+            return False
+        try:
+            if not targets:
+                raise ValueError("No windows to type into")
+            for target in targets:
+                self.backend.check_window(target)
+            previous = self.backend.focused_window()
+        except Exception as e:
+            self._status(f"Error typing into windows: {str(e)}")
+            return False
+        try:
+            return self._run(settings, len(text),
+                             lambda resume_from: FanOutPlan(self.compile_text(text, settings), targets))
+        finally:
+            if previous is not None:
+                try:
+                    self.backend.focus(previous)
+                except Exception as e:
+                    print(f"Error restoring focus: {str(e)}")
+
+    def compile_edit(self, previous, text, settings):
+        """Plan of the edit from previous to text
+
+        Inserted text is always typed character by character (word modes
+        would drop whitespace at the edges of an insertion), Arabic runs
+        pasted per character or whole following the Arabic mode.
+        """
+        if contains_arabic(text):
+            strategy = f"{MIXED}:character:{'whole' if settings.arabic_mode == 'paste' else 'character'}"
+        else:
+            strategy = ENGLISH_CHARACTER
+        coalesce = settings.speed <= 0 and not settings.target_cps
+        plan = compile_edit(previous, text, strategy, coalesce, level=settings.diff_level,
+                            lines=settings.diff_navigation == "lines")
+        return self.humanized(plan, settings)
+
+    def run_source(self, source, settings, resume=False):
+        """Type a TextSource (file or pipe) block by block as it is read
+
+        The text is never held in memory as a whole: blocks are decoded,
+        compiled and typed as they come, and the first keystroke is sent as
+        soon as the first block is read. Files can be resumed like texts,
+        pipes cannot.
+        """
+        key = source.checkpoint_key() if self.checkpoints is not None else None
+        # A streamed text is not kept, so it cannot be retyped later
+        self.last_text = None
+        return self._run(settings, source.size, lambda resume_from: self.compile_source(source, settings, resume_from),
+                         key, source.name, resume)
+
+    def resume_point(self, text=None, source=None):
+        """Checkpoint an interrupted run of text or source left, or None"""
+        if self.checkpoints is None:
+            return None
+        return self.checkpoints.get(text_key(text) if source is None else source.checkpoint_key())
+
+    def _run(self, settings, total, make_plan, key=None, name=None, resume=False):
+        self.control.reset()
+        self.running = True
+        self.last_report = self.last_telemetry = None
+        self.last_stop_latency = None
+        resume_from = self.checkpoints.get(key) if resume and key is not None else None
+        checkpoint = None
+        completed = False
+        try:
+            # Countdown, a fractional part is waited before the first message
+            self.sleep(settings.delay - int(settings.delay))
+            for i in range(int(settings.delay), 0, -1):
+                self._status(f"Starting in {i} seconds... Click where you want to type!")
+                self.sleep(1)
+
+            self._status("Typing (resumed)..." if resume_from else "Typing...")
+            self._progress(0, total)
+
+            plan = make_plan(resume_from)
+            if key is not None:
+                checkpoint = Checkpoint(key, name, plan.strategy, plan.coalesce, plan.paste_batch, total=total)
+                if resume_from:
+                    checkpoint.step, checkpoint.chars = resume_from.step, resume_from.chars
+                self.checkpoints.begin(checkpoint)
+            completed = self.execute_plan(plan, settings, checkpoint)
+
+            if completed:
+                self._status(f"Typing completed ({self.last_report.summary()})")
+            return completed
+        except TypingStopped:
+            self._status("Typing stopped")
+            return False
+        except Exception as e:
+            # Reading a file or pipe can fail halfway through
+            self._status(f"Error typing text: {str(e)}")
+            print(f"Typing error: {str(e)}")
+            return False
+        finally:
+            if checkpoint is not None:
+                # A finished run has nothing to resume, anything else keeps
+                # its last position on disk
+                if completed:
+                    self.checkpoints.discard(key)
+                else:
+                    self.checkpoints.flush()
+            self.running = False
+            if self.control.stop_requested_at is not None:
+                self.last_stop_latency = self.clock() - self.control.stop_requested_at
+
+    def compile(self, text, settings, resume_from=None):
+        """Return the (possibly cached) keystroke plan for text and settings
+
+        When resuming, the plan of the interrupted run is compiled again
+        whatever the settings say now, so its steps line up.
+        """
+        if resume_from is not None:
+            plan = self.plan_cache.get_plan(text, resume_from.strategy, resume_from.coalesce,
+                                            resume_from.paste_batch)
+            return self.humanized(plan, settings)
+        strategy = self.select_strategy(text, settings)
+        # Without pacing there is nothing to wait for between characters,
+        # so runs can be merged into single backend calls
+        coalesce = settings.speed <= 0 and not settings.target_cps
+        paste_batch = 1
+        if uses_word_pastes(strategy) and not coalesce and not self.types_directly(settings):
+            paste_batch = self.clipboard.batch_size(settings.speed)
+        return self.humanized(self.plan_cache.get_plan(text, strategy, coalesce, paste_batch), settings)
+
+    def compile_text(self, text, settings, resume_from=None):
+        """Plan of a run of text, streamed when the text is long
+
+        A text longer than STREAMED_TEXT_CHARS is compiled block by block
+        while it is typed, like a file, so the first key goes out at once
+        and the steps are never all in memory. The length decides, so a
+        resumed run gets the same steps as the one it continues.
+        """
+        if len(text) > STREAMED_TEXT_CHARS:
+            return self.compile_source(StringSource(text), settings, resume_from)
+        return self.compile(text, settings, resume_from)
+
+    def compile_source(self, source, settings, resume_from=None):
+        """Return a StreamingPlan that compiles source while it is read"""
+        if resume_from is not None:
+            plan = StreamingPlan(source, resume_from.strategy, resume_from.coalesce, resume_from.paste_batch)
+            return self.humanized(plan, settings)
+        if settings.lang_mode == "auto":
+            # A pipe cannot be scanned ahead, its runs are sorted out as they
+            # arrive; the mixed strategy types plain English like English mode
+            if source.contains_arabic() is False:
+                strategy = select_strategy(False, settings)
+            else:
+                strategy = mixed_strategy(settings)
+        else:
+            strategy = select_strategy(settings.lang_mode == "arabic", settings)
+        coalesce = settings.speed <= 0 and not settings.target_cps
+        paste_batch = 1
+        if uses_word_pastes(strategy) and not coalesce and not self.types_directly(settings):
+            paste_batch = self.clipboard.batch_size(settings.speed)
+        return self.humanized(StreamingPlan(source, strategy, coalesce, paste_batch), settings)
+
+    def humanized(self, plan, settings):
+        """Wrap plan in a HumanizedPlan when the settings ask for it
+
+        Cached plans stay plain, every run draws its own delays. An
+        unpaced plan has no delays to humanize and is returned as is.
+        """
+        if not settings.humanize or plan.coalesce:
+            return plan
+        nominal = PacingScheduler(unit_delay=settings.speed, cps=settings.target_cps).step_duration
+        return HumanizedPlan(plan, HumanTiming.from_settings(settings), nominal)
+
+    def execute_plan(self, plan, settings, checkpoint=None):
+        """Send every step of a compiled plan to the backend
+
+        With a checkpoint, the steps it has already passed are skipped and
+        it is moved forward after every step that was sent completely.
+        """
+        press, write, sleep, progress = self.backend.press, self.backend.write, self.sleep, self._progress
+        focus = self.backend.focus
+        telemetry = None
+        if settings.instrument:
+            # Wrappers are only installed for instrumented runs, so a normal
+            # run pays nothing for telemetry
+            telemetry = Telemetry(self.clock)
+            press = telemetry.timed("press", press)
+            write = telemetry.timed("write", write)
+            focus = telemetry.timed("focus", focus)
+            sleep = telemetry.timed("pacing_sleep", sleep)
+            progress = telemetry.timed("progress", progress)
+        self.telemetry = self.clipboard.telemetry = telemetry
+        direct = self.types_directly(settings)
+        dispatch = {
+            PRESS: press,
+            WRITE: write,
+            # Plans are the same either way, only where pastes go differs
+            PASTE: write if direct else lambda value: self._paste(value, settings),
+            PASTE_AGAIN: write if direct else lambda value: self.backend.hotkey('ctrl', 'v'),
+            HOTKEY: lambda keys: self.backend.hotkey(*keys),
+            WAIT: sleep,
+            FOCUS: focus,
+        }
+        self.pacer = PacingScheduler(
+            unit_delay=settings.speed,
+            cps=settings.target_cps,
+            catch_up=settings.catch_up,
+            sleep=sleep,
+            clock=self.clock,
+            durations=getattr(plan, "durations", None),
+        )
+        try:
+            return self._send_steps(plan, dispatch, progress, checkpoint)
+        finally:
+            self.last_report = self.pacer.report(self._chars_typed)
+            self.last_telemetry = telemetry.report(self.last_report) if telemetry else None
+            self.telemetry = self.clipboard.telemetry = None
+            self.pacer = None
+
+    def _send_steps(self, plan, dispatch, progress, checkpoint=None):
+        pacer = self.pacer
+        previous = None
+        self._chars_typed = 0
+        steps = plan.steps
+        skipped_chars = 0
+        first_step = 0
+        if checkpoint is not None and checkpoint.step:
+            # The interrupted run already sent these, a streaming plan still
+            # reads and compiles them but nothing reaches the backend
+            first_step = checkpoint.step
+            steps = islice(steps, first_step, None)
+            skipped_chars = checkpoint.chars
+        pacer.start(first_step)
+
+        # Steps may be generated lazily, so the pacing wait of a step happens
+        # just before the next one is sent and never after the last one
+        for actions, chars, units in steps:
+            if previous is not None:
+                pacer.wait(*previous)
+            previous = (units, chars)
+            self._wait_while_paused()
+
+            try:
+                for op, value in actions:
+                    dispatch[op](value)
+            except TypingStopped:
+                raise
+            except Exception as e:
+                if plan.strategy in (ARABIC_PASTE_WORDS, ARABIC_PASTE_WHOLE):
+                    self._status(f"Error pasting Arabic text: {str(e)}")
+                    print(f"Arabic paste error: {str(e)}")
+                else:
+                    self._status(f"Error typing text: {str(e)}")
+                    print(f"Typing error: {str(e)}")
+                return False
+
+            # Update progress based on characters typed
+            self._chars_typed += chars
+            progress(*plan.position(skipped_chars + self._chars_typed))
+            if checkpoint is not None:
+                checkpoint.step += 1
+                checkpoint.chars = skipped_chars + self._chars_typed
+                self.checkpoints.maybe_flush()
+
+        done, total = plan.position(skipped_chars + self._chars_typed)
+        if done < total:
+            # Word modes drop repeated whitespace, finish the bar anyway
+            self._progress(total, total)
+        return True
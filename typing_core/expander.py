@@ -0,0 +1,225 @@
+import queue
+import time
+from collections import deque
+
+
+# Key names the keyboard module reports for keys that type whitespace
+KEY_CHARS = {"space": " ", "enter": "\n", "tab": "\t"}
+
+# Pressed alone these type nothing, an abbreviation goes on across them
+SHIFT_KEYS = frozenset(("shift", "left shift", "right shift", "caps lock", "alt gr"))
+
+# While one of these is held keys are shortcuts, not text
+SHORTCUT_MODIFIERS = frozenset((
+    "ctrl", "left ctrl", "right ctrl", "alt", "left alt", "right alt",
+    "windows", "left windows", "right windows", "command",
+))
+
+# Keystrokes Backspace can undo in the matcher
+HISTORY = 64
+
+# Keys are ignored this long after an expansion, the last injected ones
+# can reach the hook after the run has returned
+SETTLE_TIME = 0.15
+
+
+def expansion_settings(settings):
+    """The settings of a run with no countdown and no pacing
+
+    Unpaced plans are coalesced: ASCII runs become single writes and
+    Arabic runs single pastes, the fastest way out for every backend.
+    """
+    return settings.replace(delay=0, speed=0, target_cps=0, catch_up=False, humanize=False)
+
+
+class AbbreviationMatcher:
+    """Aho-Corasick automaton that finds abbreviations as they are typed
+
+    feed() takes one character and returns the abbreviation that ends
+    with it, or None. A missing transition is worked out once through the
+    failure links and stored in the state's table, so after the first time
+    a character is seen in a state every keystroke is one dict lookup,
+    however many abbreviations there are. With word_start set an
+    abbreviation only counts when the character before it is not a letter
+    or digit (or is not known, right after a reset).
+    """
+
+    def __init__(self, abbreviations=(), word_start=True):
+        self.word_start = word_start
+        # Per state: transitions, failure link, the abbreviation ending
+        # exactly here and the nearest shorter state that ends one
+        self._next = [{}]
+        self._fail = [0]
+        self._output = [None]
+        self._suffix = [0]
+        for abbreviation in abbreviations:
+            if abbreviation:
+                self._add(abbreviation)
+        self._link()
+        self.state = 0
+        # States before and characters of the last keystrokes, for
+        # Backspace and for the word start check
+        self._states = deque(maxlen=HISTORY)
+        self._chars = deque(maxlen=HISTORY)
+
+    def _add(self, abbreviation):
+        state = 0
+        for char in abbreviation:
+            following = self._next[state].get(char)
+            if following is None:
+                following = len(self._next)
+                self._next.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._suffix.append(0)
+                self._next[state][char] = following
+            state = following
+        self._output[state] = abbreviation
+
+    def _link(self):
+        """Failure and output links, breadth first over the trie"""
+        pending = deque(self._next[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, following in self._next[state].items():
+                fail = self._step(self._fail[state], char)
+                self._fail[following] = fail
+                self._suffix[following] = fail if self._output[fail] is not None else self._suffix[fail]
+                pending.append(following)
+
+    def _step(self, state, char):
+        following = self._next[state].get(char)
+        if following is not None:
+            return following
+        if state == 0:
+            return 0
+        return self._step(self._fail[state], char)
+
+    def feed(self, char):
+        """Advance by one typed character, return the abbreviation it completes"""
+        self._states.append(self.state)
+        self._chars.append(char)
+        moves = self._next[self.state]
+        state = moves.get(char)
+        if state is None:
+            state = self._step(self._fail[self.state], char) if self.state else 0
+            # Only filled in once the trie is linked, so it is a shortcut
+            moves[char] = state
+        self.state = state
+        if self._output[state] is None:
+            state = self._suffix[state]
+        # Abbreviations ending here, longest first; rarely more than one
+        while state:
+            abbreviation = self._output[state]
+            if not self.word_start or self._at_word_start(len(abbreviation)):
+                return abbreviation
+            state = self._suffix[state]
+        return None
+
+    def _at_word_start(self, length):
+        if len(self._chars) <= length:
+            return True
+        return not self._chars[-length - 1].isalnum()
+
+    def back(self):
+        """Undo the last feed(), for Backspace"""
+        if self._states:
+            self.state = self._states.pop()
+            self._chars.pop()
+        else:
+            # Past the history the text before the cursor is unknown
+            self.state = 0
+
+    def reset(self):
+        """The cursor moved or the focus changed, start over"""
+        self.state = 0
+        self._states.clear()
+        self._chars.clear()
+
+
+class AbbreviationExpander:
+    """Text expander driven by one global keyboard hook
+
+    keyboard.hook() calls on_event() on the hook thread for every key
+    event on the system. It does a few set lookups and one matcher step,
+    and puts a match on a queue as (abbreviation, name of the saved
+    text); the app drains it and types the snippet as a job. Keys are
+    ignored while is_injecting() is true, and for SETTLE_TIME after
+    settle(), so the engine's own keystrokes never match. update() swaps
+    in a new matcher built from the current abbreviations.
+    """
+
+    def __init__(self, abbreviations=None, is_injecting=None, word_start=True, clock=time.monotonic):
+        self.is_injecting = is_injecting
+        self.word_start = word_start
+        self.clock = clock
+        self.matches = queue.SimpleQueue()
+        self.update(abbreviations or {})
+        self._held = set()
+        self._quiet_until = 0.0
+        self._hook = None
+
+    def update(self, abbreviations):
+        """Match abbreviations, a dict of abbreviation to saved text name"""
+        matcher = AbbreviationMatcher(abbreviations, self.word_start)
+        # Each is replaced by one assignment, the hook thread never sees a
+        # half-built automaton
+        self.matcher = matcher
+        self.abbreviations = dict(abbreviations)
+
+    def start(self):
+        """Install the hook, raises if the keyboard module is unusable"""
+        import keyboard
+        self._keyboard = keyboard
+        self._hook = keyboard.hook(self.on_event)
+
+    def stop(self):
+        if self._hook is not None:
+            self._keyboard.unhook(self._hook)
+            self._hook = None
+
+    def settle(self):
+        """An expansion was typed, ignore what is still on its way"""
+        self._quiet_until = self.clock() + SETTLE_TIME
+        self.matcher.reset()
+
+    def on_event(self, event):
+        # Runs on the keyboard library's thread
+        name = event.name
+        if name is None:
+            return
+        if event.event_type == "up":
+            self._held.discard(name)
+            return
+        if name in SHORTCUT_MODIFIERS:
+            self._held.add(name)
+            return
+        if (self.is_injecting is not None and self.is_injecting()) or self.clock() < self._quiet_until:
+            return
+        matcher = self.matcher
+        if self._held:
+            matcher.reset()
+        elif name == "backspace":
+            matcher.back()
+        elif name not in SHIFT_KEYS:
+            char = KEY_CHARS.get(name, name if len(name) == 1 else None)
+            if char is None:
+                # Arrows, Home, Escape...: the text before the cursor changed
+                matcher.reset()
+                return
+            match = matcher.feed(char)
+            if match is not None:
+                matcher.reset()
+                # None if update() swapped the tables in between
+                name = self.abbreviations.get(match)
+                if name is not None:
+                    self.matches.put((match, name))
+
+    def drain(self):
+        """Matches since the last call, oldest first"""
+        matches = []
+        while True:
+            try:
+                matches.append(self.matches.get_nowait())
+            except queue.Empty:
+                return matches
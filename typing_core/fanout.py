@@ -0,0 +1,97 @@
+import re
+
+from .plan import PASTE, WAIT, FOCUS, PASTE_AGAIN
+
+
+# Separators between window IDs in a list typed by the user
+WINDOW_LIST_RE = re.compile(r"[\s,;]+")
+
+
+def parse_window_id(value):
+    """Window ID from decimal or 0x hex text, as xwininfo and xdotool print them"""
+    if isinstance(value, int):
+        window = value
+    else:
+        try:
+            window = int(str(value).strip(), 0)
+        except ValueError:
+            raise ValueError(f"'{value}' is not a window ID")
+    if window <= 0:
+        raise ValueError(f"'{value}' is not a window ID")
+    return window
+
+
+def parse_window_ids(text):
+    """Window IDs of a comma or space separated list, duplicates dropped"""
+    windows = [parse_window_id(part) for part in WINDOW_LIST_RE.split(text.strip()) if part]
+    return list(dict.fromkeys(windows))
+
+
+class FanOutPlan:
+    """A compiled plan whose every step is sent to several windows in turn
+
+    Each step is split at its waits (typos of a humanized plan) and after
+    its pastes; every piece goes to all targets, with a FOCUS action when
+    the window changes, before the next piece. The pacing waits between
+    steps are still taken once, so N windows are typed in about the time
+    of one. The text of a paste is copied once, the other windows get a
+    PASTE_AGAIN. Windows are visited forwards and backwards in turn, so
+    the window of the last piece keeps the focus for the next one.
+
+    steps is generated while the run goes, like a StreamingPlan's, and
+    durations are those of the plan, the steps stay the same.
+    """
+
+    __slots__ = ("plan", "key", "strategy", "coalesce", "paste_batch", "targets", "durations", "steps")
+
+    def __init__(self, plan, targets):
+        if not targets:
+            raise ValueError("No windows to type into")
+        self.plan = plan
+        self.key = plan.key
+        self.strategy = plan.strategy
+        self.coalesce = plan.coalesce
+        self.paste_batch = plan.paste_batch
+        self.targets = tuple(targets)
+        self.durations = getattr(plan, "durations", None)
+        self.steps = self._fan_out(plan.steps)
+
+    def position(self, chars_typed):
+        return self.plan.position(chars_typed)
+
+    def _fan_out(self, steps):
+        order = list(self.targets)
+        focused = None
+        for actions, chars, units in steps:
+            sent = []
+            piece = []
+            for action in actions:
+                op = action[0]
+                if op == WAIT:
+                    focused = self._spread(piece, order, focused, sent)
+                    sent.append(action)
+                    piece = []
+                    continue
+                piece.append(action)
+                if op == PASTE:
+                    focused = self._spread(piece, order, focused, sent)
+                    piece = []
+            focused = self._spread(piece, order, focused, sent)
+            yield tuple(sent), chars, units
+
+    @staticmethod
+    def _spread(piece, order, focused, sent):
+        """Append piece for every window in order to sent, return the focused one"""
+        if not piece:
+            return focused
+        again = None
+        if piece[-1][0] == PASTE:
+            # The clipboard still holds the text after the first window
+            again = piece[:-1] + [(PASTE_AGAIN, piece[-1][1])]
+        for i, window in enumerate(order):
+            if window != focused:
+                sent.append((FOCUS, window))
+                focused = window
+            sent.extend(piece if again is None or i == 0 else again)
+        order.reverse()
+        return focused
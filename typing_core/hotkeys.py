@@ -0,0 +1,68 @@
+import queue
+
+
+# Default global hotkeys and the command each one sends
+DEFAULT_HOTKEYS = {"f6": "start", "f7": "pause", "f8": "stop"}
+
+# Keys the engine itself may send, a hotkey on one of them is ignored while
+# the engine is typing since the press is most likely our own
+SELF_TYPED_KEYS = {"space", "enter", "tab", "ctrl", "v"}
+
+
+class HotkeyListener:
+    """Global hotkeys that turn key presses into commands on a queue
+
+    One keyboard.hook() calls on_event() for every key event on the
+    system, including each keystroke the engine injects. While
+    is_injecting() returns True the event is dropped right there, after a
+    single lookup among the bindings the engine can never type (F8 still
+    stops a run). Otherwise key downs are looked up in the bindings.
+
+    The callback never touches the GUI: commands are put on a queue that the
+    GUI drains from its own thread. Commands in direct are also called on
+    the hook thread right away, for thread-safe actions like engine.stop()
+    that should not wait for the next poll.
+    """
+
+    def __init__(self, bindings=None, direct=None, is_injecting=None):
+        self.bindings = dict(bindings or DEFAULT_HOTKEYS)
+        self.direct = direct or {}
+        self.is_injecting = is_injecting
+        self.commands = queue.SimpleQueue()
+        # Bindings that still work while the engine types
+        self.while_typing = {key: command for key, command in self.bindings.items()
+                             if key not in SELF_TYPED_KEYS and len(key) > 1}
+        self._hook = None
+
+    def start(self):
+        """Install the hook, raises if the keyboard module is unusable"""
+        import keyboard
+        self._keyboard = keyboard
+        self._hook = keyboard.hook(self.on_event)
+
+    def stop(self):
+        if self._hook is not None:
+            self._keyboard.unhook(self._hook)
+            self._hook = None
+
+    def on_event(self, event):
+        # Runs on the keyboard library's thread
+        if self.is_injecting is not None and self.is_injecting():
+            command = self.while_typing.get(event.name)
+        else:
+            command = self.bindings.get(event.name)
+        if command is None or event.event_type != "down":
+            return
+        action = self.direct.get(command)
+        if action is not None:
+            action()
+        self.commands.put(command)
+
+    def drain(self):
+        """Commands received since the last call, oldest first"""
+        commands = []
+        while True:
+            try:
+                commands.append(self.commands.get_nowait())
+            except queue.Empty:
+                return commands
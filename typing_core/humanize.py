@@ -0,0 +1,235 @@
+import math
+import random
+from array import array
+from itertools import islice
+
+from .plan import PRESS, WRITE, PASTE, WAIT
+
+
+# Spread of the delays between keys, as a coefficient of variation
+DEFAULT_JITTER = 0.35
+
+# Distributions the per-key delays can be drawn from, all with mean 1
+DISTRIBUTIONS = ("lognormal", "gamma")
+
+# Steps of a streamed plan humanized at once, delays are drawn per block
+BLOCK_STEPS = 1024
+
+# Common English letter pairs are typed faster than the average
+FAST_BIGRAMS = frozenset((
+    "th", "he", "in", "er", "an", "re", "on", "at", "en", "nd", "ti", "es", "or",
+    "te", "of", "ed", "is", "it", "al", "ar", "st", "to", "nt", "ng", "se", "ha",
+    "as", "ou", "io", "le", "ve", "co", "me", "de", "hi", "ri", "ro", "ic", "ne",
+    "ea", "ra", "ce",
+))
+
+# Delay factors relative to the average key
+FAST_BIGRAM_FACTOR = 0.75
+REPEAT_FACTOR = 0.85
+WORD_START_FACTOR = 1.3
+SENTENCE_START_FACTOR = 1.8
+SHIFT_FACTOR = 1.2
+
+SENTENCE_END = ".!?\n"
+SHIFTED_SYMBOLS = '~!@#$%^&*()_+{}|:"<>?'
+
+# A typo is noticed after this many of its step's delays, and the
+# backspace is followed by this many before the right key
+TYPO_NOTICE_FACTOR = 2.5
+TYPO_FIX_FACTOR = 1.0
+
+KEY_TEXT = {"space": " ", "enter": "\n", "tab": "\t"}
+
+QWERTY_ROWS = ("qwertyuiop", "asdfghjkl", "zxcvbnm")
+
+
+def _neighbor_keys():
+    """Letters next to each letter on a QWERTY keyboard"""
+    neighbors = {}
+    for r, row in enumerate(QWERTY_ROWS):
+        for i, letter in enumerate(row):
+            near = [row[j] for j in (i - 1, i + 1) if 0 <= j < len(row)]
+            if r > 0:
+                above = QWERTY_ROWS[r - 1]
+                near += [above[j] for j in (i, i + 1) if j < len(above)]
+            if r < len(QWERTY_ROWS) - 1:
+                below = QWERTY_ROWS[r + 1]
+                near += [below[j] for j in (i - 1, i) if 0 <= j < len(below)]
+            neighbors[letter] = "".join(near)
+    return neighbors
+
+
+NEIGHBOR_KEYS = _neighbor_keys()
+
+
+def _load_numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def step_text(actions):
+    """Text a step sends, special keys as their characters"""
+    parts = []
+    for op, value in actions:
+        if op == PRESS:
+            parts.append(KEY_TEXT.get(value, value if len(value) == 1 else ""))
+        elif op in (WRITE, PASTE):
+            parts.append(value)
+    return "".join(parts)
+
+
+def key_factor(previous, char):
+    """Delay factor of typing char right after previous"""
+    if not previous or not char:
+        return 1.0
+    factor = 1.0
+    if (previous + char).lower() in FAST_BIGRAMS:
+        factor *= FAST_BIGRAM_FACTOR
+    elif previous == char:
+        factor *= REPEAT_FACTOR
+    if previous in SENTENCE_END:
+        factor *= SENTENCE_START_FACTOR
+    elif previous.isspace():
+        factor *= WORD_START_FACTOR
+    if char.isupper() or char in SHIFTED_SYMBOLS:
+        factor *= SHIFT_FACTOR
+    return factor
+
+
+class HumanTiming:
+    """Draws randomized key delays in bulk
+
+    delays() scales a whole block of nominal delays at once, with NumPy
+    when it is installed and with the random module into an array
+    otherwise. Each block keeps its nominal total, so the typing rate the
+    settings ask for is still met on average.
+    """
+
+    def __init__(self, jitter=DEFAULT_JITTER, distribution="lognormal", typo_rate=0.0,
+                 seed=None, use_numpy=True):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown delay distribution '{distribution}'")
+        self.jitter = max(0.0, jitter)
+        self.distribution = distribution
+        self.typo_rate = typo_rate
+        self.numpy = _load_numpy() if use_numpy else None
+        if self.numpy is not None:
+            self._rng = self.numpy.random.default_rng(seed)
+        else:
+            self._random = random.Random(seed)
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings.jitter, settings.distribution, settings.typo_rate, settings.seed)
+
+    def _multipliers(self, count):
+        """count random factors with mean 1 and the configured spread"""
+        cv = self.jitter
+        if self.distribution == "gamma":
+            shape, scale = 1.0 / (cv * cv), cv * cv
+            if self.numpy is not None:
+                return self._rng.gamma(shape, scale, count)
+            gamma = self._random.gammavariate
+            return array('d', [gamma(shape, scale) for _ in range(count)])
+        sigma = math.sqrt(math.log1p(cv * cv))
+        mu = -sigma * sigma / 2
+        if self.numpy is not None:
+            return self._rng.lognormal(mu, sigma, count)
+        lognormal = self._random.lognormvariate
+        return array('d', [lognormal(mu, sigma) for _ in range(count)])
+
+    def delays(self, nominal, factors):
+        """Randomized delays for a block, as an array('d')"""
+        if not self.jitter:
+            return array('d', [n * f for n, f in zip(nominal, factors)])
+        target = sum(nominal)
+        if self.numpy is not None:
+            delays = self.numpy.asarray(nominal) * self.numpy.asarray(factors) * self._multipliers(len(nominal))
+            total = float(delays.sum())
+            if total > 0:
+                delays *= target / total
+            return array('d', delays.tobytes())
+        delays = array('d', map(lambda n, f, m: n * f * m, nominal, factors, self._multipliers(len(nominal))))
+        total = sum(delays)
+        if total > 0:
+            scale = target / total
+            for i in range(len(delays)):
+                delays[i] *= scale
+        return delays
+
+    def rolls(self, count):
+        """count uniform numbers in [0, 1), to pick the steps with typos"""
+        if self.numpy is not None:
+            return self._rng.random(count).tolist()
+        return [self._random.random() for _ in range(count)]
+
+    def typo_key(self, char, roll):
+        """A key next to char, chosen by roll"""
+        near = NEIGHBOR_KEYS[char.lower()]
+        wrong = near[int(roll / self.typo_rate * len(near)) % len(near)]
+        return wrong.upper() if char.isupper() else wrong
+
+
+class HumanizedPlan:
+    """A compiled plan with precomputed, humanized delays after every step
+
+    durations[i] is how long step i may take before the next one is due;
+    the PacingScheduler only reads it. Steps of a KeystrokePlan are all
+    humanized here, those of a StreamingPlan one block at a time as the
+    source is read. Typos are added inside the steps they belong to (wrong
+    key, wait, backspace, wait, right key), so the number of steps, and
+    with it checkpoints, stay the same as in the plain plan.
+    """
+
+    __slots__ = ("plan", "key", "strategy", "coalesce", "paste_batch", "timing", "durations", "steps")
+
+    def __init__(self, plan, timing, nominal_duration):
+        self.plan = plan
+        self.key = plan.key
+        self.strategy = plan.strategy
+        self.coalesce = plan.coalesce
+        self.paste_batch = plan.paste_batch
+        self.timing = timing
+        self.durations = array('d')
+        steps = self._humanize(plan.steps, nominal_duration)
+        self.steps = tuple(steps) if isinstance(plan.steps, tuple) else steps
+
+    def position(self, chars_typed):
+        return self.plan.position(chars_typed)
+
+    def _humanize(self, steps, nominal_duration):
+        timing = self.timing
+        steps = iter(steps)
+        previous = None
+        while True:
+            block = list(islice(steps, BLOCK_STEPS))
+            if not block:
+                return
+            nominal = []
+            factors = []
+            texts = []
+            for actions, chars, units in block:
+                text = step_text(actions)
+                nominal.append(nominal_duration(units, chars))
+                factors.append(key_factor(previous, text[:1]))
+                texts.append(text)
+                if text:
+                    previous = text[-1]
+            delays = timing.delays(nominal, factors)
+
+            if timing.typo_rate > 0:
+                for i, roll in enumerate(timing.rolls(len(block))):
+                    text = texts[i]
+                    if roll < timing.typo_rate and len(text) == 1 and text.lower() in NEIGHBOR_KEYS:
+                        actions, chars, units = block[i]
+                        wait = delays[i]
+                        block[i] = ((PRESS, timing.typo_key(text, roll)), (WAIT, wait * TYPO_NOTICE_FACTOR),
+                                    (PRESS, 'backspace'), (WAIT, wait * TYPO_FIX_FACTOR)) + actions, chars, units
+                        # The pacing deadline moves by the time the typo took
+                        delays[i] += wait * (TYPO_NOTICE_FACTOR + TYPO_FIX_FACTOR)
+
+            self.durations.extend(delays)
+            yield from block
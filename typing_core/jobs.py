@@ -0,0 +1,343 @@
+import itertools
+import os
+import re
+import threading
+
+from .engine import TypingSettings
+from .sources import FileSource, StreamSource
+
+
+# Paragraphs are separated by blank lines, sections are ranges of them
+PARAGRAPH_RE = re.compile(r"\n[ \t]*\n")
+
+# Weight of the latest run in the measured typing rate
+CPS_SMOOTHING = 0.3
+
+
+def paragraphs(text):
+    return [part for part in PARAGRAPH_RE.split(text.strip()) if part.strip()]
+
+
+def text_section(text, first=None, last=None):
+    """Paragraphs first to last (1-based, inclusive) of text, all of it by default"""
+    if not first and not last:
+        return text
+    parts = paragraphs(text)
+    return "\n\n".join(parts[(first or 1) - 1:last or len(parts)])
+
+
+class TypingJob:
+    """One unit of work for a TypingWorker: what to type and how
+
+    Exactly one of text, path or stream is set. Files are only opened when
+    the job starts, so a long queue does not hold file handles. With resume
+    set, an interrupted run of the same text or file is continued. With
+    previous set, the window already holds that text and only the changes
+    to text are typed, see TypingEngine.retype(). With abbreviation set,
+    it was just typed before the cursor and is replaced by text, see
+    TypingEngine.expand(). With targets set, text is typed into each of
+    those windows (by ID) in one run, see TypingEngine.fan_out().
+
+    Higher priorities run first, equal ones in the order they were added.
+    Jobs with queued set belong to the scheduled queue and wait while the
+    worker is held; others (a Start in the GUI) run as soon as the worker is
+    free. record describes a job that can be rebuilt after a restart, see
+    job_from_record(); its "resume" entry is set once the job has started
+    typing, so only then is a checkpoint taken to be its own.
+    """
+
+    def __init__(self, settings, text=None, path=None, stream=None, name=None, resume=False,
+                 priority=0, queued=False, record=None, previous=None, abbreviation=None, targets=None):
+        self.settings = settings
+        self.resume = resume
+        self.text = text
+        self.previous = previous
+        self.abbreviation = abbreviation
+        self.targets = targets
+        self.path = path
+        self.stream = stream
+        self.name = name or (path if path is not None else "stdin" if stream is not None else "text")
+        self.priority = priority
+        self.queued = queued
+        self.record = record
+        # Row id in the store's job journal, None if not persisted
+        self.id = None
+        self.sequence = 0
+        self.completed = None
+        self.report = None
+        self.telemetry = None
+        self.error = None
+        self.done = threading.Event()
+
+    def sort_key(self):
+        return (-self.priority, self.sequence)
+
+    def length(self):
+        """Characters (bytes for files) to type, None if unknown"""
+        if self.text is not None:
+            return len(self.text)
+        if self.path is not None:
+            try:
+                return os.path.getsize(self.path)
+            except OSError:
+                return None
+        return None
+
+    def run(self, engine):
+        """Type the job with engine, return True if it finished"""
+        if self.abbreviation is not None and self.text is not None:
+            return engine.expand(self.abbreviation, self.text, self.settings)
+        if self.targets and self.text is not None:
+            return engine.fan_out(self.text, self.targets, self.settings)
+        if self.previous is not None and self.text is not None:
+            return engine.retype(self.previous, self.text, self.settings)
+        if self.text is not None:
+            return engine.run(self.text, self.settings, resume=self.resume)
+        if self.path is not None:
+            source = FileSource(self.path)
+        else:
+            source = StreamSource(self.stream)
+        try:
+            return engine.run_source(source, self.settings, resume=self.resume)
+        finally:
+            source.close()
+
+
+def saved_text_job(store, name, settings, first=None, last=None, priority=0):
+    """Queued job for a saved text or a range of its paragraphs"""
+    body = store.get(name)
+    if body is None:
+        raise ValueError(f"No saved text named '{name}'")
+    label = name if not first and not last else f"{name} (paragraphs {first or 1}-{last or 'end'})"
+    return TypingJob(settings, text=text_section(body, first, last), name=label,
+                     priority=priority, queued=True,
+                     record={"saved": name, "first": first, "last": last})
+
+
+def job_from_record(store, record, settings, priority):
+    """Rebuild a journaled job, saved texts are read again from the store
+
+    The job resumes from its checkpoint only if the record says it had
+    started typing before.
+    """
+    if "saved" in record:
+        job = saved_text_job(store, record["saved"], settings, record.get("first"),
+                             record.get("last"), priority)
+        job.record = record
+    else:
+        job = TypingJob(settings, path=record["file"], priority=priority, queued=True, record=record)
+    job.resume = bool(record.get("resume"))
+    return job
+
+
+class TypingWorker:
+    """Single long-lived thread that runs TypingJobs by priority
+
+    Replaces spawning a thread per run: the engine, its backend and its plan
+    cache are created once and reused by every job. While held, queued jobs
+    wait and only unqueued ones run. A queued job that is stopped goes back
+    to the front and holds the queue, so it resumes from its checkpoint on
+    the next release. With a journal (a SavedTextStore), queued jobs with a
+    record stay in the database until they finish or are removed, and
+    restore() queues them again after a restart.
+    """
+
+    def __init__(self, engine, on_job_done=None, journal=None, held=False, on_job_start=None):
+        self.engine = engine
+        self.on_job_done = on_job_done
+        self.on_job_start = on_job_start
+        self.journal = journal
+        self.held = held
+        self.current_job = None
+        # Smoothed characters per second of finished jobs, for eta()
+        self.measured_cps = None
+        self._pending = []
+        self._sequence = itertools.count()
+        self._closing = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._loop, name="typing-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, job):
+        if self.journal is not None and job.record is not None and job.id is None:
+            try:
+                job.id = self.journal.add_job(job.record, job.priority, job.settings.as_dict())
+            except Exception as e:
+                print(f"Error saving queued job: {e}")
+        with self._condition:
+            job.sequence = next(self._sequence)
+            self._pending.append(job)
+            self._pending.sort(key=TypingJob.sort_key)
+            self._condition.notify_all()
+        return job
+
+    def restore(self):
+        """Queue the journaled jobs left from an earlier session"""
+        jobs = []
+        for job_id, record, priority, settings in self.journal.jobs():
+            try:
+                job = job_from_record(self.journal, record, TypingSettings.from_dict(settings), priority)
+            except Exception as e:
+                print(f"Dropping queued job {record}: {e}")
+                self.journal.remove_job(job_id)
+                continue
+            job.id = job_id
+            jobs.append(self.submit(job))
+        return jobs
+
+    def jobs(self):
+        """Waiting jobs in the order they will run"""
+        with self._condition:
+            return list(self._pending)
+
+    def pending(self):
+        """Number of jobs waiting, not counting the one being typed"""
+        return len(self._pending)
+
+    def busy(self):
+        """True while a job is typed or one that may run is waiting"""
+        with self._condition:
+            return self.current_job is not None or self._next_index() is not None
+
+    def hold(self):
+        """Let the running job finish but start no more queued jobs"""
+        with self._condition:
+            self.held = True
+
+    def release(self):
+        with self._condition:
+            self.held = False
+            self._condition.notify_all()
+
+    def remove(self, job):
+        """Drop a waiting job, return False if it already started"""
+        with self._condition:
+            if job not in self._pending:
+                return False
+            self._pending.remove(job)
+        self._forget(job)
+        job.completed = False
+        job.done.set()
+        return True
+
+    def eta(self):
+        """Seconds until the current and all waiting jobs are typed, None if unknown"""
+        with self._condition:
+            jobs = list(self._pending)
+            current = self.current_job
+        total = 0.0
+        for job in ([current] if current is not None else []) + jobs:
+            length = job.length()
+            cps = job.settings.target_cps or self.measured_cps
+            if not cps and job.settings.speed > 0:
+                cps = 1.0 / job.settings.speed
+            if length is None or not cps:
+                return None
+            if job is current:
+                length = max(0, length - self.engine.chars_typed)
+            else:
+                total += job.settings.delay
+            total += length / cps
+        return total
+
+    def _next_index(self):
+        for i, job in enumerate(self._pending):
+            if not (self.held and job.queued):
+                return i
+        return None
+
+    def _mark_started(self, job):
+        """Journal that job has typed, a restart resumes it from its checkpoint"""
+        if self.journal is None or job.id is None or job.record.get("resume"):
+            return
+        job.record["resume"] = True
+        try:
+            self.journal.update_job(job.id, job.record)
+        except Exception as e:
+            print(f"Error updating queued job: {e}")
+
+    def _forget(self, job):
+        if self.journal is not None and job.id is not None:
+            try:
+                self.journal.remove_job(job.id)
+            except Exception as e:
+                print(f"Error removing queued job: {e}")
+            job.id = None
+
+    def _loop(self):
+        while True:
+            with self._condition:
+                index = self._next_index()
+                while index is None:
+                    if self._closing:
+                        return
+                    self._condition.wait()
+                    index = self._next_index()
+                job = self.current_job = self._pending.pop(index)
+                # A Stop from here on is for this job, even before it starts
+                self.engine.begin_run()
+            if self.on_job_start:
+                self.on_job_start(job)
+            self._mark_started(job)
+            stopped = False
+            try:
+                # A job that never gets to type must not take the last one's report
+                self.engine.last_report = self.engine.last_telemetry = None
+                job.completed = job.run(self.engine)
+                job.report = self.engine.last_report
+                job.telemetry = self.engine.last_telemetry
+                stopped = not job.completed and self.engine.control.stopped
+            except Exception as e:
+                job.completed = False
+                job.error = e
+                print(f"Job error ({job.name}): {str(e)}")
+
+            if stopped and job.queued:
+                # Back to the front of the queue, it resumes where it stopped
+                job.resume = True
+                with self._condition:
+                    self.held = True
+                    self._pending.append(job)
+                    self._pending.sort(key=TypingJob.sort_key)
+                    self.current_job = None
+            else:
+                if job.completed and job.report and job.report.achieved_cps:
+                    cps = job.report.achieved_cps
+                    self.measured_cps = cps if self.measured_cps is None else (
+                        (1 - CPS_SMOOTHING) * self.measured_cps + CPS_SMOOTHING * cps)
+                self._forget(job)
+                with self._condition:
+                    self.current_job = None
+                job.done.set()
+            if self.on_job_done:
+                self.on_job_done(job)
+            with self._condition:
+                self._condition.notify_all()
+
+    def join(self):
+        """Wait until every job that may run has finished"""
+        with self._condition:
+            while self.current_job is not None or self._next_index() is not None:
+                self._condition.wait()
+
+    def cancel(self):
+        """Drop the waiting jobs and stop the one being typed"""
+        with self._condition:
+            dropped = self._pending
+            self._pending = []
+        for job in dropped:
+            self._forget(job)
+            job.completed = False
+            job.done.set()
+        self.engine.stop()
+
+    def shutdown(self, wait=True):
+        """Let the jobs that may run finish, then end the worker thread
+
+        Held queued jobs stay in the journal for the next session.
+        """
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        if wait:
+            self._thread.join()
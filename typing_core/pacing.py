@@ -0,0 +1,113 @@
+import time
+
+
+# Average word length used to convert words per minute, spaces included
+CHARS_PER_WORD = 5
+
+# Falling further behind than this (a slow backend, a stalled window) resets
+# the schedule instead of bursting to catch up, unless catch up is enabled
+MAX_LAG = 1.0
+
+
+def wpm_to_cps(wpm):
+    """Convert a words-per-minute target to characters per second"""
+    return wpm * CHARS_PER_WORD / 60.0
+
+
+class PacingReport:
+    """Requested and achieved typing rate of one run"""
+
+    __slots__ = ("chars", "elapsed", "paused", "requested_cps", "achieved_cps")
+
+    def __init__(self, chars, elapsed, paused, requested_cps, achieved_cps):
+        self.chars = chars
+        self.elapsed = elapsed
+        self.paused = paused
+        self.requested_cps = requested_cps
+        self.achieved_cps = achieved_cps
+
+    def summary(self):
+        """Short human readable line for the status bar"""
+        if self.requested_cps:
+            return f"{self.achieved_cps:.1f} chars/s, target {self.requested_cps:.1f}"
+        return f"{self.achieved_cps:.1f} chars/s"
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class PacingScheduler:
+    """Paces steps against absolute deadlines on a monotonic clock
+
+    Time spent in the backend between two steps is taken out of the next
+    wait instead of being added to it, so the configured rate is met. With a
+    target cps every step is weighted by its characters, otherwise by its
+    units (characters or words) times the per-unit delay. When catch_up is
+    set, time lost to pauses is made up afterwards by typing unpaced until
+    the schedule is reached again. With durations (a humanized plan's
+    precomputed delays, one per step) the delay of each step is read from
+    there instead.
+    """
+
+    def __init__(self, unit_delay=0.0, cps=None, catch_up=False,
+                 sleep=time.sleep, clock=time.perf_counter, durations=None):
+        self.unit_delay = unit_delay
+        self.cps = cps
+        self.catch_up = catch_up
+        self.sleep = sleep
+        self.clock = clock
+        self.durations = durations
+        self.start_time = None
+        self.deadline = None
+        self.scheduled = 0.0
+        self.paused = 0.0
+        self.step = 0
+
+    def start(self, first_step=0):
+        """Start the clock, first_step is where a resumed run picks up"""
+        self.start_time = self.clock()
+        self.deadline = self.start_time
+        self.scheduled = 0.0
+        self.paused = 0.0
+        self.step = first_step
+
+    def step_duration(self, units, chars):
+        """Seconds a step of that size is allowed to take"""
+        if self.cps:
+            return chars / self.cps
+        return self.unit_delay * units
+
+    def wait(self, units, chars):
+        """Sleep until the deadline of the step that was just sent"""
+        if self.durations is not None:
+            duration = self.durations[self.step]
+            self.step += 1
+        else:
+            duration = self.step_duration(units, chars)
+        self.scheduled += duration
+        self.deadline += duration
+
+        remaining = self.deadline - self.clock()
+        if remaining > 0:
+            self.sleep(remaining)
+        elif remaining < -MAX_LAG and not self.catch_up:
+            # Too far behind to catch up smoothly, restart from now
+            self.deadline = self.clock()
+
+    def add_pause(self, duration):
+        """Account for time the run spent paused"""
+        self.paused += duration
+        if not self.catch_up:
+            self.deadline += duration
+
+    def report(self, chars):
+        """Build the PacingReport for a run that sent chars characters"""
+        elapsed = self.clock() - self.start_time - self.paused
+        achieved = chars / elapsed if elapsed > 0 else 0.0
+        if self.cps:
+            requested = self.cps
+        elif self.scheduled > 0:
+            requested = chars / self.scheduled
+        else:
+            requested = None
+        return PacingReport(chars, elapsed, self.paused, requested, achieved)
@@ -0,0 +1,388 @@
+import hashlib
+import re
+from collections import OrderedDict, deque
+from itertools import islice
+
+from .scripts import segment_scripts, ASCII
+
+
+# Backend operations a plan can contain
+PRESS = "press"
+WRITE = "write"
+PASTE = "paste"
+# A key combination, value is the tuple of keys
+HOTKEY = "hotkey"
+# Not a backend call: the engine sleeps for value seconds, see HumanizedPlan
+WAIT = "wait"
+# Keys that follow go to the window with ID value, see FanOutPlan
+FOCUS = "focus"
+# Ctrl+V of the text the last PASTE copied, typed as keys where PASTE is
+PASTE_AGAIN = "paste_again"
+
+# Whitespace that is sent as a named key rather than as text
+SPECIAL_KEYS = {' ': 'space', '\n': 'enter', '\t': 'tab'}
+
+# When pacing is off, merged actions are grouped into steps of about this many
+# characters so progress, pause and stop still happen regularly
+COALESCED_STEP_CHARS = 256
+
+# Typing strategies, picked from the language and mode settings
+ENGLISH_CHARACTER = "english_character"
+ENGLISH_WORD = "english_word"
+ARABIC_CHARACTER = "arabic_character"
+ARABIC_WORD = "arabic_word"
+ARABIC_PASTE_WORDS = "arabic_paste_words"
+ARABIC_PASTE_WHOLE = "arabic_paste_whole"
+
+# Mixed-script text is compiled per segment, the strategy name carries the
+# English mode and the paste granularity: "mixed:<english>:<paste>"
+MIXED = "mixed"
+
+# Strategies that paste one word at a time and can batch several per paste
+WORD_PASTE_STRATEGIES = (ARABIC_WORD, ARABIC_PASTE_WORDS)
+
+# A compiled step holds its tuples for every character, well over 100
+# bytes each: texts longer than this are compiled while they are typed
+# instead of up front, and never cached
+STREAMED_TEXT_CHARS = 64 * 1024
+
+# Characters of text all plans in a PlanCache may cover together
+MAX_CACHED_CHARS = 256 * 1024
+
+# Words and the whitespace between them, for word typing inside ASCII runs
+WORD_TOKEN_RE = re.compile(r"\S+|\s+")
+
+
+def is_plain_ascii(char):
+    """Printable ASCII can be sent with a single write() call"""
+    return ' ' <= char <= '~'
+
+
+class KeystrokePlan:
+    """Compiled list of steps for one text and one set of mode settings
+
+    Each step is a tuple (actions, chars, units): the actions are (operation,
+    value) pairs sent to the backend together, chars is how many characters
+    of the source text the step covers and units how many characters or words
+    it stands for. The engine waits units times the pacing delay after it.
+    coalesce and paste_batch are the compile options, with the strategy they
+    are all that is needed to compile the same steps again.
+    """
+
+    __slots__ = ("key", "strategy", "steps", "total_chars", "coalesce", "paste_batch")
+
+    def __init__(self, key, strategy, steps, total_chars, coalesce=False, paste_batch=1):
+        self.key = key
+        self.strategy = strategy
+        self.steps = steps
+        self.total_chars = total_chars
+        self.coalesce = coalesce
+        self.paste_batch = paste_batch
+
+    def action_count(self):
+        """Number of backend calls the plan will make"""
+        return sum(len(actions) for actions, _, _ in self.steps)
+
+    def position(self, chars_typed):
+        """Progress as (done, total) after chars_typed characters"""
+        return min(chars_typed, self.total_chars), self.total_chars
+
+
+class StreamingPlan:
+    """Plan for a TextSource, its steps are compiled while the source is read
+
+    steps is a one-shot generator, so streaming plans are never cached.
+    Progress is reported in bytes of the source when its size is known:
+    the characters typed are converted with the UTF-8 length of each
+    compiled block, so text that was read ahead but not typed yet does not
+    count.
+    """
+
+    __slots__ = ("key", "strategy", "steps", "source", "coalesce", "paste_batch",
+                 "_blocks", "_read_chars", "_read_bytes", "_chars", "_bytes")
+
+    def __init__(self, source, strategy, coalesce=False, paste_batch=1):
+        self.key = None
+        self.strategy = strategy
+        self.source = source
+        self.coalesce = coalesce
+        self.paste_batch = paste_batch
+        blocks = whitespace_aligned(source.blocks())
+        if source.size and not source.counts_chars:
+            blocks = self._track(blocks)
+        # (first character, text) of the compiled blocks not fully typed yet
+        self._blocks = deque()
+        # Characters and bytes compiled so far, and those typed so far
+        self._read_chars = self._read_bytes = 0
+        self._chars = self._bytes = 0
+        self.steps = iter_steps(blocks, strategy, coalesce, paste_batch)
+
+    def _track(self, blocks):
+        for block in blocks:
+            self._blocks.append((self._read_chars, block))
+            self._read_chars += len(block)
+            self._read_bytes += len(block.encode("utf-8", "surrogatepass"))
+            yield block
+
+    def position(self, chars_typed):
+        """Progress as (done, total), total is 0 when the size is unknown"""
+        if not self.source.size:
+            return chars_typed, 0
+        if self.source.counts_chars:
+            return min(chars_typed, self.source.size), self.source.size
+        # Only the newly typed part is encoded, progress is reported per step
+        chars_typed = min(chars_typed, self._read_chars)
+        blocks = self._blocks
+        while self._chars < chars_typed:
+            first, block = blocks[0]
+            end = min(chars_typed, first + len(block))
+            self._bytes += len(block[self._chars - first:end - first].encode("utf-8", "surrogatepass"))
+            self._chars = end
+            if end == first + len(block):
+                blocks.popleft()
+        return min(self._bytes, self.source.size), self.source.size
+
+
+def mixed_strategy(settings):
+    """Strategy for auto mode text that contains Arabic
+
+    ASCII runs are typed with the English mode, every other run is pasted
+    per character, per word or whole, following the Arabic modes.
+    """
+    if settings.arabic_mode == "paste":
+        paste = "words" if settings.speed > 0.1 else "whole"
+    else:
+        paste = settings.arabic_word_mode
+    return f"{MIXED}:{settings.english_mode}:{paste}"
+
+
+def uses_word_pastes(strategy):
+    """True if the strategy pastes word by word and can batch words"""
+    return strategy in WORD_PASTE_STRATEGIES or (
+        strategy.startswith(MIXED) and strategy.endswith(("word", "words")))
+
+
+def select_strategy(is_arabic, settings):
+    """Map the language decision and the mode settings to a strategy"""
+    if is_arabic:
+        if settings.arabic_mode == "paste":
+            # Slow speeds paste word by word, fast ones paste everything at once
+            return ARABIC_PASTE_WORDS if settings.speed > 0.1 else ARABIC_PASTE_WHOLE
+        if settings.arabic_word_mode == "character":
+            return ARABIC_CHARACTER
+        return ARABIC_WORD
+    if settings.english_mode == "character":
+        return ENGLISH_CHARACTER
+    return ENGLISH_WORD
+
+
+def _character_units(text, paste, coalesce):
+    """One unit per character, whitespace mapped to its special key"""
+    for char in text:
+        key = SPECIAL_KEYS.get(char)
+        if key is not None and not (coalesce and char == ' '):
+            yield ((PRESS, key),), 1, 1
+        elif paste:
+            yield ((PASTE, char),), 1, 1
+        elif coalesce and is_plain_ascii(char):
+            yield ((WRITE, char),), 1, 1
+        else:
+            yield ((PRESS, char),), 1, 1
+
+
+def _word_units(words, op, coalesce, batch=1):
+    """Words followed by a space, like text.split() typing
+
+    words can be any iterable, it is consumed lazily. With batch above 1,
+    that many words are joined into a single action.
+    """
+    words = iter(words)
+    group = list(islice(words, batch))
+    while group:
+        next_group = list(islice(words, batch))
+        value = " ".join(group)
+        if not next_group:
+            yield ((op, value),), len(value), len(group)
+        elif coalesce:
+            yield ((op, value), (op, ' ')), len(value) + 1, len(group)
+        else:
+            yield ((op, value), (PRESS, 'space')), len(value) + 1, len(group)
+        group = next_group
+
+
+def _ascii_word_units(run, coalesce):
+    """Words of an ASCII run as writes, the whitespace between them as keys"""
+    for token in WORD_TOKEN_RE.findall(run):
+        if not token.isspace():
+            yield ((WRITE, token),), len(token), 1
+        else:
+            # Whitespace is part of the word before it for pacing
+            for actions, chars, _ in _character_units(token, False, coalesce):
+                yield actions, chars, 0
+
+
+def _mixed_units(text, english_mode, paste, coalesce, batch):
+    """Units for text with several scripts, segment by segment"""
+    for kind, run in segment_scripts(text):
+        if kind == ASCII:
+            if english_mode == "character":
+                yield from _character_units(run, False, coalesce)
+            else:
+                yield from _ascii_word_units(run, coalesce)
+        elif paste == "whole":
+            yield ((PASTE, run),), len(run), 1
+        elif paste == "character":
+            yield from _character_units(run, True, coalesce)
+        else:
+            # Right-to-left runs never start or end with whitespace
+            yield from _word_units(run.split(), PASTE, coalesce and paste == "word", batch)
+
+
+def _merge(units):
+    """Merge adjacent write or paste actions into larger steps"""
+    actions = []
+    chars = 0
+    count = 0
+    for unit_actions, unit_chars, unit_count in units:
+        for op, value in unit_actions:
+            if actions and op != PRESS and actions[-1][0] == op:
+                actions[-1] = (op, actions[-1][1] + value)
+            else:
+                actions.append((op, value))
+        chars += unit_chars
+        count += unit_count
+        if chars >= COALESCED_STEP_CHARS:
+            yield tuple(actions), chars, count
+            actions = []
+            chars = 0
+            count = 0
+    if actions:
+        yield tuple(actions), chars, count
+
+
+def _block_words(blocks):
+    for block in blocks:
+        yield from block.split()
+
+
+def iter_steps(blocks, strategy, coalesce=False, paste_batch=1):
+    """Generate the steps of a plan from an iterable of text blocks
+
+    Blocks must not split a word, see whitespace_aligned(). Nothing is
+    materialized, so this also compiles text that is still being read.
+    With coalesce set (no pacing between steps), runs of plain ASCII become
+    single write() calls and Arabic runs single pastes. paste_batch is the
+    number of words per paste in the Arabic word strategies.
+    """
+    if strategy.startswith(MIXED):
+        _, english_mode, paste = strategy.split(":")
+        units = (unit for block in blocks
+                 for unit in _mixed_units(block, english_mode, paste, coalesce, paste_batch))
+    elif strategy == ARABIC_PASTE_WHOLE:
+        units = ((((PASTE, block),), len(block), 1) for block in blocks if block)
+    elif strategy == ARABIC_PASTE_WORDS:
+        # Pacing always applies here, so words are never merged
+        units = _word_units(_block_words(blocks), PASTE, False, paste_batch)
+    elif strategy == ENGLISH_WORD:
+        units = _word_units(_block_words(blocks), WRITE, coalesce)
+    elif strategy == ARABIC_WORD:
+        units = _word_units(_block_words(blocks), PASTE, coalesce, paste_batch)
+    else:
+        paste = strategy == ARABIC_CHARACTER
+        units = (unit for block in blocks
+                 for unit in _character_units(block, paste, coalesce))
+
+    if coalesce:
+        return _merge(units)
+    return units
+
+
+def key_steps(key, count, coalesce):
+    """count presses of key, one step each, or grouped when unpaced"""
+    if not coalesce:
+        return [(((PRESS, key),), 1, 1)] * count
+    steps = []
+    while count > 0:
+        group = min(count, COALESCED_STEP_CHARS)
+        steps.append((((PRESS, key),) * group, group, group))
+        count -= group
+    return steps
+
+
+def whitespace_aligned(blocks, max_carry=1 << 20):
+    """Re-cut text blocks so that every block ends on whitespace
+
+    The text after the last whitespace of a block is carried into the next
+    one, so words and script runs are never split between blocks. A carry
+    longer than max_carry characters is released as is.
+    """
+    carry = ""
+    for block in blocks:
+        block = carry + block
+        cut = max(block.rfind(' '), block.rfind('\n'), block.rfind('\t')) + 1
+        if cut == 0 and len(block) < max_carry:
+            carry = block
+            continue
+        if cut == 0:
+            cut = len(block)
+        carry = block[cut:]
+        yield block[:cut]
+    if carry:
+        yield carry
+
+
+def compile_plan(text, strategy, coalesce=False, paste_batch=1, key=None):
+    """Turn text into a KeystrokePlan for the given strategy"""
+    steps = tuple(iter_steps((text,), strategy, coalesce, paste_batch))
+    return KeystrokePlan(key, strategy, steps, len(text), coalesce, paste_batch)
+
+
+def plan_key(text, strategy, coalesce, paste_batch=1):
+    """Hash of the text and the settings that affect compilation"""
+    digest = hashlib.sha1(text.encode("utf-8", "surrogatepass"))
+    digest.update(f"\0{strategy}\0{int(coalesce)}\0{paste_batch}".encode("ascii"))
+    return digest.hexdigest()
+
+
+class PlanCache:
+    """Small LRU cache of compiled plans keyed by plan_key()
+
+    Bounded by the plans it holds and by the characters they cover
+    together; a text longer than STREAMED_TEXT_CHARS is compiled but not
+    kept.
+    """
+
+    def __init__(self, max_plans=32, max_chars=MAX_CACHED_CHARS):
+        self.max_plans = max_plans
+        self.max_chars = max_chars
+        self.chars = 0
+        self._plans = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_plan(self, text, strategy, coalesce=False, paste_batch=1):
+        """Return the cached plan for text, compiling it on first use"""
+        key = plan_key(text, strategy, coalesce, paste_batch)
+        plan = self._plans.get(key)
+        if plan is not None:
+            self._plans.move_to_end(key)
+            self.hits += 1
+            return plan
+
+        self.misses += 1
+        plan = compile_plan(text, strategy, coalesce, paste_batch, key)
+        if len(text) > min(STREAMED_TEXT_CHARS, self.max_chars):
+            return plan
+        self._plans[key] = plan
+        self.chars += len(text)
+        while len(self._plans) > self.max_plans or self.chars > self.max_chars:
+            _, evicted = self._plans.popitem(last=False)
+            self.chars -= evicted.total_chars
+        return plan
+
+    def clear(self):
+        self._plans.clear()
+        self.chars = 0
+
+    def __len__(self):
+        return len(self._plans)
@@ -0,0 +1,413 @@
+import atexit
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+from pathlib import Path
+
+from .ui_channel import FRAME_INTERVAL_MS
+
+
+# Progress is sent to the app at most this often, the last value always
+PROGRESS_INTERVAL = FRAME_INTERVAL_MS / 1000.0
+
+# Seconds to wait for the worker process to load its backend
+START_TIMEOUT = 30.0
+
+# Seconds close() waits for the worker before terminating it
+CLOSE_TIMEOUT = 2.0
+
+# Seconds resume_point() waits for the worker's answer, a hung worker
+# then reads as no checkpoint instead of blocking the caller
+REPLY_TIMEOUT = 5.0
+
+
+class TypingProcessError(RuntimeError):
+    """The worker process could not be started or has died"""
+
+
+def _serve(conn, backend_name, checkpoint_path):
+    """Main function of the worker process
+
+    Runs a TypingEngine on its own backend. A reader thread takes stop,
+    pause and resume messages even while a job is typed; jobs are run one
+    at a time on the main thread.
+    """
+    # Ctrl+C in a terminal reaches the whole process group, the app decides
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from .backends import create_backend
+    from .checkpoint import CheckpointStore
+    from .engine import TypingEngine
+    from .sources import FileSource
+
+    try:
+        backend = create_backend(backend_name)
+    except Exception as e:
+        conn.send(("failed", f"{type(e).__name__}: {e}"))
+        return
+
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    last_progress = [0.0]
+
+    def on_progress(done, total):
+        now = time.perf_counter()
+        if now - last_progress[0] >= PROGRESS_INTERVAL or done >= total:
+            last_progress[0] = now
+            send(("progress", done, total))
+
+    engine = TypingEngine(
+        backend,
+        on_progress=on_progress,
+        on_status=lambda message: send(("status", message)),
+        checkpoints=CheckpointStore(checkpoint_path) if checkpoint_path else None,
+    )
+    jobs = queue.SimpleQueue()
+    # Highest job id a stop was sent for, it may arrive before its job starts
+    stopped_through = [0]
+
+    def read():
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                # The app is gone, stop typing right away
+                engine.stop()
+                jobs.put(("close",))
+                return
+            kind = message[0]
+            if kind == "stop":
+                stopped_through[0] = max(stopped_through[0], message[1])
+                engine.stop()
+            elif kind == "pause":
+                engine.pause()
+            elif kind == "resume":
+                engine.resume()
+            elif kind == "resume_point":
+                checkpoint = engine.checkpoints.get(message[2]) if engine.checkpoints else None
+                send(("reply", message[1], checkpoint.as_dict() if checkpoint else None))
+            else:
+                jobs.put(message)
+                if kind == "close":
+                    return
+
+    threading.Thread(target=read, name="typing-process-reader", daemon=True).start()
+    send(("ready", backend.name, backend.types_unicode))
+    try:
+        while True:
+            message = jobs.get()
+            if message[0] == "close":
+                break
+            _, job_id, kind, payload, settings, resume = message
+            completed = False
+            engine.last_report = engine.last_telemetry = None
+            # From here a stop is kept for this job: either it is already
+            # in stopped_through, or the reset at the start of the run
+            # leaves it alone
+            engine.begin_run()
+            if job_id > stopped_through[0]:
+                try:
+                    if kind == "text":
+                        completed = engine.run(payload, settings, resume=resume)
+                    elif kind == "retype":
+                        completed = engine.retype(payload[0], payload[1], settings)
+                    elif kind == "expand":
+                        completed = engine.expand(payload[0], payload[1], settings)
+                    elif kind == "fan_out":
+                        completed = engine.fan_out(payload[0], payload[1], settings)
+                    else:
+                        source = FileSource(payload)
+                        try:
+                            completed = engine.run_source(source, settings, resume=resume)
+                        finally:
+                            source.close()
+                except Exception as e:
+                    send(("status", f"Error typing text: {str(e)}"))
+            send(("done", job_id, completed, engine.last_report, engine.last_telemetry,
+                  engine.last_stop_latency, engine.chars_typed))
+    finally:
+        backend.close()
+
+
+class _ProcessControl:
+    """The part of RunControl the app and TypingWorker read"""
+
+    def __init__(self):
+        self.stopped = False
+        self.paused = False
+
+
+class ProcessEngine:
+    """TypingEngine stand-in that types in a separate worker process
+
+    The Tk mainloop and the typing loop no longer share a GIL, so redraws
+    and window drags cannot delay a keystroke, and a crash in the backend
+    (a ctypes call into Xlib, say) only ends the worker: the run fails, the
+    app reports it and the next run starts a new process. Jobs go over a
+    pipe as the text or file path plus the TypingSettings; the worker
+    compiles and paces them with its own plan cache and backend, and sends
+    back status messages and progress at most every PROGRESS_INTERVAL.
+
+    run(), run_source(), retype(), expand() and fan_out() block like the
+    engine's, so TypingWorker drives either one. Streams (stdin) cannot be
+    sent, only files by path.
+    """
+
+    def __init__(self, backend="auto", on_progress=None, on_status=None, checkpoint_path=None):
+        self.backend_name = backend
+        self.on_progress = on_progress
+        self.on_status = on_status
+        self.checkpoint_path = str(checkpoint_path) if checkpoint_path is not None else None
+        self.control = _ProcessControl()
+        self.types_unicode = False
+        self.last_report = None
+        self.last_telemetry = None
+        self.last_stop_latency = None
+        self.last_text = None
+        self.running = False
+        self.restarts = 0
+        self._chars_typed = 0
+        self._process = None
+        self._conn = None
+        self._job_id = 0
+        # begin_run() already gave the next job its id
+        self._begun = False
+        self._result = None
+        self._done = threading.Event()
+        # Answers to resume_point() as (query id, values), the id is None
+        # when the process is gone
+        self._replies = queue.SimpleQueue()
+        self._query_id = 0
+        self._send_lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        atexit.register(self.close)
+
+    def start(self):
+        """Start the worker process if it is not running, raise if it fails"""
+        if self._process is not None and self._process.is_alive():
+            return self
+        context = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = context.Pipe()
+        process = context.Process(target=_serve, args=(child_conn, self.backend_name, self.checkpoint_path),
+                                  name="typing-process", daemon=True)
+        process.start()
+        child_conn.close()
+        if not parent_conn.poll(START_TIMEOUT):
+            process.terminate()
+            raise TypingProcessError("Typing process did not start")
+        try:
+            message = parent_conn.recv()
+        except EOFError:
+            process.join(CLOSE_TIMEOUT)
+            raise TypingProcessError(f"Typing process exited with code {process.exitcode}")
+        if message[0] != "ready":
+            process.join()
+            raise TypingProcessError(message[1])
+        _, self.backend_name, self.types_unicode = message
+        if self._conn is not None:
+            self.restarts += 1
+        self._process, self._conn = process, parent_conn
+        threading.Thread(target=self._read, args=(parent_conn,), name="typing-process-events",
+                         daemon=True).start()
+        return self
+
+    def _send(self, message):
+        with self._send_lock:
+            self._conn.send(message)
+
+    def _read(self, conn):
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            kind = message[0]
+            if kind == "progress":
+                self._chars_typed = message[1]
+                if self.on_progress:
+                    self.on_progress(message[1], message[2])
+            elif kind == "status":
+                if self.on_status:
+                    self.on_status(message[1])
+            elif kind == "done":
+                if message[1] == self._job_id:
+                    self._result = message[2:]
+                    self._done.set()
+            elif kind == "reply":
+                self._replies.put(message[1:])
+        # The pipe closed: the process exited or crashed
+        if conn is self._conn:
+            self._replies.put((None, None))
+            if self.running:
+                self._result = None
+                self._done.set()
+
+    def _call(self, kind, payload, settings, resume=False):
+        with self._run_lock:
+            try:
+                self.start()
+            except Exception as e:
+                if self.on_status:
+                    self.on_status(f"Error starting typing process: {str(e)}")
+                print(f"Typing process error: {str(e)}")
+                return False
+            with self._send_lock:
+                if self._begun:
+                    self._begun = False
+                else:
+                    self._job_id += 1
+                    self.control.stopped = self.control.paused = False
+            self._done.clear()
+            self._result = None
+            self._chars_typed = 0
+            self.running = True
+            try:
+                self._send(("run", self._job_id, kind, payload, settings, resume))
+                # A timeout keeps the wait interruptible on Windows
+                while not self._done.wait(0.5):
+                    pass
+            except OSError:
+                self._result = None
+            finally:
+                self.running = False
+            if self._result is None:
+                exitcode = None
+                if self._process is not None:
+                    self._process.join(CLOSE_TIMEOUT)
+                    exitcode = self._process.exitcode
+                if self.on_status:
+                    self.on_status(f"Typing process stopped unexpectedly (exit code {exitcode}), "
+                                   "it is restarted for the next run")
+                print(f"Typing process died, exit code {exitcode}")
+                self._process = None
+                self.last_text = None
+                return False
+            completed, self.last_report, self.last_telemetry, self.last_stop_latency, self._chars_typed = self._result
+            return completed
+
+    def run(self, text, settings, resume=False):
+        completed = self._call("text", text, settings, resume)
+        self.last_text = text if completed else None
+        return completed
+
+    def run_source(self, source, settings, resume=False):
+        path = getattr(source, "path", None)
+        if path is None:
+            raise ValueError("The typing process can only type files, not streams")
+        self.last_text = None
+        return self._call("file", str(Path(path).resolve()), settings, resume)
+
+    def retype(self, previous, text, settings):
+        completed = self._call("retype", (previous, text), settings)
+        self.last_text = text if completed else None
+        return completed
+
+    def expand(self, abbreviation, text, settings):
+        self.last_text = None
+        return self._call("expand", (abbreviation, text), settings)
+
+    def fan_out(self, text, targets, settings):
+        self.last_text = None
+        return self._call("fan_out", (text, list(targets)), settings)
+
+    def resume_point(self, text=None, source=None):
+        """Checkpoint of an interrupted run of text or source, or None
+
+        Called from the Tk thread, so it never starts the worker process.
+        Without a live one the checkpoint file is read directly: the worker
+        writes it whenever a run stops or finishes.
+        """
+        from .checkpoint import Checkpoint, CheckpointStore, text_key
+        if self.checkpoint_path is None:
+            return None
+        key = text_key(text) if source is None else source.checkpoint_key()
+        process = self._process
+        if process is None or not process.is_alive():
+            return CheckpointStore(self.checkpoint_path).get(key)
+        self._query_id += 1
+        query_id = self._query_id
+        try:
+            self._send(("resume_point", query_id, key))
+        except Exception as e:
+            print(f"Typing process error: {str(e)}")
+            return None
+        deadline = time.monotonic() + REPLY_TIMEOUT
+        while True:
+            try:
+                reply_id, values = self._replies.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                print("Typing process did not answer the resume query")
+                return None
+            # Late answers to queries that timed out are dropped
+            if reply_id is None or reply_id == query_id:
+                return Checkpoint.from_dict(values) if values else None
+
+    @property
+    def active(self):
+        return self.running and not self.control.stopped
+
+    @property
+    def stopped(self):
+        return self.control.stopped
+
+    @property
+    def chars_typed(self):
+        return self._chars_typed
+
+    @property
+    def paused(self):
+        return self.control.paused
+
+    def _control(self, message):
+        try:
+            if self._conn is not None:
+                self._send(message)
+        except OSError:
+            pass
+
+    def pause(self):
+        self.control.paused = True
+        self._control(("pause",))
+
+    def resume(self):
+        self.control.paused = False
+        self._control(("resume",))
+
+    def toggle_pause(self):
+        if self.control.paused:
+            self.resume()
+        else:
+            self.pause()
+        return self.control.paused
+
+    def stop(self):
+        self.control.stopped = True
+        self.control.paused = False
+        self._control(("stop", self._job_id))
+
+    def begin_run(self):
+        """The next run was picked up, a stop() from now on applies to it
+
+        The job gets its id here, so the worker skips it when the stop
+        arrives before the job does.
+        """
+        with self._send_lock:
+            self._job_id += 1
+            self._begun = True
+            self.control.stopped = self.control.paused = False
+
+    def close(self):
+        """End the worker process, it restores its backend first"""
+        process = self._process
+        if process is None:
+            return
+        self._process = None
+        self._control(("close",))
+        process.join(CLOSE_TIMEOUT)
+        if process.is_alive():
+            process.terminate()
@@ -0,0 +1,41 @@
+import re
+
+
+# Arabic, Arabic Supplement, Extended-B, Extended-A, Presentation Forms-A and
+# -B, Extended-C and Mathematical Alphabetic Symbols
+ARABIC_RANGES = (
+    "\u0600-\u06FF\u0750-\u077F\u0870-\u089F\u08A0-\u08FF"
+    "\uFB50-\uFDFF\uFE70-\uFEFF\U00010EC0-\U00010EFF\U0001EE00-\U0001EEFF"
+)
+
+# Arabic plus the other right-to-left scripts (Hebrew, Syriac, Thaana, NKo,
+# Samaritan, Mandaic) and the zero-width joiners and direction marks
+RTL_RANGES = ARABIC_RANGES + "\u0590-\u05FF\u0700-\u07FF\u0800-\u086F\uFB1D-\uFB4F\u200C-\u200F"
+
+# Segment kinds
+ASCII = "ascii"
+RTL = "rtl"
+OTHER = "other"
+
+ARABIC_RE = re.compile(f"[{ARABIC_RANGES}]")
+
+# One pass over the text: right-to-left runs keep the spaces between their
+# words, ASCII runs can be typed with keystrokes, anything else is pasted
+SEGMENT_RE = re.compile(
+    f"(?P<{RTL}>[{RTL_RANGES}]+(?:[ \u00A0]+[{RTL_RANGES}]+)*)"
+    f"|(?P<{ASCII}>[\x00-\x7F]+)"
+    f"|(?P<{OTHER}>[^\x00-\x7F{RTL_RANGES}]+)"
+)
+
+
+def contains_arabic(text):
+    """Return True if any character of text is in one of the Arabic blocks"""
+    return ARABIC_RE.search(text) is not None
+
+
+def segment_scripts(text):
+    """Split text into (kind, run) pairs, kind is ASCII, RTL or OTHER
+
+    Joining the runs gives back the original text.
+    """
+    return [(match.lastgroup, match.group()) for match in SEGMENT_RE.finditer(text)]
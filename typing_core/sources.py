@@ -0,0 +1,138 @@
+import codecs
+import mmap
+import re
+from pathlib import Path
+
+from .scripts import contains_arabic
+
+
+# Bytes read and decoded at a time, also the granularity of file progress
+BLOCK_SIZE = 16 * 1024
+
+# UTF-8 encodings of the Arabic blocks listed in scripts.ARABIC_RANGES, so a
+# file can be checked for Arabic without decoding it
+ARABIC_UTF8_RE = re.compile(
+    rb"[\xd8-\xdb]|\xdd[\x90-\xbf]|\xe0[\xa1-\xa3]|\xef[\xad-\xb7\xb9-\xbb]"
+    rb"|\xf0\x90\xbb|\xf0\x9e[\xb8-\xbb]"
+)
+
+
+class TextSource:
+    """Text that is decoded and typed block by block instead of all at once
+
+    Subclasses provide _read_blocks(), which yields raw bytes. size is the
+    total number of bytes when known and 0 otherwise, bytes_read how many
+    have been handed to the decoder so far.
+    """
+
+    name = "text"
+
+    # True if size and bytes_read count characters of a str, then the
+    # characters typed are the exact progress
+    counts_chars = False
+
+    def __init__(self, block_size=BLOCK_SIZE):
+        self.block_size = block_size
+        self.size = 0
+        self.bytes_read = 0
+
+    def _read_blocks(self):
+        raise NotImplementedError
+
+    def blocks(self):
+        """Yield the text as str blocks, decoding UTF-8 incrementally"""
+        # utf-8-sig also drops a byte order mark at the start of the file
+        decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        for data in self._read_blocks():
+            self.bytes_read += len(data)
+            text = decoder.decode(data)
+            if text:
+                yield text
+        text = decoder.decode(b"", final=True)
+        if text:
+            yield text
+
+    def contains_arabic(self):
+        """True or False if it can be known up front, None otherwise"""
+        return None
+
+    def checkpoint_key(self):
+        """Key identifying this input for resuming, None if it cannot be reread"""
+        return None
+
+    def close(self):
+        pass
+
+
+class FileSource(TextSource):
+    """Memory-mapped UTF-8 file, pages are only read as typing reaches them"""
+
+    def __init__(self, path, block_size=BLOCK_SIZE):
+        super().__init__(block_size)
+        self.path = Path(path)
+        self.name = self.path.name
+        self._file = open(self.path, "rb")
+        self.size = self.path.stat().st_size
+        # mmap refuses empty files
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+
+    def _read_blocks(self):
+        for start in range(0, self.size, self.block_size):
+            yield self._map[start:start + self.block_size]
+
+    def checkpoint_key(self):
+        # A file that was edited since the run is a different document
+        stat = self.path.stat()
+        return f"file:{self.path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def contains_arabic(self):
+        # A byte-level regex over the map, nothing is decoded or copied
+        return self._map is not None and ARABIC_UTF8_RE.search(self._map) is not None
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+
+class StringSource(TextSource):
+    """Text already in memory, handed out in blocks like a file
+
+    Lets a long text be compiled while it is typed, see TypingEngine.run().
+    """
+
+    counts_chars = True
+
+    def __init__(self, text, block_size=BLOCK_SIZE):
+        super().__init__(block_size)
+        self.text = text
+        self.size = len(text)
+
+    def blocks(self):
+        for start in range(0, self.size, self.block_size):
+            block = self.text[start:start + self.block_size]
+            self.bytes_read += len(block)
+            yield block
+
+    def contains_arabic(self):
+        return contains_arabic(self.text)
+
+
+class StreamSource(TextSource):
+    """Binary stream such as a pipe or sys.stdin.buffer, read as it arrives"""
+
+    name = "stream"
+
+    def __init__(self, stream, block_size=BLOCK_SIZE):
+        super().__init__(block_size)
+        self.stream = stream
+
+    def _read_blocks(self):
+        # read1() returns as soon as some data is there, so typing can start
+        # before the writer on the other end of the pipe has finished
+        read = getattr(self.stream, "read1", self.stream.read)
+        while True:
+            data = read(self.block_size)
+            if not data:
+                break
+            yield data
@@ -0,0 +1,188 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+# Where the app and the command line keep saved texts, relative to the
+# working directory like the old JSON file
+DEFAULT_STORE_PATH = Path("auto_typer_texts.db")
+LEGACY_JSON_PATH = Path("auto_typer_config.json")
+
+
+class SavedTextStore:
+    """Saved texts kept in SQLite, one row per text
+
+    Saving or deleting a text writes only that row in its own transaction,
+    so a crash can never lose the other texts. Only names are read up front,
+    bodies are fetched when a text is loaded. migrate_json() imports the old
+    whole-file JSON store. The jobs table is the journal of the typing
+    queue, see TypingWorker, and the profiles table holds named settings
+    profiles as JSON objects. A text can have a trigger abbreviation for
+    the text expander, unique among texts.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS texts ("
+                "name TEXT PRIMARY KEY, body TEXT NOT NULL, updated REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, record TEXT NOT NULL, "
+                "priority INTEGER NOT NULL, settings TEXT NOT NULL)"
+            )
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(texts)")]
+            if "abbreviation" not in columns:
+                # Added after the first release, NULL for texts without one
+                self._conn.execute("ALTER TABLE texts ADD COLUMN abbreviation TEXT")
+            self._conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS texts_abbreviation ON texts (abbreviation)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS profiles ("
+                "name TEXT PRIMARY KEY, settings TEXT NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def migrate_json(self, json_path):
+        """Import texts from the old auto_typer_config.json, once
+
+        The JSON file is renamed afterwards so it is not imported again but
+        stays around as a backup. Returns the number of imported texts.
+        """
+        json_path = Path(json_path)
+        if not json_path.exists():
+            return 0
+        with open(json_path, 'r', encoding='utf-8') as f:
+            texts = json.load(f)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO texts (name, body, updated) VALUES (?, ?, ?)",
+                [(name, body, now) for name, body in texts.items()],
+            )
+        json_path.replace(json_path.with_name(json_path.name + ".migrated"))
+        return len(texts)
+
+    def names(self):
+        """Names of all saved texts, without reading their bodies"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT name FROM texts")]
+
+    def get(self, name):
+        """Body of a saved text, or None if there is no text with that name"""
+        with self._lock:
+            row = self._conn.execute("SELECT body FROM texts WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def save(self, name, body):
+        # An update keeps the text's abbreviation, INSERT OR REPLACE would not
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE texts SET body = ?, updated = ? WHERE name = ?", (body, now, name)
+            )
+            if not cursor.rowcount:
+                self._conn.execute(
+                    "INSERT INTO texts (name, body, updated) VALUES (?, ?, ?)", (name, body, now)
+                )
+
+    def delete(self, name):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM texts WHERE name = ?", (name,))
+
+    def abbreviation(self, name):
+        with self._lock:
+            row = self._conn.execute("SELECT abbreviation FROM texts WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_abbreviation(self, name, abbreviation):
+        """Give a text its trigger abbreviation, None removes it
+
+        Raises sqlite3.IntegrityError if another text has the same one.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE texts SET abbreviation = ? WHERE name = ?", (abbreviation or None, name)
+            )
+
+    def abbreviations(self):
+        """Abbreviations of all texts that have one, mapped to the text names"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT abbreviation, name FROM texts WHERE abbreviation IS NOT NULL"
+            ).fetchall()
+        return dict(rows)
+
+    def items(self):
+        """All (name, body) pairs, for callers that really need every body"""
+        with self._lock:
+            rows = self._conn.execute("SELECT name, body FROM texts").fetchall()
+        return rows
+
+    def add_job(self, record, priority, settings):
+        """Journal a queued job, return its id"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (record, priority, settings) VALUES (?, ?, ?)",
+                (json.dumps(record), priority, json.dumps(settings)),
+            )
+        return cursor.lastrowid
+
+    def update_job(self, job_id, record):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE jobs SET record = ? WHERE id = ?", (json.dumps(record), job_id))
+
+    def remove_job(self, job_id):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def jobs(self):
+        """Journaled jobs as (id, record, priority, settings), in queue order"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, record, priority, settings FROM jobs ORDER BY priority DESC, id"
+            ).fetchall()
+        return [(job_id, json.loads(record), priority, json.loads(settings))
+                for job_id, record, priority, settings in rows]
+
+    def profile_names(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT name FROM profiles ORDER BY name")]
+
+    def profile(self, name):
+        """Values of a settings profile, or None if there is none by that name"""
+        with self._lock:
+            row = self._conn.execute("SELECT settings FROM profiles WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_profile(self, name, values):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO profiles (name, settings, updated) VALUES (?, ?, ?)",
+                (name, json.dumps(values), time.time()),
+            )
+
+    def delete_profile(self, name):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM profiles WHERE name = ?", (name,))
+
+    def __contains__(self, name):
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM texts WHERE name = ?", (name,)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM texts").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,162 @@
+import json
+import time
+
+
+# Each power of two is split into 2**SUB_BUCKET_BITS buckets, so a recorded
+# latency is known to within 12.5% whatever its size
+SUB_BUCKET_BITS = 3
+_LINEAR_LIMIT = 1 << (SUB_BUCKET_BITS + 1)
+
+# Operations timed by the engine, in the order they are reported
+OPERATIONS = (
+    "press",            # backend.press, one special key
+    "write",            # backend.write, one or more characters
+    "copy",             # putting text on the clipboard
+    "clipboard_wait",   # polling until the clipboard holds it
+    "paste_hotkey",     # sending Ctrl+V
+    "focus",            # moving the keyboard focus to another window
+    "pacing_sleep",     # sleeping until the next step is due
+    "progress",         # the on_progress callback, i.e. the UI
+    "pause",            # time spent paused by the user
+)
+
+
+def _bucket(micros):
+    if micros < _LINEAR_LIMIT:
+        return micros
+    shift = micros.bit_length() - (SUB_BUCKET_BITS + 1)
+    return (shift << SUB_BUCKET_BITS) + (micros >> shift)
+
+
+def _bucket_upper(index):
+    """Largest microsecond value that falls into a bucket"""
+    if index < _LINEAR_LIMIT:
+        return index
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    mantissa = index - (shift << SUB_BUCKET_BITS)
+    return ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram with microsecond resolution
+
+    Recording is one multiplication, a bit_length() and a dict update, no
+    matter how many values are kept, so it can sit in the typing loop.
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        micros = int(seconds * 1e6)
+        if micros < 0:
+            micros = 0
+        index = _bucket(micros)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, percent):
+        """Upper bound in seconds of the given percentile, 0.0 when empty"""
+        if not self.count:
+            return 0.0
+        rank = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(_bucket_upper(index) / 1e6, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class Telemetry:
+    """Per-operation latency histograms of one run
+
+    The engine only creates one when TypingSettings.instrument is set; with
+    instrumentation off none of the timing wrappers are installed at all.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.histograms = {}
+
+    def histogram(self, operation):
+        histogram = self.histograms.get(operation)
+        if histogram is None:
+            histogram = self.histograms[operation] = LatencyHistogram()
+        return histogram
+
+    def record(self, operation, seconds):
+        self.histogram(operation).record(seconds)
+
+    def timed(self, operation, func):
+        """Wrap func so that every call is recorded under operation"""
+        clock = self.clock
+        record = self.histogram(operation).record
+
+        def call(*args):
+            start = clock()
+            try:
+                return func(*args)
+            finally:
+                record(clock() - start)
+        return call
+
+    def report(self, pacing_report):
+        """Combine the histograms with the run's PacingReport"""
+        names = [name for name in OPERATIONS if name in self.histograms]
+        names += sorted(name for name in self.histograms if name not in OPERATIONS)
+        return TelemetryReport(pacing_report, {
+            name: self.histograms[name].as_dict()
+            for name in names if self.histograms[name].count
+        })
+
+
+class TelemetryReport:
+    """Rate and per-operation latencies of a finished run"""
+
+    def __init__(self, pacing, operations):
+        self.pacing = pacing
+        self.operations = operations
+
+    def as_dict(self):
+        return {"pacing": self.pacing.as_dict() if self.pacing else None,
+                "operations": self.operations}
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.as_dict(), **kwargs)
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+    def format(self):
+        """Plain text table for the GUI and the command line"""
+        lines = []
+        if self.pacing:
+            lines.append(f"Rate: {self.pacing.summary()}")
+            lines.append(f"Characters: {self.pacing.chars}, typing time {self.pacing.elapsed:.3f} s, "
+                         f"lost to pauses {self.pacing.paused:.3f} s")
+            lines.append("")
+        lines.append(f"{'operation':<16}{'count':>8}{'total s':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for name, stats in self.operations.items():
+            lines.append(f"{name:<16}{stats['count']:>8}{stats['total']:>10.3f}"
+                         f"{stats['p50'] * 1000:>10.3f}{stats['p99'] * 1000:>10.3f}{stats['max'] * 1000:>10.3f}")
+        return "\n".join(lines)
@@ -0,0 +1,176 @@
+import bisect
+import re
+import threading
+
+
+# Arabic diacritics (harakat, superscript alef, Quranic marks) and tatweel are
+# dropped, alef, yeh and teh marbuta variants folded to one letter
+_ARABIC_FOLDING = {
+    **{code: None for code in range(0x064B, 0x0660)},
+    0x0670: None,
+    **{code: None for code in range(0x06D6, 0x06EE)},
+    0x0640: None,
+    0x0623: '\u0627',  # alef with hamza above
+    0x0625: '\u0627',  # alef with hamza below
+    0x0622: '\u0627',  # alef with madda
+    0x0671: '\u0627',  # alef wasla
+    0x0649: '\u064A',  # alef maksura to yeh
+    0x0629: '\u0647',  # teh marbuta to heh
+}
+FOLDING_TABLE = str.maketrans(_ARABIC_FOLDING)
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Arabic definite article, words are also indexed without it so that a search
+# for a word finds it with "al-" in front
+ARABIC_ARTICLE = "\u0627\u0644"
+
+# One-letter prefixes written together with the next word (wa-, fa-, bi-,
+# ka-, li-), words are also indexed without them and then without the article
+ARABIC_PROCLITICS = "\u0648\u0641\u0628\u0643\u0644"
+
+# Body words are only searched for query words at least this long, shorter
+# prefixes match most of the vocabulary and are not useful
+MIN_BODY_TOKEN = 2
+
+
+def normalize(text):
+    """Case-fold text and remove the Arabic differences a search should ignore"""
+    return text.casefold().translate(FOLDING_TABLE)
+
+
+def body_words(body):
+    """Normalized words of a body, plus Arabic words without their prefixes"""
+    words = set(TOKEN_RE.findall(normalize(body)))
+    words.update([word[1:] for word in words
+                  if word[0] in ARABIC_PROCLITICS and len(word) > 3])
+    words.update([word[2:] for word in words
+                  if word.startswith(ARABIC_ARTICLE) and len(word) > 4])
+    return words
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TextIndex:
+    """In-memory search index over saved text names and bodies
+
+    Names are matched by substring (prefixes included) through a trigram
+    index, bodies by word prefixes through an inverted index over a sorted
+    vocabulary. Adding or removing a text only touches that text's entries.
+    Bodies can be added later than names, so the index is usable while the
+    bodies are still being read.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._names = []          # sorted display names
+        self._normalized = {}     # name -> normalized name
+        self._trigrams = {}       # trigram -> set of names
+        self._postings = {}       # body word -> set of names
+        self._vocabulary = []     # sorted body words
+        self._body_words = {}     # name -> set of body words
+
+    def names(self):
+        with self._lock:
+            return list(self._names)
+
+    def __contains__(self, name):
+        return name in self._normalized
+
+    def __len__(self):
+        return len(self._names)
+
+    def add(self, name, body=None):
+        """Add or update a text, return its position in names()"""
+        with self._lock:
+            if name not in self._normalized:
+                bisect.insort(self._names, name)
+                normalized = normalize(name)
+                self._normalized[name] = normalized
+                for gram in _trigrams(normalized):
+                    self._trigrams.setdefault(gram, set()).add(name)
+            if body is not None:
+                self.set_body(name, body)
+            return bisect.bisect_left(self._names, name)
+
+    def set_body(self, name, body):
+        with self._lock:
+            self._remove_body(name)
+            words = body_words(body)
+            self._body_words[name] = words
+            for word in words:
+                names = self._postings.get(word)
+                if names is None:
+                    names = self._postings[word] = set()
+                    bisect.insort(self._vocabulary, word)
+                names.add(name)
+
+    def _remove_body(self, name):
+        for word in self._body_words.pop(name, ()):
+            names = self._postings[word]
+            names.discard(name)
+            if not names:
+                del self._postings[word]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, word)]
+
+    def remove(self, name):
+        """Remove a text, return the position it had in names() or None"""
+        with self._lock:
+            normalized = self._normalized.pop(name, None)
+            if normalized is None:
+                return None
+            for gram in _trigrams(normalized):
+                names = self._trigrams[gram]
+                names.discard(name)
+                if not names:
+                    del self._trigrams[gram]
+            self._remove_body(name)
+            position = bisect.bisect_left(self._names, name)
+            del self._names[position]
+            return position
+
+    def _match_names(self, query):
+        if len(query) < 3:
+            return {name for name, normalized in self._normalized.items() if query in normalized}
+        candidates = None
+        for gram in _trigrams(query):
+            names = self._trigrams.get(gram)
+            if not names:
+                return set()
+            candidates = set(names) if candidates is None else candidates & names
+        return {name for name in candidates if query in self._normalized[name]}
+
+    def _match_word_prefix(self, prefix):
+        vocabulary = self._vocabulary
+        position = bisect.bisect_left(vocabulary, prefix)
+        matches = set()
+        while position < len(vocabulary) and vocabulary[position].startswith(prefix):
+            matches |= self._postings[vocabulary[position]]
+            position += 1
+        return matches
+
+    def _match_bodies(self, query):
+        words = [word for word in TOKEN_RE.findall(query) if len(word) >= MIN_BODY_TOKEN]
+        if not words:
+            return set()
+        matches = None
+        for word in words:
+            names = self._match_word_prefix(word)
+            matches = names if matches is None else matches & names
+            if not matches:
+                return set()
+        return matches
+
+    def search(self, query):
+        """Sorted names whose name contains query or whose body has its words"""
+        query = normalize(query.strip())
+        with self._lock:
+            if not query:
+                return list(self._names)
+            matches = self._match_names(query) | self._match_bodies(query)
+            if len(matches) * 8 > len(self._names):
+                # Cheaper to filter the already sorted list than to sort
+                return [name for name in self._names if name in matches]
+        return sorted(matches)
@@ -0,0 +1,43 @@
+import threading
+from collections import deque
+
+
+# How often the GUI drains the channel while a run is active
+FRAME_INTERVAL_MS = 33
+
+
+class UIUpdateChannel:
+    """Thread-safe mailbox from the typing worker to the GUI thread
+
+    The worker posts without ever touching a widget. Progress keeps only the
+    latest value, so posting it is O(1) and the GUI does one progress bar
+    update per frame however many keystrokes were sent in between. Status
+    messages and other events are kept in order.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._progress = None
+        self._events = deque()
+        self.progress_posts = 0
+
+    def post_progress(self, done, total):
+        with self._lock:
+            self._progress = (done, total)
+            self.progress_posts += 1
+
+    def post_status(self, message):
+        self.post_event("status", message)
+
+    def post_event(self, kind, value=None):
+        with self._lock:
+            self._events.append((kind, value))
+
+    def drain(self):
+        """Return (latest progress or None, list of (kind, value) events)"""
+        with self._lock:
+            progress = self._progress
+            self._progress = None
+            events = list(self._events)
+            self._events.clear()
+        return progress, events